@@ -0,0 +1,184 @@
+"""Load test for the relay in server.py, against a local stand-in for OpenAI.
+
+    python load_test.py --clients 200 --requests 5 --deltas 50
+
+Starts the stand-in upstream and the relay as subprocesses, connects
+``--clients`` websocket clients, and has each send ``--requests`` text
+messages. For every message the stand-in streams ``--deltas`` text deltas.
+Each delta is one word: the time it was sent. A client can therefore measure
+the delay from upstream to client even when the relay joins several deltas
+into one frame. The test reports that delay per delta, the delta
+throughput, how many frames the deltas arrived in, and how many clients
+failed.
+
+With ``--drop-after N`` the stand-in instead aborts each connection
+without a close handshake after N deltas, and the test checks that every
+client is closed with code 1011 rather than left waiting.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+async def stand_in_upstream(port, deltas, interval, drop_after=0):
+    """Answers every response.create with a stream of timestamped text deltas"""
+    async def handle(websocket):
+        try:
+            async for message in websocket:
+                if json.loads(message).get("type") != "response.create":
+                    continue
+                for sent in range(deltas):
+                    if drop_after and sent == drop_after:
+                        # Drop the TCP connection, as a crashed upstream would
+                        websocket.transport.abort()
+                        return
+                    await websocket.send(json.dumps({"type": "response.text.delta", "delta": f"{time.time()!r} "}))
+                    if interval:
+                        await asyncio.sleep(interval)
+                await websocket.send(json.dumps({"type": "response.done"}))
+        except ConnectionClosed:
+            pass
+
+    async with serve(handle, "127.0.0.1", port, max_queue=1024):
+        await asyncio.Future()
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for_port(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+async def client(url, requests, deltas, latencies, frames):
+    async with connect(url, max_queue=1024) as websocket:
+        for _ in range(requests):
+            await websocket.send(json.dumps({"type": "text.data", "text": {"content": "Tell me about yourself"}}))
+            received = 0
+            while received < deltas:
+                data = json.loads(await websocket.recv())
+                now = time.time()
+                sent = data["text"]["content"].split()
+                latencies.extend(now - float(stamp) for stamp in sent)
+                received += len(sent)
+                frames.append(len(sent))
+
+async def dropped_client(url):
+    """Sends one message and reads until the relay closes; returns the close code"""
+    async with connect(url, max_queue=1024) as websocket:
+        await websocket.send(json.dumps({"type": "text.data", "text": {"content": "Tell me about yourself"}}))
+        try:
+            while True:
+                await websocket.recv()
+        except ConnectionClosed:
+            return websocket.close_code
+
+async def run_clients(args, url):
+    latencies, frames = [], []
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            asyncio.wait_for(
+                dropped_client(url) if args.drop_after
+                else client(url, args.requests, args.deltas, latencies, frames),
+                args.timeout
+            )
+            for _ in range(args.clients)
+        ),
+        return_exceptions=True
+    )
+    if args.drop_after:
+        # Anything but 1011 means the client was not told the upstream failed
+        results = [
+            result if isinstance(result, BaseException) or result == 1011
+            else RuntimeError(f"closed with code {result}")
+            for result in results
+        ]
+    elapsed = time.perf_counter() - started
+    return latencies, frames, elapsed, [result for result in results if isinstance(result, BaseException)]
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5, help="messages sent by each client")
+    parser.add_argument("--deltas", type=int, default=50, help="deltas streamed per message")
+    parser.add_argument("--delta-interval-ms", type=float, default=20.0, help="pause between deltas upstream")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds allowed per client")
+    parser.add_argument(
+        "--drop-after", type=int, default=0, metavar="N",
+        help="abort each upstream connection after N deltas and expect clients to be closed with 1011"
+    )
+    parser.add_argument("--server", default=os.path.join(HERE, "server.py"), help="relay script to test")
+    parser.add_argument("--upstream", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.upstream:
+        asyncio.run(stand_in_upstream(args.upstream, args.deltas, args.delta_interval_ms / 1000, args.drop_after))
+        return
+
+    upstream_port, relay_port = free_port(), free_port()
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="load-test",
+        OPENAI_WS_URL=f"ws://127.0.0.1:{upstream_port}",
+        RELAY_HOST="127.0.0.1",
+        RELAY_PORT=str(relay_port),
+    )
+    processes = [
+        subprocess.Popen([
+            sys.executable, __file__, "--upstream", str(upstream_port),
+            "--deltas", str(args.deltas), "--delta-interval-ms", str(args.delta_interval_ms),
+            "--drop-after", str(args.drop_after)
+        ]),
+        subprocess.Popen([sys.executable, args.server], env=env, stderr=subprocess.DEVNULL),
+    ]
+    try:
+        wait_for_port(upstream_port)
+        wait_for_port(relay_port)
+        latencies, frames, elapsed, errors = asyncio.run(run_clients(args, f"ws://127.0.0.1:{relay_port}"))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    if args.drop_after:
+        print(f"clients: {args.clients}, upstream dropped after {args.drop_after} deltas")
+        print(f"clients closed with 1011: {args.clients - len(errors)}/{args.clients} in {elapsed:.2f}s")
+        print(f"failed clients: {len(errors)}" + (f" (first: {errors[0]!r})" if errors else ""))
+        sys.exit(1 if errors else 0)
+
+    latencies.sort()
+    expected = args.clients * args.requests * args.deltas
+    print(f"clients: {args.clients}, messages per client: {args.requests}, deltas per message: {args.deltas}")
+    print(f"deltas received: {len(latencies)}/{expected} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s)")
+    print(f"client frames: {len(frames)} ({len(latencies) / max(1, len(frames)):.1f} deltas per frame)")
+    print(f"failed clients: {len(errors)}" + (f" (first: {errors[0]!r})" if errors else ""))
+    if latencies:
+        print(
+            f"upstream-to-client latency ms: p50 {percentile(latencies, 0.5) * 1000:.2f}, "
+            f"p95 {percentile(latencies, 0.95) * 1000:.2f}, p99 {percentile(latencies, 0.99) * 1000:.2f}, "
+            f"max {latencies[-1] * 1000:.2f}, mean {statistics.mean(latencies) * 1000:.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 import os
 import json
 import asyncio
-import websocket
 import logging
 from dotenv import load_dotenv
-from websockets.server import serve
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed, ConnectionClosedOK
 
 load_dotenv()
 
@@ -12,43 +13,53 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-OPENAI_WS_URL = "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-12-17"
+OPENAI_WS_URL = os.getenv("OPENAI_WS_URL", "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-12-17")
+RELAY_HOST = os.getenv("RELAY_HOST", "localhost")
+RELAY_PORT = int(os.getenv("RELAY_PORT", "8000"))
+# Messages buffered in each direction per client; when a queue is full
+# the relay stops reading from that side until the other catches up
+RELAY_QUEUE_SIZE = int(os.getenv("RELAY_QUEUE_SIZE", "256"))
+# Text deltas arriving within this many milliseconds of the first are sent
+# to the client as one frame, up to this many characters; 0 disables it
+RELAY_COALESCE_MS = float(os.getenv("RELAY_COALESCE_MS", "5"))
+RELAY_COALESCE_CHARS = int(os.getenv("RELAY_COALESCE_CHARS", "512"))
+
+INSTRUCTIONS = "You are an AI interviewer. Conduct the interview professionally."
+TIMED_OUT = object()
 
 class OpenAIWebSocket:
+    """Relays one client to OpenAI.
+
+    Everything runs on the server's event loop: a reader task turns OpenAI
+    events into client messages, and two writer tasks drain the bounded
+    queues towards OpenAI and towards the client. The client writer joins
+    deltas that arrive close together into one text.data frame.
+    """
+
     def __init__(self, client_ws):
         self.client_ws = client_ws
         self.ws = None
-        self.headers = [
-            f"Authorization: Bearer {OPENAI_API_KEY}",
-            "OpenAI-Beta: realtime=v1"
-        ]
+        self.headers = {
+            "Authorization": f"Bearer {OPENAI_API_KEY}",
+            "OpenAI-Beta": "realtime=v1"
+        }
+        self.to_openai = asyncio.Queue(maxsize=RELAY_QUEUE_SIZE)
+        self.to_client = asyncio.Queue(maxsize=RELAY_QUEUE_SIZE)
 
-    def on_message(self, ws, message):
+    async def on_message(self, message):
         """Handle messages from OpenAI"""
         try:
+            logger.debug("Received from OpenAI: %s", message)
+            # Only text deltas are forwarded, so skip parsing everything else
+            if "response.text.delta" not in message:
+                return
             data = json.loads(message)
-            logger.info(f"Received from OpenAI: {json.dumps(data, indent=2)}")
-            
-            # Forward text deltas to the client
             if data.get("type") == "response.text.delta":
-                asyncio.run(self.client_ws.send(json.dumps({
-                    "type": "text.data",
-                    "text": {
-                        "content": data.get("delta", "")
-                    }
-                })))
+                await self.to_client.put(data.get("delta", ""))
         except Exception as e:
             logger.error(f"Error handling OpenAI message: {e}")
 
-    def on_error(self, ws, error):
-        """Handle WebSocket errors"""
-        logger.error(f"OpenAI WebSocket error: {error}")
-
-    def on_close(self, ws, close_status_code, close_msg):
-        """Handle WebSocket closure"""
-        logger.info("OpenAI WebSocket connection closed")
-
-    def on_open(self, ws):
+    async def on_open(self):
         """Handle WebSocket connection open"""
         logger.info("Connected to OpenAI")
         # Initialize the session with text modality
@@ -56,72 +67,151 @@ class OpenAIWebSocket:
             "type": "session.update",
             "session": {
                 "modalities": ["text"],
-                "instructions": "You are an AI interviewer. Conduct the interview professionally.",
+                "instructions": INSTRUCTIONS,
                 "temperature": 0.7,
                 "max_response_output_tokens": 1000
             }
         }
-        ws.send(json.dumps(init_event))
+        await self.ws.send(json.dumps(init_event))
 
-    def connect(self):
+    async def connect(self):
         """Establish connection to OpenAI"""
-        self.ws = websocket.WebSocketApp(
-            OPENAI_WS_URL,
-            header=self.headers,
-            on_open=self.on_open,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close
-        )
-        return self.ws
-
-    def send(self, message):
-        """Send message to OpenAI"""
-        if self.ws:
-            # Convert client message to OpenAI format
-            data = json.loads(message)
-            if data.get("type") == "text.data":
-                event = {
-                    "type": "response.create",
-                    "response": {
-                        "modalities": ["text"],
-                        "instructions": "You are an AI interviewer. Conduct the interview professionally."
-                    }
+        self.ws = await connect(OPENAI_WS_URL, additional_headers=self.headers)
+        await self.on_open()
+
+    async def send(self, message):
+        """Queue a client message for OpenAI; waits while the queue is full"""
+        # Convert client message to OpenAI format
+        data = json.loads(message)
+        if data.get("type") == "text.data":
+            event = {
+                "type": "response.create",
+                "response": {
+                    "modalities": ["text"],
+                    "instructions": INSTRUCTIONS
                 }
-                self.ws.send(json.dumps(event))
+            }
+            await self.to_openai.put(json.dumps(event))
+
+    async def read_openai(self):
+        try:
+            async for message in self.ws:
+                await self.on_message(message)
+        finally:
+            logger.info("OpenAI WebSocket connection closed")
+        # Let the client writer deliver what is queued, then stop
+        await self.to_client.put(None)
+
+    async def write_openai(self):
+        while True:
+            await self.ws.send(await self.to_openai.get())
+
+    async def write_client(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            delta = await self.to_client.get()
+            if delta is None:
+                return
+            parts, size = [delta], len(delta)
+            deadline = loop.time() + RELAY_COALESCE_MS / 1000
+            finished = False
+            while size < RELAY_COALESCE_CHARS:
+                delta = await self.next_delta(loop, deadline)
+                if delta is TIMED_OUT:
+                    break
+                if delta is None:
+                    finished = True
+                    break
+                parts.append(delta)
+                size += len(delta)
+
+            # Forward text deltas to the client
+            await self.client_ws.send(json.dumps({
+                "type": "text.data",
+                "text": {
+                    "content": "".join(parts)
+                }
+            }))
+            if finished:
+                return
+
+    async def next_delta(self, loop, deadline):
+        """The next queued delta, or TIMED_OUT if none arrives by the deadline"""
+        if not self.to_client.empty():
+            return self.to_client.get_nowait()
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            return TIMED_OUT
+        try:
+            return await asyncio.wait_for(self.to_client.get(), timeout)
+        except asyncio.TimeoutError:
+            return TIMED_OUT
+
+    async def run(self):
+        """Relay until OpenAI closes, either side fails, or the task is cancelled"""
+        tasks = []
+        code = 1000
+        try:
+            await self.connect()
+            tasks = [
+                asyncio.create_task(self.read_openai()),
+                asyncio.create_task(self.write_openai()),
+                asyncio.create_task(self.write_client())
+            ]
+            # The client writer finishes once OpenAI has closed and the queue is
+            # drained. The OpenAI writer only finishes by failing, and the
+            # reader fails when OpenAI drops the connection abnormally.
+            pending = set(tasks)
+            while tasks[2] in pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        continue
+                    if task is tasks[1] and isinstance(error, ConnectionClosedOK):
+                        # OpenAI closed normally; the reader sees it and ends the relay
+                        continue
+                    if task is tasks[2] and isinstance(error, ConnectionClosed):
+                        # The client went away; there is nobody left to tell
+                        logger.info(f"Client connection closed: {error}")
+                        continue
+                    raise error
+        except Exception as e:
+            logger.error(f"OpenAI WebSocket error: {e}")
+            code = 1011
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.ws:
+                await self.ws.close()
+        await self.client_ws.close(code)
 
 async def handle_client(websocket):
     """Handle individual client connections"""
+    openai_ws = OpenAIWebSocket(websocket)
+    # Client messages sent while OpenAI is connecting wait in the queue
+    relay = asyncio.create_task(openai_ws.run())
     try:
-        # Create OpenAI WebSocket connection
-        openai_ws = OpenAIWebSocket(websocket)
-        ws = openai_ws.connect()
-        
-        # Run OpenAI WebSocket in a separate thread
-        import threading
-        ws_thread = threading.Thread(target=ws.run_forever)
-        ws_thread.daemon = True
-        ws_thread.start()
-
         # Handle messages from the client
         async for message in websocket:
             try:
-                data = json.loads(message)
-                logger.info(f"Received from client: {data}")
-                openai_ws.send(message)
+                logger.debug("Received from client: %s", message)
+                await openai_ws.send(message)
             except json.JSONDecodeError:
                 logger.error("Invalid JSON received from client")
-                
+    except ConnectionClosed:
+        pass
     except Exception as e:
         logger.error(f"Error in client handler: {e}")
     finally:
-        if 'ws' in locals():
-            ws.close()
+        relay.cancel()
+        await asyncio.gather(relay, return_exceptions=True)
 
 async def main():
     """Start the WebSocket server"""
-    async with serve(handle_client, "localhost", 8000):
+    async with serve(handle_client, RELAY_HOST, RELAY_PORT):
         await asyncio.Future()  # run forever
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ExemplarySpeech
+from .models import ExemplarySpeech, ProcessingJob, AudioAnalysisCache
 
 @admin.register(ExemplarySpeech)
 class ExemplarySpeechAdmin(admin.ModelAdmin):
@@ -14,6 +14,21 @@ class ExemplarySpeechAdmin(admin.ModelAdmin):
     has_transcript.short_description = 'Transcribed'
 
     def has_embedding(self, obj):
-        return bool(obj.embedding)
+        return obj.embedding is not None
     has_embedding.boolean = True
     has_embedding.short_description = 'Embedded'
+
+
+@admin.register(ProcessingJob)
+class ProcessingJobAdmin(admin.ModelAdmin):
+    list_display = ('stage', 'speech_type', 'speech_id', 'status', 'attempts', 'run_after', 'locked_by', 'duration_seconds', 'updated_at')
+    list_filter = ('stage', 'status', 'speech_type')
+    readonly_fields = ('attempts', 'locked_until', 'locked_by', 'external_id', 'last_error', 'started_at', 'finished_at', 'created_at', 'updated_at')
+
+
+
+@admin.register(AudioAnalysisCache)
+class AudioAnalysisCacheAdmin(admin.ModelAdmin):
+    list_display = ('content_hash', 'transcription_version', 'embedding_version', 'hits', 'updated_at')
+    search_fields = ('content_hash',)
+    readonly_fields = ('content_hash', 'embedding', 'hits', 'created_at', 'updated_at')
@@ -1,11 +1,37 @@
-from typing import List, Dict, Optional
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
-import openai
 import json
 from django.conf import settings
+from .conversation import ConversationContext
+from .json_stream import JsonStringFields
+
+# The prose fields come first so a streamed reply has something to show at once
+ANALYSIS_PROMPT = """Analyze the response and provide:
+        {
+            "feedback": "encouraging feedback highlighting positives",
+            "follow_up_question": "next question based on response",
+            "score": <0-10>,
+            "strengths": ["strength1", "strength2"],
+            "improvements": ["improvement1", "improvement2"]
+        }"""
+# Analysis fields sent to the client while they are being generated
+STREAMED_FIELDS = ('feedback', 'follow_up_question')
+
+SUMMARY_PROMPT = """Summarise this mock interview for the interviewer. Keep the questions asked,
+        the candidate's key claims and examples, and the main strengths and weaknesses
+        noted so far. Merge the new turns into the existing summary and reply with the
+        summary only, in at most {words} words."""
 
 class InterviewAgent:
-    def __init__(self, job_role: str, interview_type: str, resume: Optional[str] = None, job_description: Optional[str] = None):
+    def __init__(
+        self,
+        job_role: str,
+        interview_type: str,
+        resume: Optional[str] = None,
+        job_description: Optional[str] = None,
+        context_turns: int = 6,
+        summary_max_tokens: int = 400
+    ):
         if not job_role or not interview_type:
             raise ValueError("Job role and interview type must not be empty")
             
@@ -16,10 +42,34 @@ class InterviewAgent:
         self.interview_type = interview_type
         self.resume = resume
         self.job_description = job_description
+        # Full transcript of the session; only self.context is sent to the model
         self.conversation_history = []
+        self._client = None
         self.current_question_index = 0
         self.session_start_time = None
+        self.context = ConversationContext(
+            # Every answer is analysed the same way, so the template is part
+            # of the system prompt instead of being appended on each turn
+            f"{self.get_system_prompt()}\nAfter each candidate answer, reply in JSON only.\n{ANALYSIS_PROMPT}",
+            max_turns=context_turns,
+            summarize=self.summarize_turns,
+            summary_max_tokens=summary_max_tokens
+        )
         
+    def client(self):
+        """The session's OpenAI client, created on first use"""
+        if self._client is None:
+            import openai
+            self._client = openai.AsyncOpenAI()
+        return self._client
+
+    async def close(self):
+        """Stop background summarising and release the OpenAI client"""
+        await self.context.close()
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
     def get_system_prompt(self) -> str:
         base_prompt = """You are an experienced technical interviewer and coach. Your role is to:
         1. Conduct professional interviews
@@ -49,33 +99,76 @@ class InterviewAgent:
             return "Great choice! Let's get started. Can you share your resume and the job description? I'll act as your interviewer."
         return f"Thanks! Excited to run this mock interview for {self.job_role}. Let's begin—can you introduce yourself?"
 
-    async def process_response(self, answer: str) -> Dict:
-        """Process candidate's answer and generate feedback"""
-        self.conversation_history.append({"role": "user", "content": answer})
-        
-        analysis_prompt = """Analyze the response and provide:
-        {
-            "score": <0-10>,
-            "strengths": ["strength1", "strength2"],
-            "improvements": ["improvement1", "improvement2"],
-            "feedback": "encouraging feedback highlighting positives",
-            "follow_up_question": "next question based on response"
-        }"""
-        
-        self.conversation_history.append({"role": "user", "content": analysis_prompt})
+    async def process_response(
+        self,
+        answer: str,
+        on_delta: Optional[Callable[[str, str], Awaitable[None]]] = None
+    ) -> Dict:
+        """Process candidate's answer and generate feedback
+
+        With ``on_delta`` the completion is streamed, and text of the feedback
+        and follow-up question is passed to ``on_delta(field, text)`` as it
+        arrives. The parsed analysis is returned once the reply is complete.
+        """
+        messages = self.context.messages(answer)
+        stream = on_delta is not None
         
-        response = await openai.ChatCompletion.acreate(
+        response = await self.client().chat.completions.create(
             model="gpt-4",
-            messages=self.conversation_history,
+            messages=messages,
             temperature=0.7,
-            response_format={ "type": "json_object" }
+            response_format={ "type": "json_object" },
+            stream=stream,
+            # The last streamed chunk then carries the token counts
+            **({"stream_options": {"include_usage": True}} if stream else {})
         )
         
-        analysis = response.choices[0].message.content
+        if stream:
+            analysis, usage = await self._stream_analysis(response, on_delta)
+        else:
+            analysis = response.choices[0].message.content
+            usage = response.usage
+        self.context.record(answer, analysis, messages, usage)
+        self.conversation_history.append({"role": "user", "content": answer})
         self.conversation_history.append({"role": "assistant", "content": analysis})
         
         return json.loads(analysis)
 
+    async def _stream_analysis(self, chunks, on_delta) -> Tuple[str, Optional[object]]:
+        """The streamed reply's full text and token usage"""
+        fields = JsonStringFields(STREAMED_FIELDS)
+        parts = []
+        usage = None
+        async for chunk in chunks:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            # The usage chunk has no choices
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            content = chunk.choices[0].delta.content
+            parts.append(content)
+            for field, text in fields.feed(content):
+                await on_delta(field, text)
+        return "".join(parts), usage
+
+    async def summarize_turns(self, summary: str, turns: List[Dict]) -> str:
+        """Fold turns that left the context window into the running summary"""
+        transcript = "\n\n".join(
+            f"Candidate: {turn['user']}\nInterviewer analysis: {turn['assistant']}" for turn in turns
+        )
+        max_tokens = self.context.summary_max_tokens
+
+        response = await self.client().chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT.format(words=max_tokens * 3 // 4)},
+                {"role": "user", "content": f"Summary so far:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"}
+            ],
+            temperature=0.3,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content.strip()
+
     def suggest_next_session(self) -> str:
         """Suggest next session time based on current session"""
         if not self.session_start_time:
@@ -0,0 +1,125 @@
+"""Asynchronous AssemblyAI REST client.
+
+One client per process holds a pooled ``aiohttp`` session with the API key
+in its headers, so nothing is configured globally and connections are
+reused across requests. A transcription is an upload, a submit, and then
+polling with backoff until the job finishes. Polling is a sleeping
+coroutine, not a blocked thread, so hundreds of in-flight transcriptions
+cost a few hundred small tasks on one event loop. ``max_in_flight`` caps
+how many run at once.
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+API_URL = 'https://api.assemblyai.com/v2'
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+
+class AssemblyAIClient:
+    """Upload, submit and poll transcriptions over one shared HTTP session"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = API_URL,
+        max_in_flight: int = 100,
+        max_connections: int = 16,
+        poll_seconds: float = 3.0,
+        max_poll_seconds: float = 15.0,
+        timeout_seconds: float = 3600.0
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.max_in_flight = max_in_flight
+        self.max_connections = max_connections
+        self.poll_seconds = poll_seconds
+        self.max_poll_seconds = max_poll_seconds
+        self.timeout_seconds = timeout_seconds
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.polls = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def session(self) -> aiohttp.ClientSession:
+        # Created on first use so it binds to the loop that uses it
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={'authorization': self.api_key},
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def upload(self, file_path: str) -> str:
+        """Stream a local file to AssemblyAI; returns the URL to transcribe"""
+        async with self.session().post(f"{self.base_url}/upload", data=_read_chunks(file_path)) as response:
+            response.raise_for_status()
+            return (await response.json())['upload_url']
+
+    async def submit(self, audio_url: str, webhook_url: Optional[str] = None, **config) -> str:
+        """Start a transcription job; returns its id"""
+        payload = {'audio_url': audio_url, **config}
+        if webhook_url:
+            payload['webhook_url'] = webhook_url
+        async with self.session().post(f"{self.base_url}/transcript", json=payload) as response:
+            response.raise_for_status()
+            return (await response.json())['id']
+
+    async def get(self, transcript_id: str) -> Dict:
+        async with self.session().get(f"{self.base_url}/transcript/{transcript_id}") as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def wait(self, transcript_id: str) -> Dict:
+        """Poll until the job completes, backing off up to ``max_poll_seconds``"""
+        deadline = time.monotonic() + self.timeout_seconds
+        delay = self.poll_seconds
+        while True:
+            transcript = await self.get(transcript_id)
+            self.polls += 1
+            if transcript['status'] == 'completed':
+                return transcript
+            if transcript['status'] == 'error':
+                raise RuntimeError(f"Transcription failed: {transcript.get('error')}")
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Transcript {transcript_id} not finished after {self.timeout_seconds:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, self.max_poll_seconds)
+
+    async def transcribe(self, file_path: str, **config) -> Dict:
+        """Upload, submit and wait for one file, within the in-flight limit"""
+        self.session()
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                transcript = await self.wait(await self.submit(await self.upload(file_path), **config))
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self.in_flight -= 1
+            self.completed += 1
+            return transcript
+
+    def stats(self) -> Dict[str, int]:
+        return {'in_flight': self.in_flight, 'completed': self.completed, 'failed': self.failed, 'polls': self.polls}
+
+
+async def _read_chunks(file_path: str):
+    # Reads happen off the loop so a slow disk doesn't stall other requests
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                return
+            yield chunk
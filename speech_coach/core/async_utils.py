@@ -0,0 +1,101 @@
+"""Helpers for keeping websocket consumers off-loop and observable.
+
+``run_db`` runs blocking ORM work on a dedicated, bounded thread pool.
+``database_sync_to_async`` defaults to one shared thread, which would
+serialise every live session's writes in the process. The pool size caps
+the database connections live sessions can hold.
+
+``loop_lag`` measures how long a callback waits for the event loop when a
+frame arrives; sustained lag means the worker is overloaded.
+
+``run_in_background`` lets synchronous code, such as job worker threads,
+run coroutines on one long-lived loop per process. Async clients and their
+pooled connections then outlive any single call.
+"""
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def db_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'LIVE_DB_THREADS', 8),
+                    thread_name_prefix='live-db'
+                )
+    return _executor
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking ORM call on the bounded live-session pool"""
+    return await database_sync_to_async(fn, thread_sensitive=False, executor=db_executor())(*args, **kwargs)
+
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_lock = threading.Lock()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """The process-wide event loop, running on a daemon thread"""
+    global _background_loop
+    if _background_loop is None:
+        with _background_lock:
+            if _background_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='background-loop', daemon=True).start()
+                _background_loop = loop
+    return _background_loop
+
+
+def run_in_background(coro):
+    """Run a coroutine on the background loop and block until it finishes"""
+    return asyncio.run_coroutine_threadsafe(coro, background_loop()).result()
+
+
+class LoopLagMonitor:
+    """Scheduling delay of callbacks on the running event loop"""
+
+    def __init__(self, window: int = 1000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.max_lag = 0.0
+        self._lock = threading.Lock()
+
+    def probe(self):
+        """Time how long a callback scheduled now waits to run"""
+        loop = asyncio.get_running_loop()
+        loop.call_soon(self._record, loop, loop.time())
+
+    def _record(self, loop, scheduled: float):
+        lag = loop.time() - scheduled
+        with self._lock:
+            self.samples.append(lag)
+            self.count += 1
+            self.max_lag = max(self.max_lag, lag)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            samples = sorted(self.samples)
+            count, max_lag = self.count, self.max_lag
+        if not samples:
+            return {'probes': count, 'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+        return {
+            'probes': count,
+            'p50_ms': samples[len(samples) // 2] * 1000,
+            'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+            'max_ms': max_lag * 1000,
+        }
+
+
+loop_lag = LoopLagMonitor()
@@ -0,0 +1,113 @@
+"""Bounded buffering of live audio between the browser and the transcriber.
+
+Browsers send many small PCM frames. ``AudioFrameBuffer`` re-slices them
+into fixed-duration chunks and holds at most ``max_chunks`` of them. When
+the upstream transcriber falls behind and the buffer is full, the oldest
+chunk is dropped, so latency stays bounded instead of growing without
+limit. Depth and drop counters are kept per connection and process-wide.
+"""
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+_totals_lock = threading.Lock()
+_totals = {'connections': 0, 'frames_in': 0, 'chunks_out': 0, 'dropped_chunks': 0, 'dropped_bytes': 0}
+
+
+def audio_stats() -> Dict[str, int]:
+    with _totals_lock:
+        return dict(_totals)
+
+
+def _count(**deltas):
+    with _totals_lock:
+        for key, delta in deltas.items():
+            _totals[key] += delta
+
+
+def chunk_size(sample_rate: int, chunk_ms: int, sample_width: int = 2) -> int:
+    """Bytes in ``chunk_ms`` of mono PCM"""
+    return sample_rate * sample_width * chunk_ms // 1000
+
+
+class AudioFrameBuffer:
+    """Aggregates frames into fixed-size chunks in a bounded, drop-oldest queue"""
+
+    def __init__(self, chunk_bytes: int, max_chunks: int, drop: str = 'oldest'):
+        if drop not in ('oldest', 'newest'):
+            raise ValueError(f"Unknown drop policy: {drop}")
+        self.chunk_bytes = chunk_bytes
+        self.max_chunks = max_chunks
+        self.drop = drop
+        self.chunks = deque()
+        self.partial = bytearray()
+        self.frames_in = 0
+        self.chunks_out = 0
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+        self.max_depth = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+        _count(connections=1)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def push(self, frame: bytes):
+        """Add a frame; completed chunks are queued, dropping if the queue is full"""
+        self.frames_in += 1
+        _count(frames_in=1)
+        self.partial.extend(frame)
+        while len(self.partial) >= self.chunk_bytes:
+            self._enqueue(bytes(self.partial[:self.chunk_bytes]))
+            del self.partial[:self.chunk_bytes]
+
+    def flush(self):
+        """Queue whatever partial chunk is left, e.g. when the client stops"""
+        if self.partial:
+            self._enqueue(bytes(self.partial))
+            self.partial.clear()
+
+    def close(self):
+        self.flush()
+        self.closed = True
+        self._ready.set()
+
+    def _enqueue(self, chunk: bytes):
+        if len(self.chunks) >= self.max_chunks:
+            dropped = self.chunks.popleft() if self.drop == 'oldest' else chunk
+            self.dropped_chunks += 1
+            self.dropped_bytes += len(dropped)
+            _count(dropped_chunks=1, dropped_bytes=len(dropped))
+            if self.drop == 'newest':
+                return
+        self.chunks.append(chunk)
+        self.max_depth = max(self.max_depth, len(self.chunks))
+        self._ready.set()
+
+    def pop(self) -> Optional[bytes]:
+        if not self.chunks:
+            return None
+        self.chunks_out += 1
+        _count(chunks_out=1)
+        return self.chunks.popleft()
+
+    async def get(self) -> Optional[bytes]:
+        """Wait for the next chunk; None once closed and drained"""
+        while not self.chunks:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self.pop()
+
+    def stats(self) -> Dict:
+        return {
+            'depth': len(self.chunks),
+            'max_depth': self.max_depth,
+            'frames_in': self.frames_in,
+            'chunks_out': self.chunks_out,
+            'dropped_chunks': self.dropped_chunks,
+            'dropped_bytes': self.dropped_bytes,
+        }
@@ -0,0 +1,99 @@
+"""Reuse processing results across uploads of identical audio.
+
+Uploads are hashed with SHA-256. Transcription/analysis and embedding
+results are stored once per content hash, each tagged with the version of
+the pipeline that produced it, so a re-uploaded recording skips both the
+AssemblyAI call and the Wav2Vec2 forward pass. Changing the embedding model
+or bumping ``AUDIO_CACHE_TRANSCRIPTION_VERSION`` makes older entries miss.
+"""
+import hashlib
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import AudioAnalysisCache
+
+TRANSCRIPTION_FIELDS = ['transcript', 'words_per_minute', 'pause_duration', 'filler_words', 'clarity_score']
+
+
+def hash_audio_file(field_file) -> str:
+    """SHA-256 of a FileField's contents, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in field_file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def transcription_version() -> str:
+    # Stand-in transcripts must never be served for real uploads, or vice versa
+    backend = getattr(settings, 'TRANSCRIPTION_BACKEND', 'assemblyai')
+    return f"{backend}:{getattr(settings, 'AUDIO_CACHE_TRANSCRIPTION_VERSION', '1')}"
+
+
+def embedding_version() -> str:
+    return f"{settings.EMBEDDING_MODEL_NAME}:float16"
+
+
+def lookup(content_hash: Optional[str]) -> Optional[AudioAnalysisCache]:
+    if not content_hash:
+        return None
+    return AudioAnalysisCache.objects.filter(content_hash=content_hash).first()
+
+
+def _store(content_hash: str, fields: Dict):
+    # get_or_create tolerates the transcription and embedding stages racing
+    # to create the row; each then writes only its own columns
+    entry, _ = AudioAnalysisCache.objects.get_or_create(content_hash=content_hash)
+    AudioAnalysisCache.objects.filter(pk=entry.pk).update(**fields)
+
+
+def store_transcription(speech):
+    """Cache a speech's transcript and analysis metrics"""
+    if not speech.content_hash:
+        return
+    fields = {name: getattr(speech, name) for name in TRANSCRIPTION_FIELDS}
+    _store(speech.content_hash, {**fields, 'transcription_version': transcription_version()})
+
+
+def store_embedding(speech):
+    """Cache a speech's audio embedding"""
+    if not speech.content_hash or speech.embedding is None:
+        return
+    _store(speech.content_hash, {'embedding': speech.embedding, 'embedding_version': embedding_version()})
+
+
+def apply_cached_transcription(speech, entry: Optional[AudioAnalysisCache] = None) -> bool:
+    """Fill a speech's transcript and metrics from the cache; True on a hit"""
+    entry = entry or lookup(speech.content_hash)
+    if entry is None or not entry.transcript or entry.transcription_version != transcription_version():
+        return False
+    for name in TRANSCRIPTION_FIELDS:
+        setattr(speech, name, getattr(entry, name))
+    speech.save(update_fields=TRANSCRIPTION_FIELDS)
+    AudioAnalysisCache.objects.filter(pk=entry.pk).update(hits=F('hits') + 1)
+    return True
+
+
+def apply_cached_embedding(speech, entry: Optional[AudioAnalysisCache] = None) -> bool:
+    """Fill a speech's embedding from the cache; True on a hit"""
+    entry = entry or lookup(speech.content_hash)
+    if entry is None or entry.embedding is None or entry.embedding_version != embedding_version():
+        return False
+    speech.embedding = entry.embedding
+    speech.save(update_fields=['embedding'])
+    AudioAnalysisCache.objects.filter(pk=entry.pk).update(hits=F('hits') + 1)
+    return True
+
+
+def apply_cached_analysis(speech) -> List[str]:
+    """Apply every cached result for a new upload; returns the stages it covers"""
+    entry = lookup(speech.content_hash)
+    if entry is None:
+        return []
+    stages = []
+    if apply_cached_transcription(speech, entry):
+        stages.append('transcription')
+    if apply_cached_embedding(speech, entry):
+        stages.append('embedding')
+    return stages
@@ -1,65 +1,191 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
+import asyncio
 import json
 import os
-import aiohttp
+from django.conf import settings
 from .agents import InterviewAgent
+from .async_utils import loop_lag, run_db
+from .audio_buffer import AudioFrameBuffer, chunk_size
+from .models import InterviewSession, UserSpeech
+from .realtime_relay import RealtimeRelay
+from .transcription import get_transcription_backend
+
+class LiveTranscriptionConsumer(AsyncWebsocketConsumer):
+    """Streams browser audio to the real-time transcriber and pushes results back.
+
+    Nothing here blocks the event loop: the transcriber's I/O runs on its own
+    threads (``stream`` only enqueues), its callbacks are handed back to the
+    loop, and ORM work goes through the bounded ``run_db`` pool.
+    """
 
-class OpenAIRealtimeConsumer(AsyncWebsocketConsumer):
     async def connect(self):
+        self.speech = None
+        self.transcriber = None
+        self.result_task = None
+        self.sender_task = None
+
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+        speech_id = int(self.scope['url_route']['kwargs']['speech_id'])
+        self.speech = await run_db(lambda: UserSpeech.objects.filter(id=speech_id, user=user).first())
+        if not self.speech:
+            await self.close()
+            return
+
         await self.accept()
+        self.loop = asyncio.get_running_loop()
+        self.results = asyncio.Queue()
+        self.result_task = asyncio.create_task(self.process_results())
+        sample_rate = getattr(settings, 'LIVE_SAMPLE_RATE', 16000)
+        chunk_ms = getattr(settings, 'LIVE_AUDIO_CHUNK_MS', 100)
+        self.audio = AudioFrameBuffer(
+            chunk_size(sample_rate, chunk_ms),
+            max_chunks=max(1, getattr(settings, 'LIVE_AUDIO_MAX_BUFFER_MS', 3000) // chunk_ms)
+        )
+
+        await run_db(self.speech.start_live_transcription)
+        self.transcriber = get_transcription_backend().realtime(
+            sample_rate=sample_rate,
+            on_result=lambda result: self.on_transcriber_message('result', result),
+            on_error=lambda error: self.on_transcriber_message('error', error),
+            on_open=lambda session_id: self.on_transcriber_message('open', session_id)
+        )
+        # Opening the socket blocks, so it happens off the loop
+        await self.loop.run_in_executor(None, self.transcriber.connect)
+        self.sender_task = asyncio.create_task(self.send_audio())
+
+    def on_transcriber_message(self, kind, payload):
+        # Called on the transcriber's reader thread
+        self.loop.call_soon_threadsafe(self.results.put_nowait, (kind, payload))
+
+    async def disconnect(self, close_code):
+        if self.sender_task:
+            # Send the buffered tail of the recording before closing
+            self.audio.close()
+            await self.sender_task
+            print(f"Live audio for speech {self.speech.id}: {self.audio.stats()}")
+        if self.transcriber:
+            # Joins the SDK's threads once the session is terminated
+            await self.loop.run_in_executor(None, self.transcriber.close)
+        if self.result_task:
+            # Let results that arrived before the close be stored
+            self.results.put_nowait(None)
+            await self.result_task
+        if self.speech:
+            await run_db(self.speech.finish_live_transcription)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """Handle incoming audio chunks"""
+        if bytes_data and self.transcriber:
+            loop_lag.probe()
+            self.audio.push(bytes_data)
+
+    async def send_audio(self):
+        """Forward fixed-size chunks, holding back while the transcriber is behind"""
+        max_pending = getattr(settings, 'LIVE_UPSTREAM_MAX_PENDING_CHUNKS', 10)
+        while True:
+            chunk = await self.audio.get()
+            if chunk is None:
+                return
+            # While we wait, new audio piles up in the bounded buffer and the oldest is dropped
+            while self.transcriber.pending() > max_pending and not self.audio.closed:
+                await asyncio.sleep(0.05)
+            self.transcriber.stream(chunk)
+
+    async def process_results(self):
+        """Store and forward transcriber messages in arrival order"""
+        while True:
+            message = await self.results.get()
+            if message is None:
+                return
+            kind, payload = message
+            try:
+                if kind == 'open':
+                    await run_db(self.speech.set_live_session_id, payload)
+                elif kind == 'error':
+                    await self.send(text_data=json.dumps({'type': 'error', 'message': str(payload)}))
+                elif kind == 'result':
+                    await self.transcription_result(payload)
+            except Exception as e:
+                print(f"Error handling live result for speech {self.speech.id}: {str(e)}")
+
+    async def transcription_result(self, result):
+        """Handle transcription result"""
+        live_metrics = await run_db(self.speech.handle_transcription_result, result) if result.is_final else None
         
-        # Initialize OpenAI WebSocket connection
-        self.openai_ws = None
-        await self.setup_openai_connection()
-        
-    async def setup_openai_connection(self):
-        url = "wss://api.openai.com/v1/realtime"
-        headers = {
-            "Authorization": f"Bearer {os.environ.get('OPENAI_API_KEY')}",
-            "OpenAI-Beta": "realtime=v1"
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.ws_connect(url, headers=headers) as ws:
-                self.openai_ws = ws
-                
-                # Send initial setup event
-                setup_event = {
-                    "type": "response.create",
-                    "response": {
-                        "modalities": ["text"],
-                        "instructions": "You are an AI assistant helping with speech analysis."
-                    }
-                }
-                await ws.send_str(json.dumps(setup_event))
-                
-                # Handle incoming messages
-                async for msg in ws:
-                    if msg.type == aiohttp.WSMsgType.TEXT:
-                        data = json.loads(msg.data)
-                        # Forward parsed data to client
-                        await self.send(text_data=json.dumps({
-                            "type": "openai.response",
-                            "data": data
-                        }))
-                    elif msg.type == aiohttp.WSMsgType.ERROR:
-                        break
+        # Send result to WebSocket
+        await self.send(text_data=json.dumps({
+            'type': 'transcription',
+            'text': result.text,
+            'is_final': result.is_final,
+            'confidence': result.confidence,
+            'words': result.words,
+            'analysis': live_metrics,
+            'audio': self.audio.stats()
+        }))
+
+class OpenAIRealtimeConsumer(AsyncWebsocketConsumer):
+    """Proxies a client to the OpenAI realtime API (see core/realtime_relay.py).
+
+    ``connect`` only starts the upstream connection; client events sent
+    before it is up are queued and delivered in order.
+    """
+
+    async def connect(self):
+        await self.accept()
+
+        self.relay = RealtimeRelay(
+            getattr(settings, 'OPENAI_REALTIME_URL', 'wss://api.openai.com/v1/realtime'),
+            headers={
+                "Authorization": f"Bearer {os.environ.get('OPENAI_API_KEY')}",
+                "OpenAI-Beta": "realtime=v1"
+            },
+            on_message=self.openai_message,
+            on_close=self.openai_closed,
+            queue_size=getattr(settings, 'OPENAI_REALTIME_QUEUE_SIZE', 256),
+            coalesce_ms=getattr(settings, 'OPENAI_REALTIME_COALESCE_MS', 5.0),
+            coalesce_chars=getattr(settings, 'OPENAI_REALTIME_COALESCE_CHARS', 512)
+        )
+        self.relay.start()
+
+        # Send initial setup event
+        await self.relay.send({
+            "type": "response.create",
+            "response": {
+                "modalities": ["text"],
+                "instructions": "You are an AI assistant helping with speech analysis."
+            }
+        })
+
+    async def openai_message(self, data):
+        # Wrap the upstream JSON as-is rather than parsing and re-serialising it
+        await self.send(text_data='{"type": "openai.response", "data": %s}' % data)
+
+    async def openai_closed(self, error):
+        if error:
+            print(f"OpenAI realtime connection failed: {error!r}")
+            await self.send(text_data=json.dumps({
+                "type": "error",
+                "message": "Realtime connection lost"
+            }))
+        await self.close(code=1011 if error else 1000)
 
     async def disconnect(self, close_code):
-        if self.openai_ws:
-            await self.openai_ws.close()
+        await self.relay.close()
+        print(f"OpenAI realtime session closed: {self.relay.stats()}")
 
     async def receive(self, text_data=None, bytes_data=None):
-        if self.openai_ws and text_data:
+        if text_data:
             # Parse incoming message
             try:
                 data = json.loads(text_data)
                 # Forward to OpenAI with proper event structure
-                event = {
+                await self.relay.send({
                     "type": data.get("type", "message"),
                     "content": data.get("content", "")
-                }
-                await self.openai_ws.send_str(json.dumps(event))
+                })
             except json.JSONDecodeError:
                 await self.send(text_data=json.dumps({
                     "type": "error",
@@ -67,7 +193,16 @@ class OpenAIRealtimeConsumer(AsyncWebsocketConsumer):
                 }))
 
 class InterviewConsumer(AsyncWebsocketConsumer):
+    """Runs a mock interview, streaming each answer's feedback as it is generated.
+
+    For an answer the client receives ``interview.feedback.delta`` and
+    ``interview.question.delta`` messages carrying text of the feedback and
+    the follow-up question as the model writes them, then the usual
+    ``interview.feedback`` message with the complete analysis.
+    """
+
     async def connect(self):
+        self.agent = None
         self.session_id = self.scope['url_route']['kwargs']['session_id']
         self.session = await self.get_session()
         
@@ -78,7 +213,9 @@ class InterviewConsumer(AsyncWebsocketConsumer):
         # Initialize interview agent
         self.agent = InterviewAgent(
             job_role=self.session.job_role,
-            interview_type=self.session.interview_type
+            interview_type=self.session.interview_type,
+            context_turns=getattr(settings, 'INTERVIEW_CONTEXT_TURNS', 6),
+            summary_max_tokens=getattr(settings, 'INTERVIEW_SUMMARY_MAX_TOKENS', 400)
         )
         
         await self.accept()
@@ -90,6 +227,11 @@ class InterviewConsumer(AsyncWebsocketConsumer):
             "message": initial_message
         }))
 
+    async def disconnect(self, close_code):
+        if self.agent:
+            # A summary still being written is of no use once the session ends
+            await self.agent.close()
+
     async def receive(self, text_data=None, bytes_data=None):
         data = json.loads(text_data)
         
@@ -103,8 +245,16 @@ class InterviewConsumer(AsyncWebsocketConsumer):
             }))
             
         elif data['type'] == 'answer':
-            # Process answer
-            analysis = await self.agent.process_response(data['content'])
+            # Process answer, forwarding feedback text as it streams in
+            try:
+                analysis = await self.agent.process_response(data['content'], on_delta=self.send_feedback_delta)
+            except Exception as e:
+                print(f"Error analysing answer for interview session {self.session_id}: {str(e)}")
+                await self.send(json.dumps({
+                    "type": "error",
+                    "message": "Could not analyse the answer"
+                }))
+                return
             
             # Send feedback
             await self.send(json.dumps({
@@ -121,11 +271,23 @@ class InterviewConsumer(AsyncWebsocketConsumer):
                     "message": next_session
                 }))
 
+    async def send_feedback_delta(self, field, text):
+        await self.send(json.dumps({
+            "type": "interview.feedback.delta" if field == "feedback" else "interview.question.delta",
+            "delta": text
+        }))
+
+    async def get_session(self):
+        """The requested interview session, if it exists"""
+        # Sessions are scheduled under a shared development user and the
+        # interview route is unauthenticated, so there is no owner to check
+        return await run_db(lambda: InterviewSession.objects.filter(id=self.session_id).first())
+
     async def update_session_scores(self, analysis):
         """Update session scores based on answer analysis"""
         self.session.answers_given.append({
-            "question": self.agent.conversation_history[-4]["content"],
-            "answer": self.agent.conversation_history[-3]["content"],
+            "question": self.agent.conversation_history[-3]["content"],
+            "answer": self.agent.conversation_history[-2]["content"],
             "score": analysis["quality_score"]
         })
         
@@ -0,0 +1,134 @@
+"""Bounded prompt context for multi-turn agent conversations.
+
+Sending every earlier turn back to the model makes each request larger
+than the last. Over a long interview, prompt tokens and latency then grow
+with the square of the session length. A ``ConversationContext`` instead
+sends:
+- the system prompt
+- a running summary of older turns
+- the last ``max_turns`` turns in full
+- the new message
+
+When a turn leaves the window it is folded into the summary by
+``summarize``. This runs in the background after the turn's reply has
+been returned, so it usually finishes while the user composes the next
+message. Until it does, the folded turns are sent verbatim. The summary
+is cached and only recomputed when more turns are folded in. If
+``summarize`` is missing or fails, a short extractive digest is used, so
+the context stays bounded either way.
+
+Each turn records an estimate of the prompt size it sent. When the API
+reports usage, it records the actual token counts too.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Rough size of a token in English text; good enough to budget with
+CHARS_PER_TOKEN = 4
+# Characters of each answer kept in the fallback digest
+DIGEST_CHARS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _usage_tokens(usage, key: str) -> Optional[int]:
+    value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+    return value if isinstance(value, int) else None
+
+
+class ConversationContext:
+    """System prompt, running summary and a sliding window of recent turns"""
+
+    def __init__(
+        self,
+        system_prompt: str,
+        max_turns: int = 6,
+        summarize: Optional[Callable[[str, List[Dict]], Awaitable[str]]] = None,
+        summary_max_tokens: int = 400
+    ):
+        self.system_prompt = system_prompt
+        self.max_turns = max_turns
+        self.summarize = summarize
+        self.summary_max_tokens = summary_max_tokens
+        self.summary = ''
+        self.turns: List[Dict] = []
+        # Turns that left the window but are not in the summary yet
+        self.pending: List[Dict] = []
+        self.summary_task: Optional[asyncio.Task] = None
+        self.summarized_turns = 0
+        self.usage: List[Dict] = []
+
+    def messages(self, content: str) -> List[Dict]:
+        """The chat messages for a new user message"""
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the conversation so far:\n{self.summary}"})
+        for turn in self.pending + self.turns:
+            messages.append({"role": "user", "content": turn['user']})
+            messages.append({"role": "assistant", "content": turn['assistant']})
+        messages.append({"role": "user", "content": content})
+        return messages
+
+    def record(self, content: str, reply: str, prompt: List[Dict], usage=None) -> Dict:
+        """Add a finished turn and fold turns that left the window into the summary"""
+        turn_usage = {
+            'turn': len(self.usage) + 1,
+            'messages': len(prompt),
+            'prompt_tokens_estimate': sum(estimate_tokens(message['content']) for message in prompt),
+            'completion_tokens_estimate': estimate_tokens(reply),
+            'prompt_tokens': _usage_tokens(usage, 'prompt_tokens'),
+            'completion_tokens': _usage_tokens(usage, 'completion_tokens'),
+        }
+        self.usage.append(turn_usage)
+
+        self.turns.append({'user': content, 'assistant': reply})
+        while len(self.turns) > self.max_turns:
+            self.pending.append(self.turns.pop(0))
+        if self.pending and (self.summary_task is None or self.summary_task.done()):
+            self.summary_task = asyncio.create_task(self._fold())
+        return turn_usage
+
+    async def wait_for_summary(self):
+        """Wait for any background summarising to finish"""
+        if self.summary_task:
+            await self.summary_task
+
+    async def close(self):
+        """Cancel any background summarising"""
+        if self.summary_task and not self.summary_task.done():
+            self.summary_task.cancel()
+            await asyncio.gather(self.summary_task, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            'turns': len(self.usage),
+            'window_turns': len(self.turns),
+            'pending_turns': len(self.pending),
+            'summarized_turns': self.summarized_turns,
+            'summary_tokens_estimate': estimate_tokens(self.summary) if self.summary else 0,
+            'last_prompt_tokens_estimate': self.usage[-1]['prompt_tokens_estimate'] if self.usage else 0,
+            'total_prompt_tokens_estimate': sum(turn['prompt_tokens_estimate'] for turn in self.usage),
+        }
+
+    async def _fold(self):
+        # Turns evicted while a summary is being written are folded by the next pass
+        while self.pending:
+            turns = list(self.pending)
+            summary = None
+            if self.summarize:
+                try:
+                    summary = await self.summarize(self.summary, turns)
+                except Exception as e:
+                    print(f"Summarising {len(turns)} conversation turns failed, keeping a digest: {str(e)}")
+            self.summary = summary or self._digest(turns)
+            del self.pending[:len(turns)]
+            self.summarized_turns += len(turns)
+
+    def _digest(self, turns: List[Dict]) -> str:
+        lines = [self.summary] if self.summary else []
+        lines += [f"- User: {turn['user'][:DIGEST_CHARS]}" for turn in turns]
+        digest = '\n'.join(lines)
+        # Drop the oldest text once the digest is over budget
+        return digest[-self.summary_max_tokens * CHARS_PER_TOKEN:]
@@ -0,0 +1,450 @@
+"""Shared Wav2Vec2 embedding engine.
+
+The processor and model are loaded lazily, once per worker process, and
+reused by every speech that needs an audio embedding. Uploads are queued on
+an EmbeddingBatcher so that bursts share one forward pass, and recordings
+longer than the streaming threshold are embedded window by window so peak
+memory doesn't grow with speech length.
+
+torch, torchaudio and transformers are imported on first use, not at
+module import. Web workers and management commands that never embed audio
+don't pay their startup time or memory.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+if TYPE_CHECKING:
+    import torch
+
+TARGET_SAMPLE_RATE = 16000
+
+logger = logging.getLogger(__name__)
+
+
+def load_waveform(file_path: str) -> 'torch.Tensor':
+    """Load an audio file as a mono 16kHz tensor of shape (1, samples)"""
+    import torch
+    import torchaudio
+    try:
+        # Try loading with torchaudio first
+        waveform, sample_rate = torchaudio.load(file_path)
+    except Exception:
+        # If that fails, use soundfile as fallback
+        import soundfile as sf
+        waveform, sample_rate = sf.read(file_path)
+        waveform = torch.FloatTensor(waveform)
+        if len(waveform.shape) == 1:
+            waveform = waveform.unsqueeze(0)
+        else:
+            waveform = waveform.transpose(0, 1)
+
+    # Resample if necessary (wav2vec expects 16kHz)
+    if sample_rate != TARGET_SAMPLE_RATE:
+        resampler = torchaudio.transforms.Resample(sample_rate, TARGET_SAMPLE_RATE)
+        waveform = resampler(waveform)
+
+    # Convert to mono if stereo
+    if waveform.shape[0] > 1:
+        waveform = torch.mean(waveform, dim=0, keepdim=True)
+
+    return waveform
+
+
+def audio_duration(file_path: str) -> Optional[float]:
+    """Duration in seconds read from the file header, or None if unknown"""
+    import soundfile as sf
+    try:
+        return sf.info(file_path).duration
+    except Exception:
+        return None
+
+
+def iter_waveform_windows(file_path: str, window_seconds: float, overlap_seconds: float) -> Iterator['torch.Tensor']:
+    """Yield mono 16kHz windows of an audio file without loading it whole
+
+    Each window after the first starts with ``overlap_seconds`` of the
+    previous one, which also absorbs resampling edge effects.
+    """
+    import soundfile as sf
+    import torch
+    import torchaudio
+    sample_rate = sf.info(file_path).samplerate
+    window = int(window_seconds * sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+
+    for index, block in enumerate(sf.blocks(
+        file_path,
+        blocksize=window + overlap,
+        overlap=overlap,
+        dtype='float32',
+        always_2d=True
+    )):
+        # The trailing block can be nothing but overlap we've already seen
+        if index > 0 and block.shape[0] <= overlap:
+            break
+        waveform = torch.from_numpy(block.mean(axis=1)).unsqueeze(0)
+        if sample_rate != TARGET_SAMPLE_RATE:
+            waveform = torchaudio.functional.resample(waveform, sample_rate, TARGET_SAMPLE_RATE)
+        yield waveform
+
+
+class EmbeddingEngine:
+    """Thread-safe owner of the Wav2Vec2 processor and model"""
+
+    def __init__(
+        self,
+        model_name: str,
+        num_threads: Optional[int] = None,
+        streaming_threshold_seconds: float = 120.0,
+        window_seconds: float = 30.0,
+        overlap_seconds: float = 1.0
+    ):
+        self.model_name = model_name
+        self.num_threads = num_threads
+        self.streaming_threshold_seconds = streaming_threshold_seconds
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+        self.processor = None
+        self.model = None
+        self.load_seconds = None
+        self.inference_count = 0
+        self.total_inference_seconds = 0.0
+        self.last_inference_seconds = None
+        self._load_lock = threading.Lock()
+        self._inference_lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    def load(self):
+        """Load the processor and model if this process hasn't yet"""
+        if self.model is not None:
+            return
+
+        with self._load_lock:
+            if self.model is not None:
+                return
+
+            started = time.perf_counter()
+            import torch
+            from transformers import Wav2Vec2Model, Wav2Vec2Processor
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+
+            processor = Wav2Vec2Processor.from_pretrained(self.model_name)
+            model = Wav2Vec2Model.from_pretrained(self.model_name)
+            model.eval()
+
+            self.processor = processor
+            self.model = model
+            self.load_seconds = time.perf_counter() - started
+            logger.info("Loaded %s in %.2fs", self.model_name, self.load_seconds)
+
+    def embed_waveform(self, waveform: 'torch.Tensor') -> np.ndarray:
+        """Return the mean-pooled last hidden state for a 16kHz mono waveform"""
+        import torch
+        self.load()
+
+        input_values = self.processor(
+            waveform.squeeze().numpy(),
+            sampling_rate=TARGET_SAMPLE_RATE,
+            return_tensors="pt"
+        ).input_values
+
+        # Forward passes are serialised so concurrent uploads don't fight
+        # over the same torch thread pool
+        with self._inference_lock:
+            started = time.perf_counter()
+            with torch.inference_mode():
+                outputs = self.model(input_values)
+                embedding = outputs.last_hidden_state.mean(dim=1).squeeze().numpy()
+            elapsed = time.perf_counter() - started
+            self.inference_count += 1
+            self.total_inference_seconds += elapsed
+            self.last_inference_seconds = elapsed
+
+        return embedding
+
+    def embed_batch(self, waveforms: List['torch.Tensor']) -> List[np.ndarray]:
+        """Embed several waveforms, sharing forward passes where it's exact
+
+        Checkpoints trained without an attention mask (like base-960h)
+        normalise over the whole padded input, so zero padding would leak
+        into the real frames. For those only clips of equal length share a
+        pass; the rest are embedded alone.
+        """
+        self.load()
+        if self.processor.feature_extractor.return_attention_mask:
+            return self._embed_padded(waveforms)
+
+        groups = {}
+        for index, waveform in enumerate(waveforms):
+            groups.setdefault(waveform.shape[-1], []).append(index)
+
+        embeddings = [None] * len(waveforms)
+        for indices in groups.values():
+            for index, embedding in zip(indices, self._embed_padded([waveforms[i] for i in indices])):
+                embeddings[index] = embedding
+        return embeddings
+
+    def _embed_padded(self, waveforms: List['torch.Tensor']) -> List[np.ndarray]:
+        """Embed waveforms in one padded forward pass"""
+        if len(waveforms) == 1:
+            return [self.embed_waveform(waveforms[0])]
+
+        import torch
+
+        arrays = [waveform.squeeze().numpy() for waveform in waveforms]
+        inputs = self.processor(
+            arrays,
+            sampling_rate=TARGET_SAMPLE_RATE,
+            return_tensors="pt",
+            padding=True,
+            return_attention_mask=True
+        )
+        model_kwargs = {}
+        if self.processor.feature_extractor.return_attention_mask:
+            model_kwargs['attention_mask'] = inputs.attention_mask
+
+        with self._inference_lock:
+            started = time.perf_counter()
+            with torch.inference_mode():
+                outputs = self.model(inputs.input_values, **model_kwargs)
+                hidden = outputs.last_hidden_state
+
+                # Mean-pool only the frames that came from real audio
+                lengths = inputs.attention_mask.sum(dim=1)
+                frame_lengths = self.model._get_feat_extract_output_lengths(lengths)
+                frame_mask = (
+                    torch.arange(hidden.shape[1]).unsqueeze(0) < frame_lengths.unsqueeze(1)
+                ).unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * frame_mask).sum(dim=1) / frame_mask.sum(dim=1)
+                embeddings = [row.numpy() for row in pooled]
+            elapsed = time.perf_counter() - started
+            self.inference_count += len(waveforms)
+            self.total_inference_seconds += elapsed
+            self.last_inference_seconds = elapsed
+
+        return embeddings
+
+    def embed_windows(self, windows: Iterator['torch.Tensor'], overlap_samples: int = 0) -> np.ndarray:
+        """Mean-pool the last hidden state across a stream of 16kHz windows
+
+        Frames produced by the leading overlap of every window after the
+        first are dropped, so each stretch of audio is counted once and the
+        result matches a single-pass mean pool up to window edge effects.
+        """
+        import torch
+        self.load()
+
+        skip_frames = 0
+        if overlap_samples:
+            skip_frames = int(self.model._get_feat_extract_output_lengths(torch.tensor(overlap_samples)))
+
+        total = None
+        frame_count = 0
+        for index, window in enumerate(windows):
+            input_values = self.processor(
+                window.squeeze().numpy(),
+                sampling_rate=TARGET_SAMPLE_RATE,
+                return_tensors="pt"
+            ).input_values
+
+            with self._inference_lock:
+                started = time.perf_counter()
+                with torch.inference_mode():
+                    hidden = self.model(input_values).last_hidden_state[0]
+                    if index > 0:
+                        hidden = hidden[skip_frames:]
+                    window_sum = hidden.sum(dim=0, dtype=torch.float64)
+                elapsed = time.perf_counter() - started
+                self.inference_count += 1
+                self.total_inference_seconds += elapsed
+                self.last_inference_seconds = elapsed
+
+            total = window_sum if total is None else total + window_sum
+            frame_count += hidden.shape[0]
+
+        if not frame_count:
+            raise ValueError("Audio is too short to embed")
+
+        return (total / frame_count).to(torch.float32).numpy()
+
+    def embed_file_streaming(self, file_path: str) -> np.ndarray:
+        """Embed a file in fixed overlapping windows with bounded memory"""
+        windows = iter_waveform_windows(file_path, self.window_seconds, self.overlap_seconds)
+        return self.embed_windows(windows, int(self.overlap_seconds * TARGET_SAMPLE_RATE))
+
+    def should_stream(self, file_path: str) -> bool:
+        duration = audio_duration(file_path)
+        return duration is not None and duration > self.streaming_threshold_seconds
+
+    def embed_file(self, file_path: str) -> np.ndarray:
+        if self.should_stream(file_path):
+            return self.embed_file_streaming(file_path)
+        return self.embed_waveform(load_waveform(file_path))
+
+    def stats(self) -> Dict:
+        """Load and inference timings for this process"""
+        num_threads = self.num_threads
+        if num_threads is None and self.is_loaded:
+            import torch
+            num_threads = torch.get_num_threads()
+        return {
+            'model_name': self.model_name,
+            'loaded': self.is_loaded,
+            'num_threads': num_threads,
+            'load_seconds': self.load_seconds,
+            'inference_count': self.inference_count,
+            'total_inference_seconds': self.total_inference_seconds,
+            'average_inference_seconds': (
+                self.total_inference_seconds / self.inference_count
+                if self.inference_count else None
+            ),
+            'last_inference_seconds': self.last_inference_seconds,
+        }
+
+
+class EmbeddingBatcher:
+    """Queue-fed worker that coalesces pending embeddings into batches
+
+    Requests are collected for up to ``max_wait_seconds`` (or until
+    ``max_batch_size`` are waiting) and handed to the engine together, which
+    shares forward passes between them where the checkpoint allows.
+    """
+
+    def __init__(self, engine: EmbeddingEngine, max_batch_size: int = 8, max_wait_seconds: float = 0.05):
+        self.engine = engine
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self.batch_count = 0
+        self.item_count = 0
+        self.total_batch_seconds = 0.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, file_path: str) -> Future:
+        """Queue an audio file; the future resolves to its embedding"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((file_path, future))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='embedding-batcher', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        loaded = []
+        for file_path, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                # Long recordings would dominate the padded batch; stream them
+                if self.engine.should_stream(file_path):
+                    future.set_result(self.engine.embed_file_streaming(file_path))
+                else:
+                    loaded.append((load_waveform(file_path), future))
+            except Exception as e:
+                future.set_exception(e)
+
+        if not loaded:
+            return
+
+        # Similar lengths together keep padding (and wasted compute) small
+        loaded.sort(key=lambda item: item[0].shape[-1])
+
+        started = time.perf_counter()
+        try:
+            embeddings = self.engine.embed_batch([waveform for waveform, _ in loaded])
+        except Exception as e:
+            for _, future in loaded:
+                future.set_exception(e)
+            return
+
+        self.batch_count += 1
+        self.item_count += len(loaded)
+        self.total_batch_seconds += time.perf_counter() - started
+
+        for embedding, (_, future) in zip(embeddings, loaded):
+            future.set_result(embedding)
+
+    def stats(self) -> Dict:
+        """Batching counters for this process"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_seconds': self.max_wait_seconds,
+            'queued': self._queue.qsize(),
+            'batch_count': self.batch_count,
+            'item_count': self.item_count,
+            'average_batch_size': self.item_count / self.batch_count if self.batch_count else None,
+            'embeddings_per_second': (
+                self.item_count / self.total_batch_seconds
+                if self.total_batch_seconds else None
+            ),
+        }
+
+
+_engine = None
+_batcher = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> EmbeddingEngine:
+    """Return this process's shared embedding engine, creating it on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = EmbeddingEngine(
+                    model_name=getattr(settings, 'EMBEDDING_MODEL_NAME', 'facebook/wav2vec2-base-960h'),
+                    num_threads=getattr(settings, 'EMBEDDING_TORCH_THREADS', None),
+                    streaming_threshold_seconds=getattr(settings, 'EMBEDDING_STREAMING_THRESHOLD_SECONDS', 120.0),
+                    window_seconds=getattr(settings, 'EMBEDDING_WINDOW_SECONDS', 30.0),
+                    overlap_seconds=getattr(settings, 'EMBEDDING_WINDOW_OVERLAP_SECONDS', 1.0)
+                )
+    return _engine
+
+
+def get_batcher() -> EmbeddingBatcher:
+    """Return this process's shared embedding batcher"""
+    global _batcher
+    if _batcher is None:
+        engine = get_engine()
+        with _engine_lock:
+            if _batcher is None:
+                _batcher = EmbeddingBatcher(
+                    engine,
+                    max_batch_size=getattr(settings, 'EMBEDDING_MAX_BATCH_SIZE', 8),
+                    max_wait_seconds=getattr(settings, 'EMBEDDING_MAX_WAIT_MS', 50) / 1000
+                )
+    return _batcher
@@ -0,0 +1,81 @@
+"""Custom model fields."""
+import base64
+import struct
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db import models
+
+# version, dtype code, dimension; 4 bytes so float32 payloads stay aligned
+_HEADER = struct.Struct('<BBH')
+_FORMAT_VERSION = 1
+_DTYPE_CODES = {'float32': 0, 'float16': 1}
+_CODE_DTYPES = {code: np.dtype(name) for name, code in _DTYPE_CODES.items()}
+
+
+def encode_embedding(vector, dtype='float32') -> bytes:
+    """Pack a 1-d vector as a small header followed by raw little-endian floats"""
+    dtype = np.dtype(dtype).newbyteorder('<')
+    array = np.asarray(vector, dtype=dtype).reshape(-1)
+    return _HEADER.pack(_FORMAT_VERSION, _DTYPE_CODES[dtype.name], array.shape[0]) + array.tobytes()
+
+
+def decode_embedding(data) -> np.ndarray:
+    """Return a read-only numpy view over packed embedding bytes (no copy)"""
+    version, code, dimension = _HEADER.unpack_from(data)
+    if version != _FORMAT_VERSION or code not in _CODE_DTYPES:
+        raise ValueError(f"Unsupported embedding format (version {version}, dtype {code})")
+    dtype = _CODE_DTYPES[code].newbyteorder('<')
+    return np.frombuffer(data, dtype=dtype, count=dimension, offset=_HEADER.size)
+
+
+class EmbeddingField(models.BinaryField):
+    """Stores a vector as packed float32/float16 bytes and loads it as a numpy array
+
+    A 768-d float16 embedding takes 1.5KB instead of ~15KB of JSON text, and
+    loading it is a ``np.frombuffer`` view rather than a JSON parse.
+    """
+
+    description = "Packed float vector"
+
+    def __init__(self, *args, dtype='float32', **kwargs):
+        if np.dtype(dtype).name not in _DTYPE_CODES:
+            raise ValueError(f"EmbeddingField dtype must be one of {', '.join(_DTYPE_CODES)}")
+        self.dtype = np.dtype(dtype).name
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.dtype != 'float32':
+            kwargs['dtype'] = self.dtype
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return decode_embedding(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, np.ndarray):
+            return value
+        if isinstance(value, str):
+            # Serialized form (dumpdata/loaddata) is base64 like BinaryField
+            value = base64.b64decode(value.encode('ascii'))
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return decode_embedding(value)
+        try:
+            return np.asarray(value, dtype=self.dtype).reshape(-1)
+        except (TypeError, ValueError):
+            raise ValidationError("Embedding must be a sequence of numbers")
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None or isinstance(value, (bytes, bytearray, memoryview)):
+            return value
+        return encode_embedding(value, self.dtype)
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        if value is None:
+            return None
+        return base64.b64encode(self.get_prep_value(value)).decode('ascii')
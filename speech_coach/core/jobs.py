@@ -0,0 +1,213 @@
+"""Background job runner for speech processing.
+
+Jobs live in the ProcessingJob table, so queued work survives restarts. A
+worker (``manage.py run_jobs``) claims jobs with ``SELECT ... FOR UPDATE
+SKIP LOCKED`` and runs each stage in its own bounded thread pool, so
+transcription, embedding and LLM feedback each have their own concurrency
+limit. A claimed job is locked for its stage's visibility timeout; if the
+worker dies, the job becomes claimable again once the lock expires. Failed
+attempts are retried with exponential backoff up to ``max_attempts``.
+
+A stage that hands its work to an external service raises ``StageWaiting``.
+Its job is parked as ``waiting`` with the service's job id and holds no
+thread. The service's webhook makes it runnable again (see
+``pipeline.resume_waiting``), and the stage then collects the result. If
+the webhook never arrives, the parked job is claimed again once its lock
+expires.
+
+Which stages exist for a speech, and when each becomes runnable, is decided
+by ``core.pipeline``; the worker reports every outcome back to it.
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ProcessingJob, StageFailed, StageWaiting
+from .pipeline import stage_succeeded, sync_speech_status
+
+logger = logging.getLogger(__name__)
+
+# Model method that runs each (speech type, stage)
+STAGE_METHODS = {
+    ('exemplaryspeech', 'transcription'): 'transcribe_audio',
+    ('exemplaryspeech', 'embedding'): 'generate_audio_embedding',
+    ('userspeech', 'transcription'): 'transcribe_and_analyze',
+    ('userspeech', 'embedding'): 'generate_audio_embedding',
+    ('userspeech', 'feedback'): 'generate_ai_feedback',
+}
+
+DEFAULT_CONCURRENCY = {'transcription': 4, 'embedding': 8, 'feedback': 4}
+DEFAULT_VISIBILITY_TIMEOUT = {'transcription': 1800, 'embedding': 900, 'feedback': 300}
+
+
+def stage_concurrency() -> Dict[str, int]:
+    return {**DEFAULT_CONCURRENCY, **getattr(settings, 'JOB_STAGE_CONCURRENCY', {})}
+
+
+def visibility_timeout(stage: str) -> timedelta:
+    timeouts = {**DEFAULT_VISIBILITY_TIMEOUT, **getattr(settings, 'JOB_VISIBILITY_TIMEOUT_SECONDS', {})}
+    return timedelta(seconds=timeouts[stage])
+
+
+def claim_jobs(stage: str, worker_id: str, limit: int) -> List[ProcessingJob]:
+    """Lock up to ``limit`` runnable jobs for a stage and mark them running"""
+    if limit <= 0:
+        return []
+
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ProcessingJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(stage=stage)
+            .filter(
+                Q(status='pending', run_after__lte=now) |
+                Q(status='running', locked_until__lt=now) |
+                Q(status='waiting', locked_until__lt=now)
+            )
+            .order_by('run_after', 'id')[:limit]
+        )
+        for job in jobs:
+            job.status = 'running'
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_until = now + visibility_timeout(stage)
+            if not job.external_id:
+                # A resumed job keeps the start of the attempt that submitted it
+                job.started_at = now
+            job.finished_at = None
+        ProcessingJob.objects.bulk_update(
+            jobs, ['status', 'attempts', 'locked_by', 'locked_until', 'started_at', 'finished_at']
+        )
+    return jobs
+
+
+def run_job(job: ProcessingJob):
+    """Run one claimed job and record the outcome"""
+    close_old_connections()
+    try:
+        speech = job.get_speech()
+        if speech is None:
+            # Speech deleted since the job was queued; nothing left to do
+            job.status = 'succeeded'
+            job.locked_until = None
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'locked_until', 'finished_at', 'updated_at'])
+            return
+
+        # A resumed stage collects the result of the external job it submitted
+        kwargs = {'external_id': job.external_id} if job.external_id else {}
+        try:
+            getattr(speech, STAGE_METHODS[(job.speech_type, job.stage)])(**kwargs)
+        except StageWaiting as e:
+            _park(job, e.external_id)
+            return
+        except Exception as e:
+            _record_failure(job, e)
+            return
+
+        job.status = 'succeeded'
+        job.locked_until = None
+        job.last_error = None
+        job.external_id = ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'locked_until', 'last_error', 'external_id', 'finished_at', 'updated_at'])
+        stage_succeeded(job)
+    finally:
+        close_old_connections()
+
+
+def _park(job: ProcessingJob, external_id: str):
+    """Release the worker until the service's webhook resumes the job"""
+    job.status = 'waiting'
+    job.external_id = external_id
+    # Waiting isn't a failed attempt
+    job.attempts -= 1
+    # Claimed again after this if the webhook never arrives
+    job.locked_until = timezone.now() + visibility_timeout(job.stage)
+    job.save(update_fields=['status', 'external_id', 'attempts', 'locked_until', 'updated_at'])
+    logger.info("%s job %s waiting on external job %s", job.stage, job.id, external_id)
+
+
+def _record_failure(job: ProcessingJob, error: Exception):
+    job.last_error = str(error)
+    # A retry submits the audio again
+    job.external_id = ''
+    job.locked_until = None
+    job.finished_at = timezone.now()
+    if job.attempts < job.max_attempts and not isinstance(error, StageFailed):
+        job.status = 'pending'
+        job.run_after = timezone.now() + job.retry_delay()
+        logger.warning(
+            "%s job %s failed (attempt %d/%d), retrying at %s: %s",
+            job.stage, job.id, job.attempts, job.max_attempts, job.run_after, error
+        )
+    else:
+        job.status = 'failed'
+        logger.error("%s job %s failed permanently: %s", job.stage, job.id, error)
+    job.save(update_fields=[
+        'status', 'run_after', 'locked_until', 'last_error', 'external_id', 'finished_at', 'updated_at'
+    ])
+    if job.status == 'failed':
+        sync_speech_status(job.speech_type, job.speech_id)
+
+
+class JobWorker:
+    """Polls for jobs and runs them in one bounded pool per stage"""
+
+    def __init__(self, concurrency: Optional[Dict[str, int]] = None, poll_seconds: float = 1.0, worker_id: Optional[str] = None):
+        self.concurrency = concurrency or stage_concurrency()
+        self.poll_seconds = poll_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.pools = {
+            stage: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"job-{stage}")
+            for stage, limit in self.concurrency.items()
+        }
+        self.in_flight = {stage: 0 for stage in self.concurrency}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def stop(self, *args):
+        self._stopping.set()
+
+    def _done(self, stage):
+        with self._lock:
+            self.in_flight[stage] -= 1
+
+    def poll_once(self) -> int:
+        """Claim and dispatch as many jobs as free slots allow"""
+        claimed = 0
+        for stage, limit in self.concurrency.items():
+            with self._lock:
+                free = limit - self.in_flight[stage]
+            for job in claim_jobs(stage, self.worker_id, free):
+                with self._lock:
+                    self.in_flight[stage] += 1
+                future = self.pools[stage].submit(run_job, job)
+                future.add_done_callback(lambda _, stage=stage: self._done(stage))
+                claimed += 1
+        return claimed
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info("Job worker %s started with concurrency %s", self.worker_id, self.concurrency)
+        try:
+            while not self._stopping.is_set():
+                if not self.poll_once():
+                    self._stopping.wait(self.poll_seconds)
+        finally:
+            # Stop claiming, but let in-flight jobs finish
+            for pool in self.pools.values():
+                pool.shutdown(wait=True)
+            logger.info("Job worker %s stopped", self.worker_id)
@@ -0,0 +1,96 @@
+"""Incremental extraction of string fields from JSON as it streams in.
+
+A streamed JSON-mode completion cannot be parsed until it is complete.
+For some fields, such as the feedback text of an interview analysis,
+users want to see the value while it is being generated.
+``JsonStringFields`` reads the raw text chunk by chunk. It returns the
+decoded characters of the chosen top-level string fields as soon as they
+arrive, escapes included. Everything else is skipped, and the complete
+document is still parsed normally at the end.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class JsonStringFields:
+    """Streams the values of top-level string fields out of partial JSON text"""
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = set(fields)
+        self.depth = 0
+        self.in_string = False
+        self.escape: Optional[str] = None
+        self.high_surrogate: Optional[int] = None
+        # Top-level object state: the last key read, and whether its value is next
+        self.key_chars: Optional[List[str]] = None
+        self.key: Optional[str] = None
+        self.after_colon = False
+        self.field: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Decoded text of the watched fields found in this chunk, as (field, text) pairs"""
+        out: List[Tuple[str, str]] = []
+        for ch in chunk:
+            if self.in_string:
+                if self.escape is not None:
+                    self.escape += ch
+                    if self.escape[0] == 'u':
+                        if len(self.escape) < 5:
+                            continue
+                        self._code_point(int(self.escape[1:], 16), out)
+                    else:
+                        self._char(ESCAPES.get(self.escape, self.escape), out)
+                    self.escape = None
+                elif ch == '\\':
+                    self.escape = ''
+                elif ch == '"':
+                    self._end_string()
+                else:
+                    self._char(ch, out)
+            elif ch == '"':
+                self._start_string()
+            elif ch in '{[':
+                self.depth += 1
+            elif ch in '}]':
+                self.depth -= 1
+            elif self.depth == 1 and ch == ':':
+                self.after_colon = True
+            elif self.depth == 1 and ch == ',':
+                self.after_colon = False
+        return out
+
+    def _start_string(self):
+        self.in_string = True
+        if self.depth != 1:
+            return
+        if self.after_colon:
+            self.field = self.key if self.key in self.fields else None
+        else:
+            self.key_chars = []
+
+    def _end_string(self):
+        self.in_string = False
+        if self.key_chars is not None:
+            self.key = ''.join(self.key_chars)
+            self.key_chars = None
+        self.field = None
+
+    def _code_point(self, code: int, out):
+        # Characters outside the BMP arrive as a pair of \u escapes
+        if 0xD800 <= code < 0xDC00:
+            self.high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self.high_surrogate is not None:
+            code = 0x10000 + ((self.high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self.high_surrogate = None
+        self._char(chr(code), out)
+
+    def _char(self, ch: str, out):
+        if self.key_chars is not None:
+            self.key_chars.append(ch)
+        elif self.field:
+            if out and out[-1][0] == self.field:
+                out[-1] = (self.field, out[-1][1] + ch)
+            else:
+                out.append((self.field, ch))
@@ -0,0 +1,104 @@
+"""Running speech metrics for live sessions.
+
+``LiveMetricsAccumulator`` keeps O(1)-per-word running totals (word count,
+confidence sum, pauses, filler phrases) plus a ring buffer of recent word
+end times for the sliding-window speaking rate. ``snapshot()`` uses the
+shapes of the stored ``UserSpeech`` metrics; ``summary()`` is the
+constant-size view pushed to the client.
+"""
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+from .metrics import FILLER_PHRASES, PAUSE_THRESHOLD, normalise_token
+
+
+class LiveMetricsAccumulator:
+    """Incremental pacing, pause, filler and clarity metrics"""
+
+    def __init__(self, window_seconds: float = 60.0, pause_threshold: float = PAUSE_THRESHOLD, phrases=FILLER_PHRASES):
+        self.window_seconds = window_seconds
+        self.pause_threshold = pause_threshold
+        self.phrases = {tuple(phrase.split()): phrase for phrase in phrases}
+        self.max_phrase_length = max((len(tokens) for tokens in self.phrases), default=1)
+
+        self.word_count = 0
+        self.confidence_sum = 0.0
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+        self.pauses = []
+        self.longest_pause = 0.0
+        self.fillers = {phrase: [] for phrase in phrases}
+
+        self._window = deque()  # end times of words inside the sliding window
+        self._recent = deque(maxlen=self.max_phrase_length)  # (token, start, confidence)
+
+    def add_words(self, words: Iterable[Dict]):
+        for word in words:
+            self.add_word(word['text'], word['start'], word['end'], word.get('confidence') or 0.0)
+
+    def add_word(self, text: str, start: float, end: float, confidence: float = 0.0):
+        if self.last_end is not None:
+            gap = start - self.last_end
+            if gap > self.pause_threshold:
+                self.pauses.append({'timestamp': self.last_end, 'duration': gap})
+                self.longest_pause = max(self.longest_pause, gap)
+        if self.first_start is None:
+            self.first_start = start
+        self.last_end = max(end, self.last_end or end)
+        self.word_count += 1
+        self.confidence_sum += confidence
+
+        self._window.append(end)
+        while self._window and self._window[0] < self.last_end - self.window_seconds:
+            self._window.popleft()
+
+        # Match phrases ending at this word against the last few tokens
+        self._recent.append((normalise_token(text), start, confidence))
+        recent = list(self._recent)
+        for length in range(1, min(len(recent), self.max_phrase_length) + 1):
+            tail = recent[-length:]
+            phrase = self.phrases.get(tuple(token for token, _, _ in tail))
+            if phrase is not None:
+                self.fillers[phrase].append({
+                    'timestamp': tail[0][1],
+                    'confidence': sum(score for _, _, score in tail) / length
+                })
+
+    @property
+    def words_per_minute(self) -> Optional[float]:
+        if not self.word_count or self.last_end <= self.first_start:
+            return None
+        return self.word_count / ((self.last_end - self.first_start) / 60)
+
+    @property
+    def window_words_per_minute(self) -> Optional[float]:
+        """Speaking rate over the last ``window_seconds`` of speech"""
+        if not self._window or self.last_end is None:
+            return None
+        span = min(self.window_seconds, self.last_end - self.first_start)
+        return len(self._window) / (span / 60) if span > 0 else None
+
+    @property
+    def clarity_score(self) -> Optional[float]:
+        return self.confidence_sum / self.word_count if self.word_count else None
+
+    def snapshot(self) -> Dict:
+        """Values for the stored UserSpeech metric fields"""
+        return {
+            'words_per_minute': self.words_per_minute,
+            'pause_duration': list(self.pauses),
+            'filler_words': {phrase: list(occurrences) for phrase, occurrences in self.fillers.items()},
+            'clarity_score': self.clarity_score,
+        }
+
+    def summary(self) -> Dict:
+        """Compact, constant-size view for pushing to the client"""
+        return {
+            'words_per_minute': self.words_per_minute,
+            'window_words_per_minute': self.window_words_per_minute,
+            'word_count': self.word_count,
+            'pause_count': len(self.pauses),
+            'longest_pause': self.longest_pause,
+            'filler_words': {phrase: len(occurrences) for phrase, occurrences in self.fillers.items()},
+            'clarity_score': self.clarity_score,
+        }
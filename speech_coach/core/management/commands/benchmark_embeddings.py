@@ -0,0 +1,46 @@
+import time
+
+import torch
+from django.core.management.base import BaseCommand
+
+from core.embeddings import TARGET_SAMPLE_RATE, get_engine
+
+
+class Command(BaseCommand):
+    help = "Compare per-upload and batched Wav2Vec2 embedding throughput on synthetic audio"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=30)
+        parser.add_argument('--seconds', type=float, default=20.0, help="Length of each synthetic clip")
+        parser.add_argument('--batch-size', type=int, default=8)
+
+    def handle(self, *args, **options):
+        engine = get_engine()
+        engine.load()
+        self.stdout.write(f"Model load: {engine.load_seconds:.2f}s")
+
+        # Vary clip lengths a little so batches need real padding. Checkpoints
+        # without an attention mask only batch equal lengths, so give them
+        # runs of equal clips instead
+        generator = torch.Generator().manual_seed(0)
+        samples = int(options['seconds'] * TARGET_SAMPLE_RATE)
+        batch_size = options['batch_size']
+        step = 1 if engine.processor.feature_extractor.return_attention_mask else batch_size
+        waveforms = [
+            torch.randn(1, samples - (i // step) * TARGET_SAMPLE_RATE // 10, generator=generator) * 0.1
+            for i in range(options['uploads'])
+        ]
+
+        started = time.perf_counter()
+        for waveform in waveforms:
+            engine.embed_waveform(waveform)
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i in range(0, len(waveforms), batch_size):
+            engine.embed_batch(waveforms[i:i + batch_size])
+        batched = time.perf_counter() - started
+
+        count = len(waveforms)
+        self.stdout.write(f"Sequential: {count / sequential:.2f} embeddings/s ({sequential:.2f}s)")
+        self.stdout.write(f"Batched x{batch_size}: {count / batched:.2f} embeddings/s ({batched:.2f}s)")
@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core import metrics
+
+
+def loop_metrics(words):
+    """The original per-word implementation, kept for comparison"""
+    pauses = []
+    for i in range(len(words) - 1):
+        gap = words[i + 1]['start'] - words[i]['end']
+        if gap > 1.0:
+            pauses.append({'timestamp': words[i]['end'], 'duration': gap})
+    fillers = {'um': [], 'uh': [], 'like': [], 'you know': [], 'so': []}
+    for word in words:
+        if word['text'].lower() in fillers:
+            fillers[word['text'].lower()].append({'timestamp': word['start'], 'confidence': word['confidence']})
+    scores = [word['confidence'] for word in words]
+    return pauses, fillers, sum(scores) / len(scores) if scores else 0
+
+
+class Command(BaseCommand):
+    help = "Compare the vectorised speech metrics against per-word loops on a synthetic transcript"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, nargs='+', default=[1000, 10000, 50000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        for size in options['words']:
+            words = self._transcript(size)
+            loop = self._time(lambda: loop_metrics(words), options['repeat'])
+            convert = self._time(lambda: metrics.WordTable.from_words(words), options['repeat'])
+            table = metrics.WordTable.from_words(words)
+            compute = self._time(lambda: self._compute(table), options['repeat'])
+            total = self._time(lambda: metrics.analyze_words(words), options['repeat'])
+            self.stdout.write(
+                f"{size:>6} words  loop {loop * 1000:7.2f}ms  "
+                f"columnar {total * 1000:7.2f}ms (convert {convert * 1000:6.2f}ms, "
+                f"metrics {compute * 1000:6.2f}ms)  speedup {loop / total:4.1f}x"
+            )
+
+    @staticmethod
+    def _compute(table):
+        metrics.analyze_pauses(table)
+        metrics.count_filler_words(table)
+        metrics.calculate_clarity(table)
+
+    @staticmethod
+    def _transcript(size):
+        # ~2,000 distinct words with fillers at a few percent, as in real talks
+        rng = np.random.default_rng(0)
+        vocabulary = [f"word{i}" for i in range(2000)] + ['um', 'uh', 'like', 'you', 'know', 'so']
+        weights = np.ones(len(vocabulary))
+        weights[-6:] = 25
+        texts = rng.choice(vocabulary, size=size, p=weights / weights.sum())
+        starts = np.cumsum(rng.exponential(0.4, size=size))
+        return [
+            {'text': str(text), 'start': float(start), 'end': float(start) + 0.25, 'confidence': float(score)}
+            for text, start, score in zip(texts, starts, rng.uniform(0.5, 1.0, size=size))
+        ]
+
+    @staticmethod
+    def _time(fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return float(np.median(timings))
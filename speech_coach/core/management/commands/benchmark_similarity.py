@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.vector_index import IVFIndex, VectorIndex
+
+
+class Command(BaseCommand):
+    help = "Measure recall and latency of IVF similarity search against exact search"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100000, help="Number of synthetic exemplary embeddings")
+        parser.add_argument('--dim', type=int, default=768)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--k', type=int, default=5)
+        parser.add_argument('--lists', type=int, default=0, help="IVF lists (0 = sqrt(size))")
+        parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+        parser.add_argument('--category', action='store_true', help="Also benchmark a 1-in-20 category filter")
+        parser.add_argument('--from-db', action='store_true', help="Use stored exemplary embeddings instead of synthetic data")
+
+    def handle(self, *args, **options):
+        vectors, categories = self._load_vectors(options)
+        items = [(i, vector, {'category': category}) for i, (vector, category) in enumerate(zip(vectors, categories))]
+        rng = np.random.default_rng(1)
+        queries = vectors[rng.choice(len(vectors), options['queries'])] + 0.05 * rng.normal(size=(options['queries'], vectors.shape[1]))
+        filters = {'category': 'c0'} if options['category'] else None
+        k = options['k']
+
+        exact = VectorIndex()
+        exact.build(items)
+        exact_results, exact_latencies = self._run(exact, queries, k, filters)
+        self.stdout.write(f"{len(vectors)} x {vectors.shape[1]}, k={k}, filter={filters}")
+        self.stdout.write(f"exact        recall 1.000  p50 {self._ms(exact_latencies, 50)}  p95 {self._ms(exact_latencies, 95)}")
+
+        ivf = IVFIndex(n_lists=options['lists'] or None, min_train_size=1)
+        ivf.build(items)
+        started = time.perf_counter()
+        ivf.train()
+        self.stdout.write(f"IVF training: {time.perf_counter() - started:.2f}s ({len(ivf.centroids)} lists)")
+
+        for nprobe in options['nprobe']:
+            ivf.nprobe = nprobe
+            results, latencies = self._run(ivf, queries, k, filters)
+            hits = sum(len(set(a) & set(b)) for a, b in zip(results, exact_results))
+            total = sum(len(b) for b in exact_results) or 1
+            self.stdout.write(
+                f"ivf nprobe={nprobe:<3} recall {hits / total:.3f}  "
+                f"p50 {self._ms(latencies, 50)}  p95 {self._ms(latencies, 95)}"
+            )
+
+    def _load_vectors(self, options):
+        if options['from_db']:
+            from core.models import ExemplarySpeech
+            rows = list(ExemplarySpeech.objects.exclude(embedding__isnull=True).values_list('embedding', 'category'))
+            return np.stack([row[0] for row in rows]).astype(np.float32), [row[1] for row in rows]
+
+        # Clustered synthetic data behaves more like real embeddings than noise
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(max(1, options['size'] // 100), options['dim']))
+        labels = rng.integers(0, len(centers), size=options['size'])
+        vectors = (centers[labels] + 0.5 * rng.normal(size=(options['size'], options['dim']))).astype(np.float32)
+        categories = [f"c{i % 20}" for i in range(options['size'])]
+        return vectors, categories
+
+    @staticmethod
+    def _run(index, queries, k, filters):
+        results, latencies = [], []
+        for query in queries:
+            started = time.perf_counter()
+            matches = index.search(query, k, filters)
+            latencies.append(time.perf_counter() - started)
+            results.append([item_id for item_id, _ in matches])
+        return results, latencies
+
+    @staticmethod
+    def _ms(latencies, percentile):
+        return f"{np.percentile(latencies, percentile) * 1000:7.3f}ms"
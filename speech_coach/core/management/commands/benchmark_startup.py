@@ -0,0 +1,73 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# What a web or ASGI worker imports before serving its first request
+DEFAULT_MODULES = ['speech_coach.urls', 'core.routing', 'core.jobs']
+# Packages that should only load when a request actually needs them
+HEAVY_PACKAGES = ['torch', 'torchaudio', 'transformers', 'assemblyai', 'openai', 'aiohttp', 'httpx', 'pydantic', 'numpy']
+
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+for name in {modules!r}:
+    __import__(name)
+print(json.dumps({{
+    'wall_seconds': time.perf_counter() - started,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'loaded': [name for name in {heavy!r} if name in sys.modules],
+}}), file=sys.stderr)
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure cold Django startup (python -X importtime) and report the heaviest imports"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES)
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options):
+        script = STARTUP_SCRIPT.format(modules=options['modules'], heavy=HEAVY_PACKAGES)
+        runs = [self._run(script) for _ in range(options['runs'])]
+        summary, imports = runs[-1]
+
+        self.stdout.write(f"modules: {' '.join(options['modules'])}")
+        self.stdout.write(
+            f"startup: median {statistics.median(run['wall_seconds'] for run, _ in runs):.3f}s "
+            f"over {len(runs)} runs, max RSS {summary['max_rss_mb']:.0f}MB"
+        )
+        self.stdout.write(f"heavy packages loaded: {', '.join(summary['loaded']) or 'none'}")
+        self.stdout.write(f"\n{'cumulative ms':>14}  top-level import")
+        for name, cumulative in sorted(imports.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"{cumulative / 1000:14.1f}  {name}")
+
+    @staticmethod
+    def _run(script):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, env=os.environ.copy()
+        )
+        lines = result.stderr.splitlines()
+        if result.returncode != 0:
+            raise RuntimeError('\n'.join(lines[-20:]))
+
+        # Top-level imports are the unindented package names
+        imports = {}
+        for line in lines:
+            if not line.startswith('import time:'):
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit() and not name.startswith('  '):
+                imports[name.strip()] = int(cumulative)
+        # Modules imported at shutdown are logged after the summary
+        summary = next(line for line in reversed(lines) if line.startswith('{'))
+        return json.loads(summary), imports
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import threading
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core import metrics
+from core.async_utils import run_in_background
+from core.segmentation import transcribe_segmented
+from core.transcription import LocalBackend, get_transcription_backend
+
+
+class Command(BaseCommand):
+    help = "Measure transcription and analysis throughput and latency, offline by default"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=50)
+        parser.add_argument('--seconds', type=float, default=120, help="Length of each synthetic recording")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+        parser.add_argument('--latency', type=float, default=0.2, help="Local backend fixed delay (seconds)")
+        parser.add_argument('--realtime-factor', type=float, default=0.0)
+        parser.add_argument('--segment-seconds', type=float, default=0,
+                            help="Also time segmented transcription with segments of this length")
+        parser.add_argument('--segment-concurrency', type=int, default=4)
+        parser.add_argument('--async', dest='use_async', action='store_true',
+                            help="Also run each concurrency level as coroutines on one event loop")
+        parser.add_argument('--configured', action='store_true',
+                            help="Use TRANSCRIPTION_BACKEND instead of the local stand-in")
+
+    def handle(self, *args, **options):
+        if options['configured']:
+            backend = get_transcription_backend()
+        else:
+            backend = LocalBackend(latency_seconds=options['latency'], realtime_factor=options['realtime_factor'])
+        self.stdout.write(f"backend {backend.name}, {options['files']} x {options['seconds']:.0f}s recordings")
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [self._recording(directory, i, options['seconds']) for i in range(options['files'])]
+            modes = [('whole', backend.transcribe)]
+            if options['segment_seconds']:
+                modes.append(('segmented', lambda path: transcribe_segmented(
+                    backend,
+                    path,
+                    segment_seconds=options['segment_seconds'],
+                    concurrency=options['segment_concurrency'],
+                    search_seconds=min(5, options['segment_seconds'] / 4)
+                )))
+            for mode, transcribe in modes:
+                for concurrency in options['concurrency']:
+                    started = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                        latencies = list(pool.map(lambda path: self._process(transcribe, path), paths))
+                    elapsed = time.perf_counter() - started
+                    self._report(mode, concurrency, len(paths), elapsed, latencies)
+            if options['use_async']:
+                for concurrency in options['concurrency']:
+                    started = time.perf_counter()
+                    latencies, threads = run_in_background(self._process_async(backend, paths, concurrency))
+                    elapsed = time.perf_counter() - started
+                    self._report('async', concurrency, len(paths), elapsed, latencies, f"  threads {threads}")
+
+    def _report(self, mode, concurrency, files, elapsed, latencies, extra=''):
+        self.stdout.write(
+            f"{mode:<9}  concurrency {concurrency:>3}  {files / elapsed:7.1f} files/s  "
+            f"p50 {np.percentile(latencies, 50) * 1000:7.1f}ms  "
+            f"p95 {np.percentile(latencies, 95) * 1000:7.1f}ms{extra}"
+        )
+
+    @staticmethod
+    async def _process_async(backend, paths, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def process(path):
+            async with semaphore:
+                started = time.perf_counter()
+                transcript = await backend.transcribe_async(path)
+                metrics.analyze_words(transcript.words, transcript.audio_duration)
+                return time.perf_counter() - started
+
+        latencies = await asyncio.gather(*(process(path) for path in paths))
+        return latencies, threading.active_count()
+
+    @staticmethod
+    def _process(transcribe, path):
+        started = time.perf_counter()
+        transcript = transcribe(path)
+        metrics.analyze_words(transcript.words, transcript.audio_duration)
+        return time.perf_counter() - started
+
+    @staticmethod
+    def _recording(directory, index, seconds):
+        # Distinct noise so every file hashes differently, with a near-silent
+        # half second every few seconds standing in for pauses between sentences
+        import soundfile as sf
+        rng = np.random.default_rng(index)
+        samples = rng.standard_normal(int(seconds * 16000)).astype(np.float32) * 0.1
+        for start in np.arange(rng.uniform(2, 6), seconds - 1, 5.0):
+            samples[int(start * 16000):int((start + 0.5) * 16000)] *= 0.01
+        path = os.path.join(directory, f"recording{index}.wav")
+        sf.write(path, samples, 16000)
+        return path
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.jobs import JobWorker, stage_concurrency
+
+
+class Command(BaseCommand):
+    help = "Run queued speech processing jobs (transcription, embedding, AI feedback)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-seconds', type=float, default=1.0)
+        parser.add_argument(
+            '--concurrency', nargs='*', default=[], metavar='STAGE=N',
+            help="Override per-stage concurrency, e.g. transcription=8 feedback=2"
+        )
+
+    def handle(self, *args, **options):
+        concurrency = stage_concurrency()
+        for override in options['concurrency']:
+            stage, _, limit = override.partition('=')
+            if stage not in concurrency or not limit.isdigit():
+                self.stderr.write(f"Ignoring invalid concurrency override: {override}")
+                continue
+            concurrency[stage] = int(limit)
+
+        JobWorker(concurrency=concurrency, poll_seconds=options['poll_seconds']).run()
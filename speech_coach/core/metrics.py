@@ -0,0 +1,133 @@
+"""Vectorised speech metrics over transcript word timings.
+
+The word list is converted once into columnar numpy arrays (start, end,
+confidence and an integer token id per word). Pauses, filler phrases and
+clarity are then computed with array operations instead of per-word dict
+lookups. Multi-word fillers such as "you know" are matched as token
+sequences.
+
+Results use the JSON shapes stored on ``UserSpeech`` and read by
+``get_analysis_summary``.
+"""
+import string
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+FILLER_PHRASES = ('um', 'uh', 'like', 'you know', 'so')
+PAUSE_THRESHOLD = 1.0  # Gaps longer than this count as pauses
+
+_PUNCTUATION = string.punctuation + '’“”'
+
+
+def normalise_token(text: str) -> str:
+    """Lower-case a word and strip surrounding punctuation ("So," -> "so")"""
+    return text.lower().strip(_PUNCTUATION)
+
+
+class WordTable:
+    """Columnar view of a transcript's words"""
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, confidence: np.ndarray, tokens: np.ndarray, vocabulary: Dict[str, int]):
+        self.start = start
+        self.end = end
+        self.confidence = confidence
+        self.tokens = tokens
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def from_words(cls, words: Sequence[Dict]) -> 'WordTable':
+        count = len(words)
+        start, end, confidence = (
+            np.fromiter(map(itemgetter(key), words), dtype=np.float64, count=count)
+            for key in ('start', 'end', 'confidence')
+        )
+        # Each distinct raw spelling is normalised once, then mapped in C
+        texts = list(map(itemgetter('text'), words))
+        vocabulary: Dict[str, int] = {}
+        raw_ids = {
+            text: vocabulary.setdefault(normalise_token(text), len(vocabulary))
+            for text in dict.fromkeys(texts)
+        }
+        tokens = np.fromiter(map(raw_ids.__getitem__, texts), dtype=np.int64, count=count)
+        return cls(start, end, confidence, tokens, vocabulary)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def gaps(self) -> np.ndarray:
+        """Silence between each word and the next"""
+        return self.start[1:] - self.end[:-1]
+
+    def find_phrase(self, phrase: str) -> np.ndarray:
+        """Indices of the first word of every occurrence of a phrase"""
+        ids = [self.vocabulary.get(normalise_token(part)) for part in phrase.split()]
+        if not ids or None in ids or len(ids) > len(self):
+            return np.zeros(0, dtype=np.int64)
+        span = len(self) - len(ids) + 1
+        mask = self.tokens[:span] == ids[0]
+        for offset, token_id in enumerate(ids[1:], start=1):
+            mask &= self.tokens[offset:offset + span] == token_id
+        return np.flatnonzero(mask)
+
+
+def analyze_pauses(table: WordTable, threshold: float = PAUSE_THRESHOLD) -> List[Dict]:
+    gaps = table.gaps()
+    idx = np.flatnonzero(gaps > threshold)
+    return [
+        {'timestamp': timestamp, 'duration': duration}
+        for timestamp, duration in zip(table.end[idx].tolist(), gaps[idx].tolist())
+    ]
+
+
+def pause_statistics(table: WordTable, threshold: float = PAUSE_THRESHOLD) -> Dict:
+    gaps = table.gaps()
+    pauses = gaps[gaps > threshold]
+    return {
+        'count': int(pauses.size),
+        'total': float(pauses.sum()),
+        'mean': float(pauses.mean()) if pauses.size else 0.0,
+        'longest': float(pauses.max()) if pauses.size else 0.0,
+        'mean_gap': float(np.clip(gaps, 0, None).mean()) if gaps.size else 0.0,
+    }
+
+
+def count_filler_words(table: WordTable, phrases: Sequence[str] = FILLER_PHRASES) -> Dict[str, List[Dict]]:
+    """Occurrences of each filler phrase; a phrase's confidence is the mean over its words"""
+    fillers = {}
+    for phrase in phrases:
+        idx = table.find_phrase(phrase)
+        length = len(phrase.split())
+        if length == 1:
+            confidence = table.confidence[idx]
+        else:
+            confidence = np.mean([table.confidence[idx + offset] for offset in range(length)], axis=0)
+        fillers[phrase] = [
+            {'timestamp': timestamp, 'confidence': score}
+            for timestamp, score in zip(table.start[idx].tolist(), np.asarray(confidence).tolist())
+        ]
+    return fillers
+
+
+def calculate_clarity(table: WordTable) -> float:
+    return float(table.confidence.mean()) if len(table) else 0
+
+
+def words_per_minute(table: WordTable, duration_seconds: Optional[float] = None) -> Optional[float]:
+    """Word rate over the recording, or over the spoken span if no duration is known"""
+    if not len(table):
+        return None
+    duration = duration_seconds if duration_seconds else table.end[-1] - table.start[0]
+    return len(table) / (duration / 60) if duration > 0 else None
+
+
+def analyze_words(words: Sequence[Dict], duration_seconds: Optional[float] = None) -> Dict:
+    """All stored metrics for a transcript, from a single columnar conversion"""
+    table = WordTable.from_words(words)
+    return {
+        'words_per_minute': words_per_minute(table, duration_seconds),
+        'pause_duration': analyze_pauses(table),
+        'filler_words': count_filler_words(table),
+        'clarity_score': calculate_clarity(table),
+    }
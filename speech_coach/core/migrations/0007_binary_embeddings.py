@@ -0,0 +1,69 @@
+import core.fields
+from django.db import migrations
+
+
+def pack_embeddings(apps, schema_editor):
+    for model_name in ('ExemplarySpeech', 'UserSpeech'):
+        model = apps.get_model('core', model_name)
+        batch = []
+        for speech in model.objects.exclude(embedding__isnull=True).only('id', 'embedding').iterator(chunk_size=500):
+            speech.embedding_packed = speech.embedding
+            batch.append(speech)
+            if len(batch) >= 500:
+                model.objects.bulk_update(batch, ['embedding_packed'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['embedding_packed'])
+
+
+def unpack_embeddings(apps, schema_editor):
+    for model_name in ('ExemplarySpeech', 'UserSpeech'):
+        model = apps.get_model('core', model_name)
+        batch = []
+        for speech in model.objects.exclude(embedding_packed__isnull=True).only('id', 'embedding_packed').iterator(chunk_size=500):
+            speech.embedding = speech.embedding_packed.astype(float).tolist()
+            batch.append(speech)
+            if len(batch) >= 500:
+                model.objects.bulk_update(batch, ['embedding'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['embedding'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_interviewsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exemplaryspeech',
+            name='embedding_packed',
+            field=core.fields.EmbeddingField(blank=True, dtype='float16', null=True),
+        ),
+        migrations.AddField(
+            model_name='userspeech',
+            name='embedding_packed',
+            field=core.fields.EmbeddingField(blank=True, dtype='float16', null=True),
+        ),
+        migrations.RunPython(pack_embeddings, unpack_embeddings),
+        migrations.RemoveField(
+            model_name='exemplaryspeech',
+            name='embedding',
+        ),
+        migrations.RemoveField(
+            model_name='userspeech',
+            name='embedding',
+        ),
+        migrations.RenameField(
+            model_name='exemplaryspeech',
+            old_name='embedding_packed',
+            new_name='embedding',
+        ),
+        migrations.RenameField(
+            model_name='userspeech',
+            old_name='embedding_packed',
+            new_name='embedding',
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_binary_embeddings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('speech_type', models.CharField(choices=[('exemplaryspeech', 'Exemplary Speech'), ('userspeech', 'User Speech')], max_length=20)),
+                ('speech_id', models.PositiveBigIntegerField()),
+                ('stage', models.CharField(choices=[('transcription', 'Transcription'), ('embedding', 'Embedding'), ('feedback', 'AI Feedback')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('locked_by', models.CharField(blank=True, max_length=255)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['stage', 'status', 'run_after'], name='core_proces_stage_5dc6dd_idx'), models.Index(fields=['speech_type', 'speech_id'], name='core_proces_speech__3130a2_idx')],
+            },
+        ),
+    ]
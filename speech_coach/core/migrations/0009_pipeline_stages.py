@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:55
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_stage_jobs(apps, schema_editor):
+    """Keep only the newest job for each (speech, stage) before adding the constraint"""
+    ProcessingJob = apps.get_model('core', 'ProcessingJob')
+    duplicates = (
+        ProcessingJob.objects
+        .values('speech_type', 'speech_id', 'stage')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for group in duplicates:
+        ids = list(
+            ProcessingJob.objects
+            .filter(speech_type=group['speech_type'], speech_id=group['speech_id'], stage=group['stage'])
+            .order_by('-id')
+            .values_list('id', flat=True)
+        )
+        ProcessingJob.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_processingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='processingjob',
+            name='status',
+            field=models.CharField(choices=[('blocked', 'Waiting on Dependencies'), ('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(dedupe_stage_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='processingjob',
+            constraint=models.UniqueConstraint(fields=('speech_type', 'speech_id', 'stage'), name='unique_stage_per_speech'),
+        ),
+    ]
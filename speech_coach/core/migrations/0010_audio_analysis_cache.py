@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:57
+
+import core.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_pipeline_stages'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioAnalysisCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('transcript', models.TextField(blank=True, null=True)),
+                ('words', models.JSONField(blank=True, null=True)),
+                ('words_per_minute', models.FloatField(blank=True, null=True)),
+                ('pause_duration', models.JSONField(blank=True, null=True)),
+                ('filler_words', models.JSONField(blank=True, null=True)),
+                ('clarity_score', models.FloatField(blank=True, null=True)),
+                ('transcription_version', models.CharField(blank=True, max_length=255)),
+                ('embedding', core.fields.EmbeddingField(blank=True, dtype='float16', null=True)),
+                ('embedding_version', models.CharField(blank=True, max_length=255)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'audio analysis cache',
+            },
+        ),
+        migrations.AddField(
+            model_name='userspeech',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True),
+        ),
+    ]
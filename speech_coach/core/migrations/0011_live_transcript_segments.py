@@ -0,0 +1,71 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_live_segments(apps, schema_editor):
+    UserSpeech = apps.get_model('core', 'UserSpeech')
+    LiveTranscriptSegment = apps.get_model('core', 'LiveTranscriptSegment')
+    for speech in UserSpeech.objects.exclude(live_transcript={}).only('id', 'live_transcript').iterator():
+        segments = (speech.live_transcript or {}).get('segments', [])
+        LiveTranscriptSegment.objects.bulk_create([
+            LiveTranscriptSegment(
+                speech_id=speech.id,
+                sequence=sequence,
+                text=segment.get('text') or '',
+                timestamp=segment.get('timestamp'),
+                confidence=segment.get('confidence'),
+                words=segment.get('words')
+            )
+            for sequence, segment in enumerate(segments)
+        ])
+
+
+def restore_live_segments(apps, schema_editor):
+    UserSpeech = apps.get_model('core', 'UserSpeech')
+    LiveTranscriptSegment = apps.get_model('core', 'LiveTranscriptSegment')
+    speech_ids = LiveTranscriptSegment.objects.values_list('speech_id', flat=True).distinct()
+    for speech in UserSpeech.objects.filter(id__in=speech_ids):
+        speech.live_transcript = {'segments': [
+            {
+                'text': segment.text,
+                'timestamp': segment.timestamp,
+                'confidence': segment.confidence,
+                'words': segment.words
+            }
+            for segment in LiveTranscriptSegment.objects.filter(speech_id=speech.id).order_by('sequence')
+        ]}
+        speech.save(update_fields=['live_transcript'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_audio_analysis_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveTranscriptSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('text', models.TextField()),
+                ('timestamp', models.FloatField(blank=True, null=True)),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('words', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('speech', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='live_segments', to='core.userspeech')),
+            ],
+            options={
+                'ordering': ['speech', 'sequence'],
+                'constraints': [models.UniqueConstraint(fields=('speech', 'sequence'), name='unique_live_segment_sequence')],
+            },
+        ),
+        migrations.RunPython(copy_live_segments, restore_live_segments),
+        migrations.RemoveField(
+            model_name='userspeech',
+            name='live_transcript',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-17 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_live_transcript_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='external_id',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='processingjob',
+            name='status',
+            field=models.CharField(choices=[('blocked', 'Waiting on Dependencies'), ('pending', 'Pending'), ('running', 'Running'), ('waiting', 'Waiting on External Service'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:24
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_processingjob_external_id'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='audioanalysiscache',
+            name='words',
+        ),
+    ]
@@ -1,22 +1,47 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-import assemblyai as aai
 from django.conf import settings
-from threading import Thread
 import os
-import torch
-import torchaudio
-from transformers import Wav2Vec2Model, Wav2Vec2Processor
 import numpy as np
-import openai
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
+from .embeddings import get_batcher
+from .fields import EmbeddingField
+from . import metrics
+from .live_metrics import LiveMetricsAccumulator
+from .write_buffer import WriteBehindBuffer
+from .transcription import get_transcription_backend, transcribe_file
+from .vector_index import get_exemplary_index, index_exemplary_embedding, remove_exemplary_embedding
 
 # Create your models here.
 
+LIVE_METRIC_FIELDS = ('words_per_minute', 'pause_duration', 'filler_words', 'clarity_score')
+
+def _as_word_dict(word):
+    """Transcriber word objects as plain, JSON-serialisable dicts"""
+    if isinstance(word, dict):
+        return word
+    return {'text': word.text, 'start': word.start, 'end': word.end, 'confidence': word.confidence}
+
+def _transcribe_or_submit(file_path, external_id=None):
+    """Transcribe now, or hand the file to the service and wait for its webhook"""
+    backend = get_transcription_backend()
+    if external_id:
+        transcript = backend.fetch(external_id, file_path)
+        if transcript is None:
+            # Woken before the service finished; keep waiting
+            raise StageWaiting(external_id)
+        return transcript
+    webhook_url = getattr(settings, 'TRANSCRIPTION_WEBHOOK_URL', None)
+    if webhook_url:
+        raise StageWaiting(backend.submit(
+            file_path, webhook_url, getattr(settings, 'TRANSCRIPTION_WEBHOOK_SECRET', '')
+        ))
+    return transcribe_file(file_path)
+
 class ExemplarySpeech(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -33,7 +58,7 @@ class ExemplarySpeech(models.Model):
     date_delivered = models.DateField(null=True, blank=True)
     occasion = models.CharField(max_length=255, blank=True)
     category = models.CharField(max_length=100, blank=True)
-    embedding = models.JSONField(null=True, blank=True)
+    embedding = EmbeddingField(null=True, blank=True, dtype='float16')
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -47,120 +72,62 @@ class ExemplarySpeech(models.Model):
     def __str__(self):
         return f"{self.speaker_name} - {self.title}"
 
-    def transcribe_audio(self):
+    def transcribe_audio(self, external_id=None):
         if self.audio_file and not self.transcript:
             try:
-                self.status = 'transcribing'
-                self.save(update_fields=['status'])
-
-                # Initialize AssemblyAI client
-                aai.settings.api_key = settings.ASSEMBLYAI_API_KEY
-                
-                # Create transcription object
-                transcriber = aai.Transcriber()
-                
                 # Get the full file path
                 file_path = os.path.join(settings.MEDIA_ROOT, self.audio_file.name)
                 
-                # Start transcription with local file
-                transcript = transcriber.transcribe(file_path)
+                transcript = _transcribe_or_submit(file_path, external_id)
                 
                 if transcript.text:
                     self.transcript = transcript.text
-                    self.status = 'embedding' if not self.embedding else 'completed'
-                    self.save(update_fields=['transcript', 'status'])
+                    self.save(update_fields=['transcript'])
                     print(f"Transcription completed for {self.title}")
                 else:
-                    self.status = 'failed'
-                    self.error_message = "No transcript generated"
-                    self.save(update_fields=['status', 'error_message'])
                     print(f"No transcript generated for {self.title}")
+                    raise StageFailed("No transcript generated")
                     
+            except StageWaiting:
+                raise
             except Exception as e:
-                self.status = 'failed'
-                self.error_message = str(e)
-                self.save(update_fields=['status', 'error_message'])
+                # The pipeline retries the stage or marks the speech failed
                 print(f"Error transcribing {self.title}: {str(e)}")
+                raise
 
     def generate_audio_embedding(self):
-        if self.audio_file and not self.embedding:
+        if self.audio_file and self.embedding is None:
             try:
-                if not self.transcript:
-                    self.status = 'transcribing'
-                else:
-                    self.status = 'embedding'
-                self.save(update_fields=['status'])
-
-                # Load model and processor
-                processor = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-base-960h")
-                model = Wav2Vec2Model.from_pretrained("facebook/wav2vec2-base-960h")
-                
                 # Get audio file path
                 file_path = os.path.join(settings.MEDIA_ROOT, self.audio_file.name)
                 
-                try:
-                    # Try loading with torchaudio first
-                    waveform, sample_rate = torchaudio.load(file_path)
-                except:
-                    # If that fails, use soundfile as fallback
-                    import soundfile as sf
-                    waveform, sample_rate = sf.read(file_path)
-                    waveform = torch.FloatTensor(waveform)
-                    if len(waveform.shape) == 1:
-                        waveform = waveform.unsqueeze(0)
-                    else:
-                        waveform = waveform.transpose(0, 1)
-                
-                # Resample if necessary (wav2vec expects 16kHz)
-                if sample_rate != 16000:
-                    resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-                    waveform = resampler(waveform)
-                
-                # Convert to mono if stereo
-                if waveform.shape[0] > 1:
-                    waveform = torch.mean(waveform, dim=0, keepdim=True)
-                
-                # Process through wav2vec
-                input_values = processor(waveform.squeeze().numpy(), 
-                                      sampling_rate=16000, 
-                                      return_tensors="pt").input_values
-                
-                with torch.no_grad():
-                    outputs = model(input_values)
-                    # Use mean pooling to get a single vector
-                    embedding = outputs.last_hidden_state.mean(dim=1).squeeze().numpy()
-                
-                # Store the embedding
-                self.embedding = embedding.tolist()
-                self.status = 'completed'
-                self.save(update_fields=['embedding', 'status'])
+                # Concurrent embedding jobs share forward passes on the batcher
+                self.embedding = get_batcher().submit(file_path).result()
+                self.save(update_fields=['embedding'])
+                index_exemplary_embedding(self)
                 print(f"Generated embedding for {self.title}")
                 
             except Exception as e:
-                self.status = 'failed'
-                self.error_message = str(e)
-                self.save(update_fields=['status', 'error_message'])
                 print(f"Error generating embedding for {self.title}: {str(e)}")
+                raise
 
     def save(self, *args, **kwargs):
         is_new = self._state.adding
         super().save(*args, **kwargs)
         
         if is_new and 'update_fields' not in kwargs:
-            # Start transcription and embedding generation in background
-            if not self.transcript:
-                Thread(target=self.transcribe_audio).start()
-            if not self.embedding:
-                Thread(target=self.generate_audio_embedding).start()
+            # Queue transcription and embedding generation for the job worker
+            from .pipeline import start_pipeline
+            start_pipeline(self)
     
     @staticmethod
     def cosine_similarity(embedding1, embedding2):
-        if not embedding1 or not embedding2:
+        if embedding1 is None or embedding2 is None:
             return 0
         
         # Convert to numpy arrays
-        vec1 = np.array(embedding1)
-        vec2 = np.array(embedding2)
+        vec1 = np.asarray(embedding1, dtype=np.float32)
+        vec2 = np.asarray(embedding2, dtype=np.float32)
         
         # Calculate cosine similarity
         return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
@@ -178,11 +145,13 @@ class UserSpeech(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
     audio_file = models.FileField(upload_to='user_speeches/')
+    # SHA-256 of the uploaded audio, used to reuse results for duplicate uploads
+    content_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True, editable=False)
     transcript = models.TextField(blank=True, null=True)
     date_delivered = models.DateField(default=timezone.now)
     occasion = models.CharField(max_length=255, blank=True)
     category = models.CharField(max_length=100, blank=True)
-    embedding = models.JSONField(null=True, blank=True)
+    embedding = EmbeddingField(null=True, blank=True, dtype='float16')
     
     # Speech Analysis Metrics
     words_per_minute = models.FloatField(null=True, blank=True)
@@ -197,7 +166,6 @@ class UserSpeech(models.Model):
     
     # Add to existing fields
     is_live = models.BooleanField(default=False)
-    live_transcript = models.JSONField(default=dict, blank=True)  # Store live transcription segments
     live_session_id = models.CharField(max_length=255, blank=True, null=True)
     
     status = models.CharField(
@@ -213,98 +181,56 @@ class UserSpeech(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.title}"
 
-    def transcribe_and_analyze(self):
+    def transcribe_and_analyze(self, external_id=None):
         if self.audio_file and not self.transcript:
-            try:
-                self.status = 'transcribing'
-                self.save(update_fields=['status'])
+            from .audio_cache import apply_cached_transcription, store_transcription
+            if apply_cached_transcription(self):
+                # An identical upload was analysed since this one was queued
+                print(f"Reused cached analysis for {self.title}")
+                return
 
-                # Initialize AssemblyAI client
-                aai.settings.api_key = settings.ASSEMBLYAI_API_KEY
-                
-                # Create transcription object with analysis features
-                config = aai.TranscriptionConfig(
-                    word_boost=['um', 'uh', 'like', 'you know', 'so'],
-                    speech_threshold=0.2,
-                    word_timestamps=True,
-                    auto_highlights=True,
-                    content_safety=False,
-                    disfluencies=True,
-                    sentiment_analysis=True,
-                    auto_chapters=True
-                )
-                
-                transcriber = aai.Transcriber()
-                transcript = transcriber.transcribe(
+            try:
+                transcript = _transcribe_or_submit(
                     os.path.join(settings.MEDIA_ROOT, self.audio_file.name),
-                    config=config
+                    external_id
                 )
                 
                 if transcript.text:
-                    self.status = 'analyzing'
-                    self.save(update_fields=['status'])
-                    
                     # Store transcript
                     self.transcript = transcript.text
                     
-                    # Calculate words per minute
-                    duration_minutes = transcript.audio_duration / 60
-                    word_count = len(transcript.words)
-                    self.words_per_minute = word_count / duration_minutes
-                    
-                    # Analyze pauses
-                    self.pause_duration = self._analyze_pauses(transcript.words)
-                    
-                    # Count filler words
-                    self.filler_words = self._count_filler_words(transcript.words)
+                    # Pacing, pauses, filler words and clarity in one pass
+                    analysis = metrics.analyze_words(transcript.words, transcript.audio_duration)
+                    self.words_per_minute = analysis['words_per_minute']
+                    self.pause_duration = analysis['pause_duration']
+                    self.filler_words = analysis['filler_words']
+                    self.clarity_score = analysis['clarity_score']
                     
-                    # Calculate clarity score based on confidence scores
-                    self.clarity_score = self._calculate_clarity(transcript.words)
-                    
-                    self.status = 'embedding' if not self.embedding else 'completed'
-                    self.save()
+                    # Only this stage's fields, so a concurrent embedding isn't overwritten
+                    self.save(update_fields=[
+                        'transcript', 'words_per_minute', 'pause_duration',
+                        'filler_words', 'clarity_score'
+                    ])
+                    store_transcription(self)
                     
                     print(f"Analysis completed for {self.title}")
                 else:
-                    self.status = 'failed'
-                    self.error_message = "No transcript generated"
-                    self.save(update_fields=['status', 'error_message'])
+                    raise StageFailed("No transcript generated")
                     
+            except StageWaiting:
+                raise
             except Exception as e:
-                self.status = 'failed'
-                self.error_message = str(e)
-                self.save(update_fields=['status', 'error_message'])
                 print(f"Error analyzing {self.title}: {str(e)}")
+                raise
 
     def _analyze_pauses(self, words):
-        pauses = []
-        for i in range(len(words) - 1):
-            current_word_end = words[i]['end']
-            next_word_start = words[i + 1]['start']
-            pause_duration = next_word_start - current_word_end
-            if pause_duration > 1.0:  # Consider pauses longer than 1 second
-                pauses.append({
-                    'timestamp': current_word_end,
-                    'duration': pause_duration
-                })
-        return pauses
+        return metrics.analyze_pauses(metrics.WordTable.from_words(words))
 
     def _count_filler_words(self, words):
-        filler_words = {
-            'um': [], 'uh': [], 'like': [], 'you know': [], 'so': [], 
-        }
-        
-        for word in words:
-            if word['text'].lower() in filler_words:
-                filler_words[word['text'].lower()].append({
-                    'timestamp': word['start'],
-                    'confidence': word['confidence']
-                })
-        return filler_words
+        return metrics.count_filler_words(metrics.WordTable.from_words(words))
 
     def _calculate_clarity(self, words):
-        confidence_scores = [word['confidence'] for word in words]
-        return sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
+        return metrics.calculate_clarity(metrics.WordTable.from_words(words))
 
     def get_analysis_summary(self):
         """Return a summary of the speech analysis"""
@@ -371,6 +297,18 @@ class UserSpeech(models.Model):
             suggestions.append("Some pauses are too long. Try to keep pauses under 2 seconds")
         return suggestions if suggestions else ["Good use of pauses!"]
 
+    def _get_filler_word_suggestions(self):
+        if not self.filler_words:
+            return ["No filler words detected. Great job!"]
+        suggestions = []
+        total = sum(len(occurrences) for occurrences in self.filler_words.values())
+        if total > 10:
+            suggestions.append("Try replacing filler words with a short, silent pause")
+        most_used = max(self.filler_words, key=lambda word: len(self.filler_words[word]))
+        if len(self.filler_words[most_used]) > 3:
+            suggestions.append(f"You often say '{most_used}'. Practice noticing it and pausing instead")
+        return suggestions if suggestions else ["Good control of filler words!"]
+
     def _assess_clarity(self):
         if not self.clarity_score:
             return "No clarity data available"
@@ -382,70 +320,32 @@ class UserSpeech(models.Model):
         return "Consider speaking more clearly and practicing pronunciation."
 
     def generate_audio_embedding(self):
-        if self.audio_file and not self.embedding:
-            try:
-                if not self.transcript:
-                    self.status = 'transcribing'
-                else:
-                    self.status = 'embedding'
-                self.save(update_fields=['status'])
+        if self.audio_file and self.embedding is None:
+            from .audio_cache import apply_cached_embedding, store_embedding
+            if apply_cached_embedding(self):
+                print(f"Reused cached embedding for {self.title}")
+                return
 
-                # Load model and processor
-                processor = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-base-960h")
-                model = Wav2Vec2Model.from_pretrained("facebook/wav2vec2-base-960h")
-                
+            try:
                 # Get audio file path
                 file_path = os.path.join(settings.MEDIA_ROOT, self.audio_file.name)
                 
-                try:
-                    # Try loading with torchaudio first
-                    waveform, sample_rate = torchaudio.load(file_path)
-                except:
-                    # If that fails, use soundfile as fallback
-                    import soundfile as sf
-                    waveform, sample_rate = sf.read(file_path)
-                    waveform = torch.FloatTensor(waveform)
-                    if len(waveform.shape) == 1:
-                        waveform = waveform.unsqueeze(0)
-                    else:
-                        waveform = waveform.transpose(0, 1)
-                
-                # Resample if necessary (wav2vec expects 16kHz)
-                if sample_rate != 16000:
-                    resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-                    waveform = resampler(waveform)
-                
-                # Convert to mono if stereo
-                if waveform.shape[0] > 1:
-                    waveform = torch.mean(waveform, dim=0, keepdim=True)
-                
-                # Process through wav2vec
-                input_values = processor(waveform.squeeze().numpy(), 
-                                      sampling_rate=16000, 
-                                      return_tensors="pt").input_values
-                
-                with torch.no_grad():
-                    outputs = model(input_values)
-                    # Use mean pooling to get a single vector
-                    embedding = outputs.last_hidden_state.mean(dim=1).squeeze().numpy()
-                
-                # Store the embedding
-                self.embedding = embedding.tolist()
-                self.status = 'completed'
-                self.save(update_fields=['embedding', 'status'])
+                # Concurrent embedding jobs share forward passes on the batcher
+                self.embedding = get_batcher().submit(file_path).result()
+                self.save(update_fields=['embedding'])
+                store_embedding(self)
                 print(f"Generated embedding for {self.title}")
                 
             except Exception as e:
-                self.status = 'failed'
-                self.error_message = str(e)
-                self.save(update_fields=['status', 'error_message'])
                 print(f"Error generating embedding for {self.title}: {str(e)}")
+                raise
 
     def generate_ai_feedback(self):
         """Generate AI feedback based on speech analysis"""
-        if not self.transcript or self.status != 'completed':
+        if not self.transcript or self.status != 'completed' or self.ai_feedback:
             return
             
+        import openai
         try:
             client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
             
@@ -477,12 +377,12 @@ class UserSpeech(models.Model):
             4. Overall assessment
             
             Format the response as JSON with the following structure:
-            {
+            {{
                 "strengths": ["strength1", "strength2", "strength3"],
                 "improvements": ["area1", "area2", "area3"],
                 "recommendations": ["rec1", "rec2", "rec3"],
                 "overall_assessment": "detailed assessment"
-            }
+            }}
             """
             
             response = client.chat.completions.create(
@@ -510,119 +410,155 @@ class UserSpeech(models.Model):
             
             self.save(update_fields=['strengths', 'improvement_areas', 'ai_feedback'])
             
+        except (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError) as e:
+            # Outages, timeouts and rate limits are worth another attempt
+            print(f"Error generating AI feedback: {str(e)}")
+            raise
         except Exception as e:
             print(f"Error generating AI feedback: {str(e)}")
+            raise StageFailed(f"Error generating AI feedback: {str(e)}") from e
 
     def save(self, *args, **kwargs):
         is_new = self._state.adding
+        if is_new and self.audio_file and not self.content_hash:
+            from .audio_cache import hash_audio_file
+            self.content_hash = hash_audio_file(self.audio_file)
         super().save(*args, **kwargs)
         
         if is_new and 'update_fields' not in kwargs:
-            # Start processing chain
-            if not self.transcript:
-                Thread(target=self.transcribe_and_analyze).start()
-            if not self.embedding:
-                Thread(target=self.generate_audio_embedding).start()
-        elif self.status == 'completed' and not self.ai_feedback:
-            # Generate AI feedback when processing is complete
-            Thread(target=self.generate_ai_feedback).start()
-
-    def find_similar_speeches(self, limit=5):
+            # Stages already answered by a duplicate upload start out done
+            from .audio_cache import apply_cached_analysis
+            from .pipeline import start_pipeline
+            cached = apply_cached_analysis(self)
+            # Queue the processing graph for the job worker; AI feedback
+            # is released once transcription and embedding both succeed
+            start_pipeline(self, completed=cached)
+            if cached:
+                self.refresh_from_db(fields=['status', 'error_message'])
+
+    def find_similar_speeches(self, limit=5, category=None, occasion=None):
         """Find similar exemplary speeches based on embedding similarity"""
-        if not self.embedding:
+        if self.embedding is None:
             return []
             
-        similarities = []
-        exemplary_speeches = ExemplarySpeech.objects.exclude(embedding__isnull=True)
-        
-        for speech in exemplary_speeches:
-            similarity = ExemplarySpeech.cosine_similarity(
-                self.embedding, 
-                speech.embedding
-            )
-            similarities.append((speech, similarity))
-        
-        # Sort by similarity score
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:limit]
+        # Top-k from the in-memory index (filters applied inside the search),
+        # then fetch just those rows
+        matches = get_exemplary_index().search(
+            self.embedding,
+            limit,
+            filters={'category': category, 'occasion': occasion}
+        )
+        speeches = ExemplarySpeech.objects.defer('embedding').in_bulk(
+            [speech_id for speech_id, _ in matches]
+        )
+        return [
+            (speeches[speech_id], similarity)
+            for speech_id, similarity in matches
+            if speech_id in speeches
+        ]
 
     def start_live_transcription(self):
-        """Start live transcription session"""
-        try:
-            self.status = 'transcribing'
-            self.is_live = True
-            self.save(update_fields=['status', 'is_live'])
+        """Mark the speech as live; the websocket consumer owns the real-time connection"""
+        self.status = 'transcribing'
+        self.is_live = True
+        self.save(update_fields=['status', 'is_live'])
 
-            # Initialize AssemblyAI client
-            aai.settings.api_key = settings.ASSEMBLYAI_API_KEY
-            
-            # Create real-time transcriber
-            transcriber = aai.RealtimeTranscriber(
-                sample_rate=16000,
-                word_boost=['um', 'uh', 'like', 'you know'],
-                language_code='en',
-                enable_partials=True
-            )
-            
-            # Store session ID
-            self.live_session_id = transcriber.session_id
-            self.save(update_fields=['live_session_id'])
-            
-            return transcriber
-            
-        except Exception as e:
-            self.status = 'failed'
-            self.error_message = str(e)
-            self.save(update_fields=['status', 'error_message'])
-            raise e
+    def set_live_session_id(self, session_id):
+        self.live_session_id = session_id
+        self.save(update_fields=['live_session_id'])
 
     def handle_transcription_result(self, result):
-        """Handle incoming transcription result"""
-        if not self.live_transcript:
-            self.live_transcript = {'segments': []}
-            
-        # Add new segment
-        self.live_transcript['segments'].append({
-            'text': result.text,
-            'timestamp': result.timestamp,
-            'confidence': result.confidence,
-            'words': result.words
-        })
-        
-        # Update transcript field with full text
-        self.transcript = ' '.join(
-            segment['text'] for segment in self.live_transcript['segments']
-        )
-        
-        self.save(update_fields=['live_transcript', 'transcript'])
-        
-        # If confidence is good, analyze the segment
-        if result.confidence > 0.8:
-            self._analyze_live_segment(result)
-
-    def _analyze_live_segment(self, result):
-        """Analyze live segment for metrics"""
-        # Update WPM
-        if result.words:
-            duration = (result.words[-1]['end'] - result.words[0]['start']) / 60
-            word_count = len(result.words)
-            current_wpm = word_count / duration if duration > 0 else 0
-            
-            # Rolling average of WPM
-            if self.words_per_minute:
-                self.words_per_minute = (self.words_per_minute + current_wpm) / 2
-            else:
-                self.words_per_minute = current_wpm
-                
-        # Update other metrics
-        self._count_filler_words(result.words)
-        self._analyze_pauses(result.words)
-        self.clarity_score = self._calculate_clarity(result.words)
-        
-        self.save(update_fields=[
-            'words_per_minute', 'filler_words',
-            'pause_duration', 'clarity_score'
-        ])
+        """Handle incoming transcription result; returns the live metrics summary"""
+        if not getattr(result, 'is_final', True):
+            # Partials are superseded by the final result for the same audio
+            return None
+
+        words = [_as_word_dict(word) for word in result.words or []]
+        live_metrics = self.live_metrics  # Replays earlier segments on first use
+        live_writes = self.live_writes
+
+        # Segment, transcript and metrics are written together on the next flush
+        live_writes.add(LiveTranscriptSegment(
+            speech=self,
+            sequence=self._next_live_sequence(),
+            text=result.text,
+            timestamp=getattr(result, 'timestamp', None),
+            confidence=result.confidence,
+            words=words
+        ))
+        self._pending_live_text.append(result.text)
+        live_writes.touch('transcript')
+
+        live_metrics.add_words(words)
+        live_writes.touch(*LIVE_METRIC_FIELDS)
+
+        live_writes.flush_if_due()
+        return live_metrics.summary()
+
+    @property
+    def live_metrics(self):
+        """Running metrics for the current live session"""
+        if getattr(self, '_live_metrics', None) is None:
+            self._live_metrics = LiveMetricsAccumulator(
+                window_seconds=getattr(settings, 'LIVE_METRICS_WINDOW_SECONDS', 60)
+            )
+            # Resume after a reconnect from the words already logged
+            for words in self.live_segments.order_by('sequence').values_list('words', flat=True):
+                self._live_metrics.add_words(words or [])
+        return self._live_metrics
+
+    @property
+    def live_writes(self):
+        """Write-behind buffer for the current live session"""
+        if getattr(self, '_live_writes', None) is None:
+            self._pending_live_text = []
+            self._live_writes = WriteBehindBuffer(
+                self,
+                flush_seconds=getattr(settings, 'LIVE_WRITE_FLUSH_SECONDS', 5),
+                before_flush=self._prepare_live_flush
+            )
+        return self._live_writes
+
+    def _prepare_live_flush(self):
+        # Extend the transcript with the buffered segments and snapshot the metrics
+        if self._pending_live_text:
+            self.transcript = ' '.join(filter(None, [self.transcript, *self._pending_live_text]))
+            self._pending_live_text = []
+        for field, value in self.live_metrics.snapshot().items():
+            setattr(self, field, value)
+
+    def _next_live_sequence(self):
+        if getattr(self, '_live_sequence', None) is None:
+            # Resume numbering after a reconnect
+            last = self.live_segments.aggregate(last=models.Max('sequence'))['last']
+            self._live_sequence = -1 if last is None else last
+        self._live_sequence += 1
+        return self._live_sequence
+
+    def finish_live_transcription(self):
+        """End the live session, flushing everything still buffered"""
+        self.is_live = False
+        self.live_writes.touch('is_live')
+        self.live_writes.flush()
+
+class LiveTranscriptSegment(models.Model):
+    """One final result from a live transcription session, stored append-only"""
+    speech = models.ForeignKey(UserSpeech, on_delete=models.CASCADE, related_name='live_segments')
+    sequence = models.PositiveIntegerField()
+    text = models.TextField()
+    timestamp = models.FloatField(null=True, blank=True)
+    confidence = models.FloatField(null=True, blank=True)
+    words = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['speech', 'sequence']
+        constraints = [
+            models.UniqueConstraint(fields=['speech', 'sequence'], name='unique_live_segment_sequence'),
+        ]
+
+    def __str__(self):
+        return f"{self.speech_id} #{self.sequence}"
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -645,6 +581,10 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s profile"
 
+@receiver(post_delete, sender=ExemplarySpeech)
+def remove_exemplary_speech_from_index(sender, instance, **kwargs):
+    remove_exemplary_embedding(instance.id)
+
 # Signal to automatically create/update UserProfile when User is created/updated
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
@@ -703,3 +643,122 @@ class InterviewSession(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+class StageFailed(Exception):
+    """A stage failure that retrying won't fix"""
+
+
+class StageWaiting(Exception):
+    """A stage handed its work to an external service and resumes when notified"""
+
+    def __init__(self, external_id):
+        super().__init__(f"Waiting on external job {external_id}")
+        self.external_id = external_id
+
+
+class ProcessingJob(models.Model):
+    """A durable unit of background work for one speech processing stage"""
+    SPEECH_TYPES = [
+        ('exemplaryspeech', 'Exemplary Speech'),
+        ('userspeech', 'User Speech'),
+    ]
+
+    STAGE_CHOICES = [
+        ('transcription', 'Transcription'),
+        ('embedding', 'Embedding'),
+        ('feedback', 'AI Feedback'),
+    ]
+
+    STATUS_CHOICES = [
+        ('blocked', 'Waiting on Dependencies'),
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('waiting', 'Waiting on External Service'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    speech_type = models.CharField(max_length=20, choices=SPEECH_TYPES)
+    speech_id = models.PositiveBigIntegerField()
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    # A running job whose lock expires is assumed lost and can be claimed again
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=255, blank=True)
+    last_error = models.TextField(blank=True, null=True)
+    # Id of the service-side job a waiting stage is parked on
+    external_id = models.CharField(max_length=255, blank=True, db_index=True)
+
+    # Timing of the latest attempt
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['speech_type', 'speech_id', 'stage'],
+                name='unique_stage_per_speech'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['stage', 'status', 'run_after']),
+            models.Index(fields=['speech_type', 'speech_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.stage} for {self.speech_type} {self.speech_id} ({self.status})"
+
+    @staticmethod
+    def default_max_attempts():
+        return getattr(settings, 'JOB_MAX_ATTEMPTS', 5)
+
+    @property
+    def duration_seconds(self):
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
+
+    def get_speech(self):
+        from django.apps import apps
+        model = apps.get_model('core', self.speech_type)
+        return model.objects.filter(pk=self.speech_id).first()
+
+    def retry_delay(self):
+        """Exponential backoff for the next attempt"""
+        base = getattr(settings, 'JOB_RETRY_BASE_SECONDS', 10)
+        cap = getattr(settings, 'JOB_RETRY_MAX_SECONDS', 600)
+        return timedelta(seconds=min(cap, base * 2 ** max(0, self.attempts - 1)))
+
+
+class AudioAnalysisCache(models.Model):
+    """Processing results shared by every upload of the same audio content"""
+    content_hash = models.CharField(max_length=64, unique=True)
+
+    # Transcription and analysis, valid while transcription_version matches
+    transcript = models.TextField(blank=True, null=True)
+    words_per_minute = models.FloatField(null=True, blank=True)
+    pause_duration = models.JSONField(null=True, blank=True)
+    filler_words = models.JSONField(null=True, blank=True)
+    clarity_score = models.FloatField(null=True, blank=True)
+    transcription_version = models.CharField(max_length=255, blank=True)
+
+    # Audio embedding, valid while embedding_version matches
+    embedding = EmbeddingField(null=True, blank=True, dtype='float16')
+    embedding_version = models.CharField(max_length=255, blank=True)
+
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "audio analysis cache"
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.hits} hits)"
@@ -0,0 +1,197 @@
+"""Per-speech processing graph.
+
+Each speech type has a fixed set of stages and the stages each one depends
+on. Starting a pipeline creates one ProcessingJob row per stage, unique per
+(speech, stage). Stages with no dependencies are runnable straight away and
+run in parallel on the job worker. Dependent stages wait as ``blocked`` and
+are released exactly once, by a conditional UPDATE, when their last
+dependency succeeds.
+
+The speech's ``status`` column is derived from its analysis stage rows
+here, so stage methods never write it themselves. Feedback is generated
+after the analysis is already available to the user, so a failed feedback
+stage shows on that stage's row rather than failing the speech.
+"""
+from typing import Dict, List
+
+from django.apps import apps
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ProcessingJob
+
+# stage -> stages it depends on, in display order
+PIPELINES: Dict[str, Dict[str, List[str]]] = {
+    'exemplaryspeech': {
+        'transcription': [],
+        'embedding': [],
+    },
+    'userspeech': {
+        'transcription': [],
+        'embedding': [],
+        'feedback': ['transcription', 'embedding'],
+    },
+}
+
+# Stages the speech status is derived from, and the status shown while each
+# is the earliest unfinished one
+STAGE_STATUS = {
+    'transcription': 'transcribing',
+    'embedding': 'embedding',
+}
+
+
+def stage_graph(speech_type: str) -> Dict[str, List[str]]:
+    return PIPELINES[speech_type]
+
+
+def dependents(speech_type: str, stage: str) -> List[str]:
+    return [name for name, deps in stage_graph(speech_type).items() if stage in deps]
+
+
+def start_pipeline(speech, stages: List[str] = None, completed: List[str] = ()):
+    """Create stage rows for a speech; already-existing stages are left alone.
+
+    Stages in ``completed`` (e.g. answered from the audio cache) are recorded
+    as succeeded without running.
+    """
+    speech_type = speech._meta.model_name
+    graph = stage_graph(speech_type)
+    now = timezone.now()
+
+    def initial_status(stage, deps):
+        if stage in completed:
+            return 'succeeded'
+        return 'blocked' if any(dep not in completed for dep in deps) else 'pending'
+
+    ProcessingJob.objects.bulk_create(
+        [
+            ProcessingJob(
+                speech_type=speech_type,
+                speech_id=speech.pk,
+                stage=stage,
+                status=initial_status(stage, deps),
+                max_attempts=ProcessingJob.default_max_attempts(),
+                started_at=now if stage in completed else None,
+                finished_at=now if stage in completed else None
+            )
+            for stage, deps in graph.items()
+            if stages is None or stage in stages
+        ],
+        ignore_conflicts=True
+    )
+    if completed:
+        sync_speech_status(speech_type, speech.pk)
+
+
+def restart_failed(speech) -> int:
+    """Reset failed stages (and the stages waiting on them) for another run.
+
+    Returns the number of stages restarted.
+    """
+    speech_type = speech._meta.model_name
+    graph = stage_graph(speech_type)
+    jobs = {job.stage: job for job in ProcessingJob.objects.filter(speech_type=speech_type, speech_id=speech.pk)}
+    failed = [job for job in jobs.values() if job.status == 'failed']
+    if not failed:
+        return 0
+    with transaction.atomic():
+        for job in failed:
+            job.status = 'blocked' if _unmet(graph[job.stage], jobs) else 'pending'
+            job.attempts = 0
+            job.run_after = timezone.now()
+            job.last_error = None
+            job.started_at = None
+            job.finished_at = None
+            job.save(update_fields=[
+                'status', 'attempts', 'run_after', 'last_error',
+                'started_at', 'finished_at', 'updated_at'
+            ])
+    start_pipeline(speech)
+    sync_speech_status(speech_type, speech.pk)
+    return len(failed)
+
+
+def resume_waiting(external_id: str) -> bool:
+    """Make the job parked on an external service's job runnable again"""
+    now = timezone.now()
+    return ProcessingJob.objects.filter(external_id=external_id, status='waiting').update(
+        status='pending', run_after=now, locked_until=None, updated_at=now
+    ) > 0
+
+
+def _unmet(deps: List[str], jobs: Dict[str, ProcessingJob]) -> bool:
+    return any(jobs.get(dep) is None or jobs[dep].status != 'succeeded' for dep in deps)
+
+
+def stage_succeeded(job: ProcessingJob):
+    """Release stages whose dependencies are now all met"""
+    # Status first, so a released stage never sees the speech as unfinished
+    sync_speech_status(job.speech_type, job.speech_id)
+    graph = stage_graph(job.speech_type)
+    for stage in dependents(job.speech_type, job.stage):
+        done = ProcessingJob.objects.filter(
+            speech_type=job.speech_type,
+            speech_id=job.speech_id,
+            stage__in=graph[stage],
+            status='succeeded'
+        ).count()
+        if done == len(graph[stage]):
+            # Only one finishing dependency can flip blocked -> pending
+            ProcessingJob.objects.filter(
+                speech_type=job.speech_type,
+                speech_id=job.speech_id,
+                stage=stage,
+                status='blocked'
+            ).update(status='pending', run_after=timezone.now(), updated_at=timezone.now())
+
+
+def sync_speech_status(speech_type: str, speech_id: int):
+    """Derive the speech's status column from its analysis stage rows"""
+    jobs = {
+        job.stage: job
+        for job in ProcessingJob.objects.filter(
+            speech_type=speech_type, speech_id=speech_id, stage__in=STAGE_STATUS
+        )
+    }
+    if not jobs:
+        return
+
+    fields = {'error_message': None}
+    failed = [job for job in jobs.values() if job.status == 'failed']
+    if failed:
+        fields['status'] = 'failed'
+        fields['error_message'] = failed[0].last_error
+    else:
+        fields['status'] = 'completed'
+        for stage in stage_graph(speech_type):
+            job = jobs.get(stage)
+            if job is not None and job.status != 'succeeded':
+                fields['status'] = STAGE_STATUS[stage]
+                break
+
+    model = apps.get_model('core', speech_type)
+    model.objects.filter(pk=speech_id).update(**fields)
+
+
+def stage_timings(speech) -> List[Dict]:
+    """Per-stage status and latency for a speech, in pipeline order"""
+    speech_type = speech._meta.model_name
+    jobs = {
+        job.stage: job
+        for job in ProcessingJob.objects.filter(speech_type=speech_type, speech_id=speech.pk)
+    }
+    return [
+        {
+            'stage': stage,
+            'status': jobs[stage].status,
+            'attempts': jobs[stage].attempts,
+            'queued_at': jobs[stage].created_at,
+            'started_at': jobs[stage].started_at,
+            'finished_at': jobs[stage].finished_at,
+            'duration_seconds': jobs[stage].duration_seconds,
+            'error': jobs[stage].last_error if jobs[stage].status == 'failed' else None,
+        }
+        for stage in stage_graph(speech_type)
+        if stage in jobs
+    ]
@@ -0,0 +1,205 @@
+"""Proxy between one client websocket and the OpenAI realtime API.
+
+The upstream socket is opened by a background task, so a consumer's
+``connect`` returns at once. Events the client sends in the meantime wait
+in a queue. A reader task moves upstream frames towards the client and a
+writer task moves client events upstream. Each direction goes through a
+bounded queue. A slow client therefore stops the reader, and TCP pushes
+back on the upstream. A slow upstream makes ``send`` wait.
+
+All relays on one event loop share a single ``aiohttp.ClientSession``, so
+a worker proxying many sessions keeps one connection pool and one DNS
+cache instead of one per client.
+
+Text deltas are coalesced on their way to the client. Consecutive
+``response.text.delta`` events of the same content part that arrive within
+``coalesce_ms`` of the first are sent as one delta event. Sending stops
+early once ``coalesce_chars`` of text have been collected. A streamed
+answer then costs a handful of client frames instead of one per token.
+Every other event is passed through untouched and in order.
+"""
+import asyncio
+import json
+import weakref
+from typing import Awaitable, Callable, Dict, Optional
+
+_sessions = weakref.WeakKeyDictionary()
+
+TEXT_DELTA = 'response.text.delta'
+# Fields that identify the content part a delta belongs to
+DELTA_STREAM_KEYS = ('response_id', 'item_id', 'output_index', 'content_index')
+_NO_FRAME = object()
+
+
+def shared_session():
+    """The ClientSession for the running event loop, created on first use"""
+    import aiohttp
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        # Realtime sockets stay open for a whole conversation, so the pool must not cap them
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0))
+        _sessions[loop] = session
+    return session
+
+
+class RealtimeRelay:
+    """Relays text frames between a client and one upstream websocket"""
+
+    def __init__(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        on_message: Callable[[str], Awaitable[None]],
+        on_close: Callable[[Optional[Exception]], Awaitable[None]],
+        queue_size: int = 256,
+        heartbeat: float = 30.0,
+        coalesce_ms: float = 5.0,
+        coalesce_chars: int = 512
+    ):
+        self.url = url
+        self.headers = headers
+        self.on_message = on_message
+        self.on_close = on_close
+        self.heartbeat = heartbeat
+        self.coalesce_seconds = coalesce_ms / 1000
+        self.coalesce_chars = coalesce_chars
+        self.to_upstream = asyncio.Queue(maxsize=queue_size)
+        self.to_client = asyncio.Queue(maxsize=queue_size)
+        self.ws = None
+        self.task = None
+        self.connect_seconds = None
+        self.frames_up = 0
+        self.frames_down = 0
+        self.deltas_coalesced = 0
+
+    def start(self):
+        """Open the upstream socket in the background"""
+        self.task = asyncio.create_task(self._run())
+
+    async def send(self, event: Dict):
+        """Queue an event for upstream; waits while the queue is full"""
+        await self.to_upstream.put(json.dumps(event))
+
+    async def close(self):
+        """Stop relaying and close the upstream socket"""
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            'connect_ms': None if self.connect_seconds is None else round(self.connect_seconds * 1000, 1),
+            'frames_up': self.frames_up,
+            'frames_down': self.frames_down,
+            'deltas_coalesced': self.deltas_coalesced,
+            'queued_up': self.to_upstream.qsize(),
+            'queued_down': self.to_client.qsize(),
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        tasks = []
+        error = None
+        try:
+            started = loop.time()
+            self.ws = await shared_session().ws_connect(self.url, headers=self.headers, heartbeat=self.heartbeat)
+            self.connect_seconds = loop.time() - started
+            reader = asyncio.create_task(self._read())
+            writer = asyncio.create_task(self._write())
+            forwarder = asyncio.create_task(self._forward())
+            tasks = [reader, writer, forwarder]
+            # The forwarder returns once the upstream has closed and every frame
+            # has been delivered; the writer only returns by failing
+            done, _ = await asyncio.wait([writer, forwarder], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception():
+                    raise task.exception()
+            if self.ws.exception():
+                raise self.ws.exception()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.ws is not None:
+                await self.ws.close()
+        await self.on_close(error)
+
+    async def _read(self):
+        import aiohttp
+        async for msg in self.ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                await self.to_client.put(msg.data)
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                break
+        await self.to_client.put(None)
+
+    async def _write(self):
+        while True:
+            data = await self.to_upstream.get()
+            await self.ws.send_str(data)
+            self.frames_up += 1
+
+    async def _forward(self):
+        loop = asyncio.get_running_loop()
+        held = _NO_FRAME
+        while True:
+            data = await self.to_client.get() if held is _NO_FRAME else held
+            held = _NO_FRAME
+            if data is None:
+                return
+            first = _text_delta(data)
+            if first is None:
+                await self._deliver(data)
+                continue
+
+            deltas, size = [first['delta']], len(first['delta'])
+            deadline = loop.time() + self.coalesce_seconds
+            while size < self.coalesce_chars:
+                frame = await self._next_frame(loop, deadline)
+                if frame is _NO_FRAME:
+                    break
+                event = _text_delta(frame) if frame is not None else None
+                if event is None or any(event.get(key) != first.get(key) for key in DELTA_STREAM_KEYS):
+                    # Anything else ends the batch and goes out right after it
+                    held = frame
+                    break
+                deltas.append(event['delta'])
+                size += len(event['delta'])
+
+            if len(deltas) > 1:
+                data = json.dumps({**first, 'delta': ''.join(deltas)})
+                self.deltas_coalesced += len(deltas) - 1
+            await self._deliver(data)
+
+    async def _next_frame(self, loop, deadline):
+        """The next frame for the client, or _NO_FRAME if none arrives by the deadline"""
+        if not self.to_client.empty():
+            return self.to_client.get_nowait()
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            return _NO_FRAME
+        try:
+            return await asyncio.wait_for(self.to_client.get(), timeout)
+        except asyncio.TimeoutError:
+            return _NO_FRAME
+
+    async def _deliver(self, data: str):
+        await self.on_message(data)
+        self.frames_down += 1
+
+
+def _text_delta(data: str) -> Optional[Dict]:
+    """The parsed event if the frame is a text delta, else None"""
+    # Most frames are not deltas; skip parsing them
+    if TEXT_DELTA not in data:
+        return None
+    event = json.loads(data)
+    return event if event.get('type') == TEXT_DELTA else None
@@ -0,0 +1,120 @@
+"""Segmented transcription for long recordings.
+
+A long upload is cut into segments of roughly ``segment_seconds``. Each cut
+is placed at the quietest point within ``search_seconds`` of its target,
+so words are not split between segments. The segments are transcribed
+concurrently on the background loop, at most ``concurrency`` at a time,
+and their word timings are shifted by each segment's offset back onto the
+original timeline. The recording is never loaded into memory whole.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .async_utils import run_in_background
+from .transcription import TranscriptionBackend, TranscriptionResult
+
+FRAME_SECONDS = 0.02
+# Cuts go in the middle of the quietest stretch this long, not one quiet frame
+SILENCE_SECONDS = 0.3
+
+logger = logging.getLogger(__name__)
+
+
+def frame_energy(file_path: str, frame_seconds: float = FRAME_SECONDS) -> np.ndarray:
+    """RMS energy of consecutive mono frames, read block by block"""
+    import soundfile as sf
+    sample_rate = sf.info(file_path).samplerate
+    frame = max(1, int(frame_seconds * sample_rate))
+    energies = []
+    for block in sf.blocks(file_path, blocksize=frame * 500, dtype='float32', always_2d=True):
+        mono = block.mean(axis=1)
+        usable = len(mono) // frame * frame
+        if usable:
+            energies.append(np.sqrt(np.mean(mono[:usable].reshape(-1, frame) ** 2, axis=1)))
+        if usable < len(mono):
+            # Only the final block can be short
+            energies.append(np.sqrt(np.mean(mono[usable:] ** 2, keepdims=True)))
+    return np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+
+
+def silence_split_points(
+    energies: np.ndarray,
+    segment_seconds: float,
+    search_seconds: float,
+    frame_seconds: float = FRAME_SECONDS
+) -> List[float]:
+    """Cut times near every ``segment_seconds``, each at the quietest nearby stretch"""
+    duration = len(energies) * frame_seconds
+    width = max(1, int(SILENCE_SECONDS / frame_seconds))
+    smoothed = np.convolve(energies, np.ones(width) / width, mode='same')
+
+    splits, last = [], 0.0
+    while duration - last > segment_seconds + search_seconds:
+        target = last + segment_seconds
+        low = int((target - search_seconds) / frame_seconds)
+        high = int((target + search_seconds) / frame_seconds) + 1
+        quietest = low + int(np.argmin(smoothed[low:high]))
+        last = quietest * frame_seconds
+        splits.append(last)
+    return splits
+
+
+def write_segments(file_path: str, splits: List[float], directory: str) -> List[Tuple[float, str]]:
+    """Write each segment as a WAV file; returns (offset seconds, path) pairs"""
+    import soundfile as sf
+    info = sf.info(file_path)
+    bounds = [0] + [int(split * info.samplerate) for split in splits] + [info.frames]
+    segments = []
+    for index, (start, stop) in enumerate(zip(bounds, bounds[1:])):
+        samples, sample_rate = sf.read(file_path, start=start, stop=stop, dtype='float32')
+        path = os.path.join(directory, f"segment{index:04d}.wav")
+        sf.write(path, samples, sample_rate)
+        segments.append((start / sample_rate, path))
+    return segments
+
+
+def stitch(parts: List[Tuple[float, TranscriptionResult]], audio_duration: Optional[float]) -> TranscriptionResult:
+    """Join segment transcripts, shifting word timings by each segment's offset"""
+    words = [
+        {**word, 'start': round(offset + word['start'], 3), 'end': round(offset + word['end'], 3)}
+        for offset, result in parts
+        for word in result.words
+    ]
+    text = ' '.join(result.text for _, result in parts if result.text)
+    return TranscriptionResult(text, words, audio_duration)
+
+
+async def _transcribe_segments(backend: TranscriptionBackend, segments, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def transcribe(offset, path):
+        async with semaphore:
+            return offset, await backend.transcribe_async(path)
+
+    return await asyncio.gather(*(transcribe(offset, path) for offset, path in segments))
+
+
+def transcribe_segmented(
+    backend: TranscriptionBackend,
+    file_path: str,
+    segment_seconds: float,
+    concurrency: int,
+    search_seconds: float
+) -> TranscriptionResult:
+    """Transcribe a long recording as concurrent, silence-aligned segments"""
+    import soundfile as sf
+    duration = sf.info(file_path).duration
+    splits = silence_split_points(frame_energy(file_path), segment_seconds, search_seconds)
+    if not splits:
+        return backend.transcribe(file_path)
+
+    with tempfile.TemporaryDirectory(prefix='segments-') as directory:
+        segments = write_segments(file_path, splits, directory)
+        parts = run_in_background(_transcribe_segments(backend, segments, concurrency))
+    logger.debug("Transcribed %s as %d segments", os.path.basename(file_path), len(segments))
+    return stitch(parts, duration)
@@ -0,0 +1,129 @@
+import os
+import sys
+
+import pytest
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(tmp_path_factory):
+    """Django configured against a throwaway SQLite database, migrated once"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'speech_coach.settings')
+    os.environ.setdefault('OPENAI_API_KEY', 'test')
+    os.environ.setdefault('TRANSCRIPTION_BACKEND', 'local')
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    root = tmp_path_factory.mktemp('django')
+    settings.DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(root / 'test.sqlite3'),
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+    settings.MEDIA_ROOT = str(root / 'media')
+    django.setup()
+    call_command('migrate', verbosity=0)
+
+
+@pytest.fixture
+def db(django_db_setup):
+    """Database access for a test; every table is emptied afterwards.
+
+    Tables are flushed rather than rolled back, so code under test may use
+    its own transactions and threads.
+    """
+    from django.core.management import call_command
+    from django.db import close_old_connections
+
+    yield
+    close_old_connections()
+    call_command('flush', interactive=False, verbosity=0)
+
+
+@pytest.fixture
+def settings_override(django_db_setup):
+    """Call with setting=value pairs to override settings for the rest of the test"""
+    from django.test import override_settings
+
+    overrides = []
+
+    def override(**values):
+        overrides.append(override_settings(**values))
+        overrides[-1].enable()
+
+    yield override
+    for override_ in reversed(overrides):
+        override_.disable()
+
+
+@pytest.fixture
+def make_speech(db):
+    """Call to create a speech by 'speaker'; extra fields are set after its jobs are queued"""
+    def make_speech(title='Talk', audio=b'RIFF fake audio', **fields):
+        from django.contrib.auth.models import User
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from core.models import UserSpeech
+
+        user, _ = User.objects.get_or_create(username='speaker')
+        speech = UserSpeech.objects.create(user=user, title=title, audio_file=SimpleUploadedFile('talk.wav', audio))
+        if fields:
+            UserSpeech.objects.filter(pk=speech.pk).update(**fields)
+            speech.refresh_from_db()
+        return speech
+
+    return make_speech
+
+
+@pytest.fixture
+def upload(make_speech):
+    """Call to upload audio as a new speech by 'speaker'"""
+    def upload(audio=b'RIFF fake audio', title='Talk'):
+        return make_speech(title, audio)
+
+    return upload
+
+
+@pytest.fixture
+def stage_statuses(db):
+    """Call with a speech for the status of each of its pipeline stages"""
+    def stage_statuses(speech):
+        from core.models import ProcessingJob
+
+        return dict(
+            ProcessingJob.objects.filter(speech_type='userspeech', speech_id=speech.pk).values_list('stage', 'status')
+        )
+
+    return stage_statuses
+
+
+@pytest.fixture
+def run_analysis(db):
+    """Call to run every runnable transcription and embedding job once"""
+    def run_analysis():
+        from core.jobs import claim_jobs, run_job
+
+        for stage in ('transcription', 'embedding'):
+            for job in claim_jobs(stage, 'test', 10):
+                run_job(job)
+
+    return run_analysis
+
+
+@pytest.fixture
+def make_words():
+    """Call with word texts for word dicts in seconds, ``gap`` (or ``gaps[i]``) before each"""
+    def make_words(texts, gap=0.1, length=0.3, start=0.0, confidence=0.9, gaps=None):
+        words, t = [], start
+        for i, text in enumerate(texts):
+            t += gaps[i] if gaps else gap
+            words.append({'text': text, 'start': t, 'end': t + length, 'confidence': confidence})
+            t += length
+        return words
+
+    return make_words
@@ -1,4 +1,6 @@
+import asyncio
 import pytest
+from types import SimpleNamespace
 from unittest.mock import patch, AsyncMock, MagicMock
 import sys
 import os
@@ -66,7 +68,9 @@ async def test_process_response(interview_agent):
         ]
         return mock_response
     
-    with patch('openai.ChatCompletion.acreate', new=async_mock):
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = async_mock
+    with patch('openai.AsyncOpenAI', return_value=mock_client):
         analysis = await interview_agent.process_response("I have 5 years of experience.")
         analysis_dict = json.loads(analysis)
         
@@ -130,4 +134,176 @@ async def test_error_handling():
         InterviewAgent("", "")  # Empty strings should raise error
     
     with pytest.raises(ValueError):
-        InterviewAgent("Software Engineer", "invalid_type")  # Invalid interview type 
\ No newline at end of file
+        InterviewAgent("Software Engineer", "invalid_type")  # Invalid interview type 
+class FakeChat:
+    """Stands in for the OpenAI chat completions API, recording every request"""
+
+    def __init__(self, fail_summaries=False, hold_summaries=False):
+        self.analysis_requests = []
+        self.summary_requests = []
+        self.fail_summaries = fail_summaries
+        self.hold_summaries = hold_summaries
+        self.clients = []
+
+    def client(self, *args, **kwargs):
+        """Stands in for openai.AsyncOpenAI"""
+        client = MagicMock()
+        client.chat.completions.create = self.create
+        client.close = AsyncMock()
+        self.clients.append(client)
+        return client
+
+    async def create(self, *args, **kwargs):
+        mock_response = MagicMock()
+        if 'response_format' in kwargs:
+            self.analysis_requests.append(kwargs['messages'])
+            content = json.dumps({"score": 7, "follow_up_question": f"Question {len(self.analysis_requests)}"})
+            mock_response.usage = {"prompt_tokens": 100 * len(self.analysis_requests), "completion_tokens": 20}
+        else:
+            self.summary_requests.append(kwargs['messages'])
+            if self.hold_summaries:
+                await asyncio.Event().wait()
+            if self.fail_summaries:
+                raise RuntimeError("rate limited")
+            content = f"Summary after {len(self.summary_requests)} folds"
+        mock_response.choices = [MagicMock(message=MagicMock(content=content))]
+        return mock_response
+
+async def _interview(agent, chat, answers):
+    with patch('openai.AsyncOpenAI', new=chat.client):
+        for i in range(answers):
+            await agent.process_response(f"Answer number {i} " + "detail " * 50)
+            await agent.context.wait_for_summary()
+
+@pytest.mark.asyncio
+async def test_context_is_bounded_and_template_sent_once():
+    """Test long sessions send a fixed-size prompt with one copy of the analysis template"""
+    agent = InterviewAgent("Software Engineer", "technical", context_turns=3)
+    chat = FakeChat()
+    await _interview(agent, chat, 20)
+
+    sizes = [len(messages) for messages in chat.analysis_requests]
+    # system prompt + summary + 3 recent turns + the new answer
+    assert max(sizes) == 1 + 1 + 3 * 2 + 1
+    assert sizes[-1] == sizes[10]
+    for messages in chat.analysis_requests:
+        assert sum('Analyze the response' in message['content'] for message in messages) == 1
+    # The last answer was analysed before its turn pushed another one out
+    assert chat.analysis_requests[-1][1]['content'].endswith(f"Summary after {len(chat.summary_requests) - 1} folds")
+    assert "Answer number 19" in chat.analysis_requests[-1][-1]['content']
+    assert "Answer number 15" not in str(chat.analysis_requests[-1])
+    # The full transcript is still kept
+    assert len(agent.conversation_history) == 40
+
+@pytest.mark.asyncio
+async def test_summary_is_cached_between_folds():
+    """Test the summary is only rewritten when turns leave the window"""
+    agent = InterviewAgent("Software Engineer", "technical", context_turns=4)
+    chat = FakeChat()
+    await _interview(agent, chat, 4)
+    assert chat.summary_requests == []
+
+    await _interview(agent, chat, 3)
+    assert len(chat.summary_requests) == 3
+    # Each fold sends the previous summary, not the older turns again
+    assert "Summary after 2 folds" in chat.summary_requests[-1][-1]['content']
+    assert agent.context.stats()['summarized_turns'] == 3
+
+@pytest.mark.asyncio
+async def test_failed_summary_falls_back_to_bounded_digest():
+    """Test a failing summariser still keeps the context within budget"""
+    agent = InterviewAgent("Software Engineer", "technical", context_turns=2, summary_max_tokens=50)
+    chat = FakeChat(fail_summaries=True)
+    await _interview(agent, chat, 12)
+
+    summary = agent.context.summary
+    assert "Answer number 9" in summary
+    assert len(summary) <= 50 * 4
+    assert len(chat.analysis_requests[-1]) == 1 + 1 + 2 * 2 + 1
+
+@pytest.mark.asyncio
+async def test_close_cancels_summary_in_progress():
+    """Test ending the session stops a summary still being written and closes the client"""
+    agent = InterviewAgent("Software Engineer", "technical", context_turns=1)
+    chat = FakeChat(hold_summaries=True)
+    with patch('openai.AsyncOpenAI', new=chat.client):
+        await agent.process_response("First answer")
+        await agent.process_response("Second answer")
+        await asyncio.sleep(0)
+        task = agent.context.summary_task
+        assert len(chat.summary_requests) == 1
+        assert not task.done()
+
+        await agent.close()
+    assert task.cancelled()
+    assert len(chat.clients) == 1
+    chat.clients[0].close.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_token_usage_tracked_per_turn():
+    """Test each turn records estimated and reported token counts"""
+    agent = InterviewAgent("Software Engineer", "technical", context_turns=2)
+    chat = FakeChat()
+    await _interview(agent, chat, 8)
+
+    usage = agent.context.usage
+    assert [turn['turn'] for turn in usage] == list(range(1, 9))
+    assert [turn['prompt_tokens'] for turn in usage] == [100 * i for i in range(1, 9)]
+    assert all(turn['completion_tokens'] == 20 for turn in usage)
+    estimates = [turn['prompt_tokens_estimate'] for turn in usage]
+    # Grows while the window fills, then stays flat
+    assert estimates[0] < estimates[2]
+    assert max(estimates[4:]) - min(estimates[4:]) < 50
+    assert agent.context.stats()['turns'] == 8
+
+@pytest.mark.asyncio
+async def test_streamed_feedback_arrives_before_analysis_completes():
+    """Test streaming passes feedback and question text on as it arrives, then returns the analysis"""
+    analysis = {
+        "feedback": "Clear answer with a good example.",
+        "follow_up_question": "How did you measure success?",
+        "score": 8,
+        "strengths": ["Structure"],
+        "improvements": ["Quantify results"],
+    }
+    text = json.dumps(analysis)
+    progress = {"chunks": 0}
+    requests = []
+
+    def chunk(content=None, usage=None):
+        choices = [] if usage else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+        return SimpleNamespace(choices=choices, usage=usage)
+
+    async def stream():
+        yield chunk()
+        for start in range(0, len(text), 5):
+            progress["chunks"] += 1
+            yield chunk(text[start:start + 5])
+        yield chunk()
+        yield chunk(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=40))
+
+    async def create(*args, **kwargs):
+        requests.append(kwargs)
+        return stream()
+
+    client = MagicMock()
+    client.chat.completions.create = create
+
+    deltas = []
+
+    async def on_delta(field, value):
+        deltas.append((field, value, progress["chunks"]))
+
+    agent = InterviewAgent("Software Engineer", "technical")
+    with patch('openai.AsyncOpenAI', return_value=client):
+        result = await agent.process_response("I led the migration.", on_delta=on_delta)
+
+    assert result == analysis
+    assert requests[0]["stream"] is True
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    assert agent.context.usage[-1]["prompt_tokens"] == 120
+    assert "".join(value for field, value, _ in deltas if field == "feedback") == analysis["feedback"]
+    assert "".join(value for field, value, _ in deltas if field == "follow_up_question") == analysis["follow_up_question"]
+    # The first feedback text goes out within the first few chunks of the reply
+    assert deltas[0][2] <= 4
+    assert agent.context.turns[-1]["assistant"] == text
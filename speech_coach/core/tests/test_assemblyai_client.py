@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.assemblyai_client import AssemblyAIClient
+from core.transcription import parse_transcript
+
+class FakeAssemblyAI:
+    """Minimal upload/submit/poll API; jobs complete after a few polls"""
+
+    def __init__(self, polls_until_done=2, fail=False):
+        self.polls_until_done = polls_until_done
+        self.fail = fail
+        self.jobs = {}
+        self.uploads = []
+        self.active = 0
+        self.max_active = 0
+        self.peers = set()
+        self.app = web.Application(client_max_size=16 << 20)
+        self.app.router.add_post('/upload', self.upload)
+        self.app.router.add_post('/transcript', self.submit)
+        self.app.router.add_get('/transcript/{id}', self.get)
+
+    async def upload(self, request):
+        assert request.headers['authorization'] == 'test-key'
+        self.peers.add(request.transport.get_extra_info('peername'))
+        self.uploads.append(await request.read())
+        return web.json_response({'upload_url': f"upload://{len(self.uploads)}"})
+
+    async def submit(self, request):
+        payload = await request.json()
+        job_id = f"job{len(self.jobs)}"
+        self.jobs[job_id] = {'payload': payload, 'polls': 0}
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        return web.json_response({'id': job_id, 'status': 'queued'})
+
+    async def get(self, request):
+        job = self.jobs[request.match_info['id']]
+        job['polls'] += 1
+        if job['polls'] < self.polls_until_done:
+            return web.json_response({'status': 'processing'})
+        self.active -= 1
+        if self.fail:
+            return web.json_response({'status': 'error', 'error': 'bad audio'})
+        return web.json_response({
+            'status': 'completed',
+            'text': 'um hello',
+            'audio_duration': 3,
+            'words': [
+                {'text': 'um', 'start': 100, 'end': 400, 'confidence': 0.9},
+                {'text': 'hello', 'start': 1500, 'end': 2000, 'confidence': 0.8},
+            ],
+        })
+
+async def _run(api, fn):
+    server = TestServer(api.app)
+    await server.start_server()
+    client = AssemblyAIClient('test-key', base_url=str(server.make_url('')), max_in_flight=3, poll_seconds=0.01)
+    try:
+        return await fn(client)
+    finally:
+        await client.close()
+        await server.close()
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / 'talk.wav'
+    path.write_bytes(b'RIFF' + os.urandom(3 * (1 << 20)))
+    return str(path)
+
+def test_transcribe_uploads_submits_and_polls(recording):
+    """Test a transcription streams the file, submits the config and polls to completion"""
+    api = FakeAssemblyAI(polls_until_done=3)
+    transcript = asyncio.run(_run(api, lambda client: client.transcribe(recording, disfluencies=True)))
+    with open(recording, 'rb') as f:
+        assert api.uploads == [f.read()]
+    assert api.jobs['job0']['payload'] == {'audio_url': 'upload://1', 'disfluencies': True}
+    assert api.jobs['job0']['polls'] == 3
+    result = parse_transcript(transcript)
+    assert result.text == 'um hello'
+    assert result.words[1] == {'text': 'hello', 'start': 1.5, 'end': 2.0, 'confidence': 0.8}
+    assert result.audio_duration == 3
+
+def test_in_flight_limit_and_connection_reuse(recording):
+    """Test concurrent transcriptions respect the limit and share pooled connections"""
+    api = FakeAssemblyAI(polls_until_done=5)
+
+    async def many(client):
+        results = await asyncio.gather(*(client.transcribe(recording) for _ in range(10)))
+        return results, client.stats()
+
+    results, stats = asyncio.run(_run(api, many))
+    assert len(results) == 10
+    assert api.max_active == 3
+    assert len(api.peers) <= 3
+    assert stats == {'in_flight': 0, 'completed': 10, 'failed': 0, 'polls': 50}
+
+def test_error_status_raises(recording):
+    """Test a failed job raises with the service's error"""
+    api = FakeAssemblyAI(fail=True)
+    with pytest.raises(RuntimeError, match='bad audio'):
+        asyncio.run(_run(api, lambda client: client.transcribe(recording)))
@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.audio_buffer import AudioFrameBuffer, chunk_size
+
+def test_chunk_size():
+    """Test chunk size for 16-bit mono PCM"""
+    assert chunk_size(16000, 100) == 3200
+
+def test_frames_aggregate_into_fixed_chunks():
+    """Test small frames are re-sliced into equal chunks with the remainder kept"""
+    buffer = AudioFrameBuffer(chunk_bytes=10, max_chunks=10)
+    for i in range(7):
+        buffer.push(bytes([i]) * 4)
+    assert len(buffer) == 2
+    assert buffer.pop() == bytes([0] * 4 + [1] * 4 + [2] * 2)
+    assert buffer.pop() == bytes([2] * 2 + [3] * 4 + [4] * 4)
+    buffer.flush()
+    assert buffer.pop() == bytes([5] * 4 + [6] * 4)
+    assert buffer.pop() is None
+    assert buffer.stats()['frames_in'] == 7
+
+def test_full_buffer_drops_oldest():
+    """Test a full buffer drops the oldest chunk and counts it"""
+    buffer = AudioFrameBuffer(chunk_bytes=2, max_chunks=3)
+    for i in range(5):
+        buffer.push(bytes([i, i]))
+    assert [buffer.pop() for _ in range(3)] == [bytes([2, 2]), bytes([3, 3]), bytes([4, 4])]
+    stats = buffer.stats()
+    assert stats['dropped_chunks'] == 2
+    assert stats['dropped_bytes'] == 4
+    assert stats['max_depth'] == 3
+
+def test_drop_newest_policy():
+    """Test the drop-newest policy keeps the queued audio"""
+    buffer = AudioFrameBuffer(chunk_bytes=1, max_chunks=2, drop='newest')
+    buffer.push(b'abc')
+    assert [buffer.pop(), buffer.pop()] == [b'a', b'b']
+    assert buffer.stats()['dropped_chunks'] == 1
+    with pytest.raises(ValueError):
+        AudioFrameBuffer(chunk_bytes=1, max_chunks=1, drop='random')
+
+def test_get_waits_for_chunks_and_drains_on_close():
+    """Test async consumers wake on new chunks and stop after close"""
+    async def run():
+        buffer = AudioFrameBuffer(chunk_bytes=4, max_chunks=4)
+        received = []
+
+        async def consume():
+            while (chunk := await buffer.get()) is not None:
+                received.append(chunk)
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        buffer.push(b'1234')
+        buffer.push(b'56')
+        await asyncio.sleep(0)
+        buffer.close()
+        await asyncio.wait_for(task, 1)
+        return received
+
+    assert asyncio.run(run()) == [b'1234', b'56']
@@ -0,0 +1,124 @@
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+WORDS = [
+    {'text': 'hello', 'start': 0.0, 'end': 0.4, 'confidence': 0.9},
+    {'text': 'um', 'start': 0.6, 'end': 0.8, 'confidence': 0.8},
+    {'text': 'there', 'start': 3.5, 'end': 3.9, 'confidence': 0.95},
+]
+
+
+@pytest.fixture
+def services(db, monkeypatch):
+    """Counts calls to the transcription service and the embedding model"""
+    from core import models
+    from core.transcription import TranscriptionResult
+
+    calls = {'transcription': 0, 'embedding': 0}
+
+    def transcribe(file_path, external_id=None):
+        calls['transcription'] += 1
+        return TranscriptionResult('hello um there', WORDS, 4.0)
+
+    class Batcher:
+        def submit(self, file_path):
+            calls['embedding'] += 1
+            future = Future()
+            future.set_result(np.full(8, 0.5, dtype=np.float32))
+            return future
+
+    monkeypatch.setattr(models, '_transcribe_or_submit', transcribe)
+    monkeypatch.setattr(models, 'get_batcher', Batcher)
+    return calls
+
+
+def test_first_upload_misses_and_fills_the_cache(services, upload, run_analysis, stage_statuses):
+    from core.audio_cache import lookup
+
+    speech = upload()
+    assert lookup(speech.content_hash) is None
+    assert stage_statuses(speech)['transcription'] == 'pending'
+
+    run_analysis()
+
+    assert services == {'transcription': 1, 'embedding': 1}
+    entry = lookup(speech.content_hash)
+    assert entry.transcript == 'hello um there'
+    assert entry.embedding is not None
+    assert entry.hits == 0
+
+
+def test_duplicate_upload_is_answered_from_the_cache(services, upload, run_analysis, stage_statuses):
+    from core.audio_cache import lookup
+
+    first = upload()
+    run_analysis()
+    first.refresh_from_db()
+
+    second = upload(title='Same talk again')
+    run_analysis()
+
+    assert services == {'transcription': 1, 'embedding': 1}
+    assert second.content_hash == first.content_hash
+    assert stage_statuses(second) == {'transcription': 'succeeded', 'embedding': 'succeeded', 'feedback': 'pending'}
+    assert second.status == 'completed'
+    second.refresh_from_db()
+    assert second.transcript == first.transcript
+    assert second.filler_words == first.filler_words
+    assert np.array_equal(second.embedding, first.embedding)
+    assert lookup(second.content_hash).hits == 2
+
+
+def test_different_audio_misses(services, upload, run_analysis, stage_statuses):
+    upload()
+    run_analysis()
+    other = upload(b'RIFF other audio')
+    run_analysis()
+
+    assert services == {'transcription': 2, 'embedding': 2}
+    assert stage_statuses(other)['transcription'] == 'succeeded'
+
+
+def test_queued_job_reuses_a_result_cached_after_upload(services, upload, run_analysis):
+    first, second = upload(), upload(title='Same talk again')
+    run_analysis()
+
+    # Both were queued before either finished; the second job finds the first's result
+    assert services == {'transcription': 1, 'embedding': 1}
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert second.transcript == first.transcript
+    assert np.array_equal(second.embedding, first.embedding)
+
+
+def test_new_transcription_version_invalidates_only_the_analysis(
+    services, settings_override, upload, run_analysis, stage_statuses
+):
+    upload()
+    run_analysis()
+
+    settings_override(AUDIO_CACHE_TRANSCRIPTION_VERSION='2')
+    second = upload(title='Same talk again')
+    assert stage_statuses(second) == {'transcription': 'pending', 'embedding': 'succeeded', 'feedback': 'blocked'}
+    run_analysis()
+
+    assert services == {'transcription': 2, 'embedding': 1}
+    # The fresh result replaces the stale entry
+    third = upload(title='And again')
+    assert stage_statuses(third)['transcription'] == 'succeeded'
+
+
+def test_new_embedding_model_invalidates_only_the_embedding(
+    services, settings_override, upload, run_analysis, stage_statuses
+):
+    upload()
+    run_analysis()
+
+    settings_override(EMBEDDING_MODEL_NAME='another-model')
+    second = upload(title='Same talk again')
+    assert stage_statuses(second) == {'transcription': 'succeeded', 'embedding': 'pending', 'feedback': 'blocked'}
+    run_analysis()
+
+    assert services == {'transcription': 1, 'embedding': 2}
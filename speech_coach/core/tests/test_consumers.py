@@ -0,0 +1,167 @@
+import asyncio
+import queue
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('daphne')  # channels.testing needs it
+
+
+class FakeSDKTranscriber:
+    """Stands in for assemblyai.RealtimeTranscriber; the test plays the service"""
+    instances = []
+
+    def __init__(self, sample_rate, word_boost, on_data, on_error, on_open):
+        self.on_data = on_data
+        self.on_open = on_open
+        self.streamed = []
+        self.closed = False
+        self._impl = SimpleNamespace(_write_queue=queue.Queue())
+        FakeSDKTranscriber.instances.append(self)
+
+    def connect(self):
+        self.on_open(SimpleNamespace(session_id='session-1'))
+
+    def stream(self, data):
+        self.streamed.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def live(make_speech, settings_override, monkeypatch):
+    """A speech owned by 'speaker', with the AssemblyAI backend talking to a fake SDK"""
+    import assemblyai as aai
+    from core import transcription
+
+    # Nothing is written until the session ends unless a test asks for it
+    settings_override(LIVE_WRITE_FLUSH_SECONDS=3600, LIVE_AUDIO_CHUNK_MS=100)
+    monkeypatch.setattr(aai, 'RealtimeTranscriber', FakeSDKTranscriber)
+    monkeypatch.setattr(transcription, '_backend', transcription.AssemblyAIBackend(api_key='test'))
+    FakeSDKTranscriber.instances = []
+
+    return make_speech()
+
+
+def communicator(user, speech_id):
+    from channels.routing import URLRouter
+    from channels.testing import WebsocketCommunicator
+    from core.routing import websocket_urlpatterns
+
+    connection = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/speeches/{speech_id}/live/')
+    connection.scope['user'] = user
+    return connection
+
+
+async def connected_sdk():
+    """The fake SDK transcriber, once the consumer has opened it after accepting"""
+    for _ in range(100):
+        if FakeSDKTranscriber.instances:
+            return FakeSDKTranscriber.instances[0]
+        await asyncio.sleep(0.01)
+    pytest.fail('The consumer never opened a transcriber')
+
+
+def transcript(text, start_ms, words, final=True):
+    """An SDK transcript; words are (text, start_ms, end_ms)"""
+    import assemblyai as aai
+
+    fields = dict(
+        audio_start=start_ms,
+        audio_end=words[-1][2],
+        confidence=0.9,
+        text=text,
+        words=[aai.RealtimeWord(text=word, start=start, end=end, confidence=0.9) for word, start, end in words],
+        created=datetime.now()
+    )
+    if final:
+        return aai.RealtimeFinalTranscript(message_type='FinalTranscript', punctuated=True, text_formatted=True, **fields)
+    return aai.RealtimePartialTranscript(message_type='PartialTranscript', **fields)
+
+
+def segments(speech):
+    from core.async_utils import run_db
+
+    return run_db(lambda: list(speech.live_segments.values_list('sequence', 'text', 'words')))
+
+
+def test_anonymous_users_are_refused(live):
+    from django.contrib.auth.models import AnonymousUser
+
+    async def scenario():
+        connection = communicator(AnonymousUser(), live.pk)
+        connected, _ = await connection.connect()
+        await connection.disconnect()
+        return connected
+
+    assert asyncio.run(scenario()) is False
+    assert FakeSDKTranscriber.instances == []
+
+
+def test_another_users_speech_is_refused(live):
+    from django.contrib.auth.models import User
+
+    other = User.objects.create(username='someone-else')
+
+    async def scenario():
+        connection = communicator(other, live.pk)
+        connected, _ = await connection.connect()
+        await connection.disconnect()
+        return connected
+
+    assert asyncio.run(scenario()) is False
+    assert FakeSDKTranscriber.instances == []
+
+
+def test_final_results_are_stored_in_order_in_seconds(live):
+    async def scenario():
+        connection = communicator(live.user, live.pk)
+        assert (await connection.connect())[0]
+        sdk = await connected_sdk()
+
+        sdk.on_data(transcript('hello', 0, [('hello', 0, 400)], final=False))
+        sdk.on_data(transcript('hello there', 0, [('hello', 0, 400), ('there', 500, 900)]))
+        sdk.on_data(transcript('um so', 1500, [('um', 1500, 1700), ('so', 2600, 2800)]))
+        messages = [await connection.receive_json_from() for _ in range(3)]
+        # Buffered until the session ends
+        stored_before_close = await segments(live)
+        await connection.disconnect()
+        return messages, stored_before_close
+
+    messages, stored_before_close = asyncio.run(scenario())
+
+    assert [(message['text'], message['is_final']) for message in messages] == [
+        ('hello', False), ('hello there', True), ('um so', True)
+    ]
+    assert messages[0]['analysis'] is None
+    assert messages[2]['words'][0] == {'text': 'um', 'start': 1.5, 'end': 1.7, 'confidence': 0.9}
+    assert messages[2]['analysis']['word_count'] == 4
+    assert messages[2]['analysis']['filler_words']['um'] == 1
+
+    # Partials are never stored; finals are flushed when the client leaves
+    assert stored_before_close == []
+    stored = asyncio.run(segments(live))
+    assert [(sequence, text) for sequence, text, _ in stored] == [(0, 'hello there'), (1, 'um so')]
+    assert stored[1][2][1] == {'text': 'so', 'start': 2.6, 'end': 2.8, 'confidence': 0.9}
+    live.refresh_from_db()
+    assert (live.transcript, live.is_live, live.live_session_id) == ('hello there um so', False, 'session-1')
+
+
+def test_buffered_audio_is_sent_before_the_session_closes(live):
+    async def scenario():
+        connection = communicator(live.user, live.pk)
+        assert (await connection.connect())[0]
+        sdk = await connected_sdk()
+
+        # A chunk is 100ms of 16kHz 16-bit audio; the last frame is only half of one
+        for _ in range(3):
+            await connection.send_to(bytes_data=b'\1' * 1600)
+        await connection.disconnect()
+        return sdk
+
+    sdk = asyncio.run(scenario())
+
+    assert [len(chunk) for chunk in sdk.streamed] == [3200, 1600]
+    assert sdk.closed
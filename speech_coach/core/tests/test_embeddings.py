@@ -0,0 +1,314 @@
+import sys
+import threading
+from types import ModuleType, SimpleNamespace
+
+import numpy as np
+import pytest
+
+from core import embeddings
+from core.embeddings import EmbeddingBatcher, EmbeddingEngine, get_batcher, get_engine
+
+
+class FakeProcessor:
+    """Stands in for Wav2Vec2Processor: zero-pads a batch to its longest clip"""
+
+    def __init__(self, return_attention_mask):
+        self.feature_extractor = SimpleNamespace(return_attention_mask=return_attention_mask)
+
+    def __call__(self, audio, sampling_rate, return_tensors, padding=False, return_attention_mask=False):
+        import torch
+
+        arrays = audio if isinstance(audio, list) else [audio]
+        longest = max(len(array) for array in arrays)
+        input_values = torch.zeros(len(arrays), longest)
+        attention_mask = torch.zeros(len(arrays), longest, dtype=torch.long)
+        for row, array in enumerate(arrays):
+            input_values[row, :len(array)] = torch.from_numpy(np.asarray(array, dtype=np.float32))
+            attention_mask[row, :len(array)] = 1
+        return SimpleNamespace(input_values=input_values, attention_mask=attention_mask)
+
+
+class FakeModel:
+    """Stands in for Wav2Vec2Model: one frame per two samples
+
+    With ``normalize`` every frame is offset by the clip's mean, taken over
+    the attention mask when one is given and over the whole (padded) input
+    otherwise, like the group norm in checkpoints trained without a mask.
+    """
+
+    def __init__(self, normalize=True):
+        self.normalize = normalize
+        self.calls = []
+
+    def eval(self):
+        return self
+
+    def _get_feat_extract_output_lengths(self, lengths):
+        return lengths // 2
+
+    def __call__(self, input_values, attention_mask=None):
+        self.calls.append(tuple(input_values.shape))
+        frames = input_values[:, :input_values.shape[1] // 2 * 2].reshape(input_values.shape[0], -1, 2)
+        if self.normalize:
+            if attention_mask is None:
+                offset = frames.mean(dim=(1, 2), keepdim=True)
+            else:
+                import torch
+
+                frame_lengths = self._get_feat_extract_output_lengths(attention_mask.sum(dim=1))
+                offset = torch.stack([frames[row, :n].mean() for row, n in enumerate(frame_lengths)]).view(-1, 1, 1)
+            frames = frames + offset
+        return SimpleNamespace(last_hidden_state=frames)
+
+
+@pytest.fixture
+def torch():
+    return pytest.importorskip('torch')
+
+
+def fake_engine(return_attention_mask=False, normalize=True, **kwargs):
+    engine = EmbeddingEngine('fake-model', **kwargs)
+    engine.processor = FakeProcessor(return_attention_mask)
+    engine.model = FakeModel(normalize)
+    return engine
+
+
+@pytest.mark.parametrize('return_attention_mask', [False, True])
+def test_batched_embeddings_match_single_passes(torch, return_attention_mask):
+    """Test a clip's embedding doesn't depend on the other clips in its batch"""
+    generator = torch.Generator().manual_seed(0)
+    waveforms = [torch.randn(1, length, generator=generator) + 1 for length in (300, 500, 300, 200)]
+    engine = fake_engine(return_attention_mask)
+
+    single = [engine.embed_waveform(waveform) for waveform in waveforms]
+    engine.model.calls.clear()
+    batched = engine.embed_batch(waveforms)
+
+    for expected, embedding in zip(single, batched):
+        np.testing.assert_allclose(embedding, expected, rtol=1e-5)
+    if return_attention_mask:
+        assert engine.model.calls == [(4, 500)]
+    else:
+        # Only the equal-length clips share a pass
+        assert sorted(engine.model.calls) == [(1, 200), (1, 500), (2, 300)]
+
+
+@pytest.fixture
+def pretrained(torch, monkeypatch):
+    """Fake transformers package; records each from_pretrained call"""
+    loads = []
+
+    def loader(kind, make):
+        def from_pretrained(name):
+            loads.append((kind, name))
+            return make()
+        return SimpleNamespace(from_pretrained=from_pretrained)
+
+    transformers = ModuleType('transformers')
+    transformers.Wav2Vec2Processor = loader('processor', lambda: FakeProcessor(False))
+    transformers.Wav2Vec2Model = loader('model', FakeModel)
+    monkeypatch.setitem(sys.modules, 'transformers', transformers)
+    return loads
+
+
+def test_model_loads_on_first_use_only(pretrained, torch):
+    engine = EmbeddingEngine('fake-model')
+    assert not engine.is_loaded
+    assert engine.stats()['loaded'] is False
+    assert pretrained == []
+
+    threads = [threading.Thread(target=engine.load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.embed_waveform(torch.ones(1, 100))
+
+    # Concurrent first calls share a single load
+    assert pretrained == [('processor', 'fake-model'), ('model', 'fake-model')]
+    assert engine.is_loaded
+    assert engine.load_seconds is not None
+
+
+def test_engine_and_batcher_are_shared_per_process(settings_override, monkeypatch):
+    monkeypatch.setattr(embeddings, '_engine', None)
+    monkeypatch.setattr(embeddings, '_batcher', None)
+    settings_override(EMBEDDING_MODEL_NAME='fake-model', EMBEDDING_MAX_BATCH_SIZE=3, EMBEDDING_MAX_WAIT_MS=20)
+
+    engine = get_engine()
+    assert get_engine() is engine
+    assert (engine.model_name, engine.is_loaded) == ('fake-model', False)
+
+    batcher = get_batcher()
+    assert get_batcher() is batcher
+    assert batcher.engine is engine
+    assert (batcher.max_batch_size, batcher.max_wait_seconds) == (3, 0.02)
+
+
+def test_stats_count_every_embedded_clip(torch):
+    engine = fake_engine()
+    stats = engine.stats()
+    assert (stats['inference_count'], stats['total_inference_seconds'], stats['average_inference_seconds']) == (0, 0.0, None)
+
+    engine.embed_waveform(torch.ones(1, 100))
+    engine.embed_waveform(torch.ones(1, 200))
+    engine.embed_batch([torch.ones(1, 300)] * 3)
+
+    stats = engine.stats()
+    assert stats['inference_count'] == 5
+    assert stats['total_inference_seconds'] > 0
+    assert stats['last_inference_seconds'] > 0
+    assert stats['average_inference_seconds'] == pytest.approx(stats['total_inference_seconds'] / 5)
+
+
+class FakeBatchEngine:
+    """Embeds each clip as its length; paths starting 'long' are streamed"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.batches = []
+        self.streamed = []
+
+    def should_stream(self, file_path):
+        return file_path.startswith('long')
+
+    def embed_file_streaming(self, file_path):
+        self.streamed.append(file_path)
+        return np.array([-1.0])
+
+    def embed_batch(self, waveforms):
+        self.batches.append([waveform.shape[-1] for waveform in waveforms])
+        if self.error:
+            raise self.error
+        return [np.array([float(waveform.shape[-1])]) for waveform in waveforms]
+
+
+@pytest.fixture
+def waveforms(monkeypatch):
+    """load_waveform reads 'clip-<samples>' paths as silence of that length"""
+    def load_waveform(file_path):
+        if file_path == 'missing':
+            raise FileNotFoundError(file_path)
+        return np.zeros((1, int(file_path.split('-')[1])), dtype=np.float32)
+
+    monkeypatch.setattr(embeddings, 'load_waveform', load_waveform)
+
+
+def submit_concurrently(batcher, paths):
+    """Submit every path from its own thread at once; futures in path order"""
+    futures = [None] * len(paths)
+    barrier = threading.Barrier(len(paths))
+
+    def submit(index):
+        barrier.wait()
+        futures[index] = batcher.submit(paths[index])
+
+    threads = [threading.Thread(target=submit, args=(index,)) for index in range(len(paths))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return futures
+
+
+def test_full_batch_is_flushed_without_waiting(waveforms):
+    engine = FakeBatchEngine()
+    batcher = EmbeddingBatcher(engine, max_batch_size=4, max_wait_seconds=60)
+    paths = [f'clip-{100 + i}' for i in range(8)]
+
+    futures = submit_concurrently(batcher, paths)
+
+    # Each future gets its own clip's embedding, whatever order the batch ran in
+    assert [future.result(timeout=5)[0] for future in futures] == [100 + i for i in range(8)]
+    assert [len(batch) for batch in engine.batches] == [4, 4]
+    # Clips are sorted by length within a batch to keep padding small
+    assert all(batch == sorted(batch) for batch in engine.batches)
+    stats = batcher.stats()
+    assert (stats['batch_count'], stats['item_count'], stats['average_batch_size']) == (2, 8, 4)
+
+
+def test_partial_batch_is_flushed_after_the_wait(waveforms):
+    engine = FakeBatchEngine()
+    batcher = EmbeddingBatcher(engine, max_batch_size=8, max_wait_seconds=0.05)
+
+    futures = submit_concurrently(batcher, ['clip-300', 'clip-100', 'clip-200'])
+
+    assert [future.result(timeout=5)[0] for future in futures] == [300, 100, 200]
+    assert engine.batches == [[100, 200, 300]]
+
+
+def test_engine_error_fails_every_waiting_future(waveforms):
+    error = RuntimeError('out of memory')
+    batcher = EmbeddingBatcher(FakeBatchEngine(error), max_batch_size=3, max_wait_seconds=60)
+
+    futures = submit_concurrently(batcher, ['clip-100', 'clip-200', 'clip-300'])
+
+    for future in futures:
+        assert future.exception(timeout=5) is error
+    assert batcher.stats()['batch_count'] == 0
+    # The queue thread survives and serves the next batch
+    batcher.engine, batcher.max_wait_seconds = FakeBatchEngine(), 0
+    assert batcher.submit('clip-50').result(timeout=5)[0] == 50
+
+
+def test_unreadable_and_long_files_leave_the_batch_alone(waveforms):
+    engine = FakeBatchEngine()
+    batcher = EmbeddingBatcher(engine, max_batch_size=3, max_wait_seconds=60)
+
+    missing, long, clip = submit_concurrently(batcher, ['missing', 'long-900', 'clip-100'])
+
+    assert isinstance(missing.exception(timeout=5), FileNotFoundError)
+    assert long.result(timeout=5)[0] == -1
+    assert clip.result(timeout=5)[0] == 100
+    assert (engine.streamed, engine.batches) == (['long-900'], [[100]])
+
+
+def cut_windows(waveform, window, overlap):
+    """Windows laid out like iter_waveform_windows: each after the first starts with the overlap"""
+    starts = range(0, waveform.shape[-1] - overlap, window)
+    return [waveform[:, start:start + window + overlap] for start in starts]
+
+
+def test_streamed_pooling_matches_a_single_pass(torch):
+    waveform = torch.randn(1, 1000, generator=torch.Generator().manual_seed(0))
+    engine = fake_engine(normalize=False)
+    expected = engine.embed_waveform(waveform)
+
+    windows = cut_windows(waveform, 320, 40)
+    assert [window.shape[-1] for window in windows] == [360, 360, 360]
+
+    np.testing.assert_allclose(engine.embed_windows(iter(windows), overlap_samples=40), expected, rtol=1e-5)
+    # Counting the overlap frames twice would skew the mean
+    assert not np.allclose(engine.embed_windows(iter(windows)), expected, rtol=1e-5)
+
+
+def test_streamed_file_matches_a_single_pass(torch, tmp_path):
+    pytest.importorskip('torchaudio')
+    sf = pytest.importorskip('soundfile')
+    waveform = torch.randn(1, 1000, generator=torch.Generator().manual_seed(0))
+    path = str(tmp_path / 'talk.wav')
+    sf.write(path, waveform[0].numpy(), 16000, subtype='FLOAT')
+    engine = fake_engine(normalize=False, window_seconds=0.02, overlap_seconds=0.0025)
+    expected = engine.embed_waveform(waveform)
+
+    np.testing.assert_allclose(engine.embed_file_streaming(path), expected, rtol=1e-5)
+    # One pass for the whole file, then one per 320-sample window
+    assert engine.model.calls == [(1, 1000), (1, 360), (1, 360), (1, 360)]
+
+
+def test_embed_windows_needs_some_audio(torch):
+    with pytest.raises(ValueError):
+        fake_engine().embed_windows(iter([]))
+
+
+def test_only_recordings_over_the_threshold_are_streamed(tmp_path):
+    sf = pytest.importorskip('soundfile')
+    path = str(tmp_path / 'talk.wav')
+    sf.write(path, np.zeros(3 * 16000, dtype=np.float32), 16000)
+    not_audio = tmp_path / 'talk.txt'
+    not_audio.write_text('hello')
+
+    assert EmbeddingEngine('fake-model', streaming_threshold_seconds=2).should_stream(path)
+    assert not EmbeddingEngine('fake-model', streaming_threshold_seconds=3).should_stream(path)
+    # Without a readable duration the file is loaded whole
+    assert not EmbeddingEngine('fake-model', streaming_threshold_seconds=0).should_stream(str(not_audio))
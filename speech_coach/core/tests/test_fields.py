@@ -0,0 +1,49 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.fields import EmbeddingField, encode_embedding, decode_embedding
+
+def test_round_trip_float32():
+    """Test packed float32 embeddings decode to the same values"""
+    vector = np.random.default_rng(0).normal(size=768).astype(np.float32)
+    data = encode_embedding(vector)
+    assert len(data) == 4 + 768 * 4
+    decoded = decode_embedding(memoryview(data))
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded, vector)
+
+def test_round_trip_float16_halves_size():
+    """Test float16 storage is half the size and close to the original"""
+    vector = np.linspace(-3, 3, 768)
+    data = encode_embedding(vector, 'float16')
+    assert len(data) == 4 + 768 * 2
+    assert np.allclose(decode_embedding(data), vector, atol=1e-2)
+
+def test_decode_is_zero_copy():
+    """Test decoding returns a read-only view over the stored bytes"""
+    data = encode_embedding([1.0, 2.0, 3.0])
+    decoded = decode_embedding(data)
+    assert not decoded.flags.writeable
+    assert decoded.base is not None
+
+def test_field_prep_and_to_python():
+    """Test the field accepts lists, arrays and serialized strings"""
+    field = EmbeddingField(dtype='float16')
+    packed = field.get_prep_value([0.5, 1.5])
+    assert isinstance(packed, bytes)
+    assert field.get_prep_value(None) is None
+    assert np.array_equal(field.to_python(packed), [0.5, 1.5])
+    assert np.array_equal(field.to_python([0.5, 1.5]), [0.5, 1.5])
+
+    import base64
+    assert np.array_equal(field.to_python(base64.b64encode(packed).decode()), [0.5, 1.5])
+
+def test_field_rejects_unknown_dtype():
+    """Test only float32 and float16 storage is allowed"""
+    with pytest.raises(ValueError):
+        EmbeddingField(dtype='int8')
@@ -0,0 +1,301 @@
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+
+def make_due(job):
+    """Move a job's retry time or lock expiry into the past"""
+    from django.utils import timezone
+    from core.models import ProcessingJob
+
+    past = timezone.now() - timedelta(seconds=1)
+    ProcessingJob.objects.filter(pk=job.pk).update(run_after=past, locked_until=past)
+
+
+@pytest.fixture
+def transcription(db, monkeypatch):
+    """Stand-in transcription stage: outcomes[i] is raised on call i, None succeeds"""
+    from core.models import UserSpeech
+
+    calls = []
+    outcomes = []
+
+    def transcribe_and_analyze(self, external_id=None):
+        calls.append(external_id)
+        outcome = outcomes.pop(0) if outcomes else None
+        if outcome is not None:
+            raise outcome
+        self.transcript = 'hello there'
+        self.save(update_fields=['transcript'])
+
+    monkeypatch.setattr(UserSpeech, 'transcribe_and_analyze', transcribe_and_analyze)
+    return calls, outcomes
+
+
+def test_claim_marks_jobs_running_up_to_the_limit(make_speech):
+    from core.jobs import claim_jobs
+
+    speeches = [make_speech(f'Talk {i}') for i in range(3)]
+    jobs = claim_jobs('transcription', 'worker-a', 2)
+
+    assert [job.speech_id for job in jobs] == [speech.pk for speech in speeches[:2]]
+    for job in jobs:
+        job.refresh_from_db()
+        assert (job.status, job.attempts, job.locked_by) == ('running', 1, 'worker-a')
+        assert job.locked_until > job.started_at
+    # Locked jobs, blocked stages and other stages are left alone
+    assert [job.speech_id for job in claim_jobs('transcription', 'worker-b', 10)] == [speeches[2].pk]
+    assert claim_jobs('transcription', 'worker-b', 10) == []
+    assert claim_jobs('feedback', 'worker-b', 10) == []
+    assert claim_jobs('transcription', 'worker-b', 0) == []
+
+
+def test_claim_skips_rows_locked_by_other_workers(monkeypatch, make_speech):
+    """Test the claim query asks for SKIP LOCKED (SQLite has no row locks to exercise it)"""
+    from django.db.models import QuerySet
+    from core.jobs import claim_jobs
+
+    requested = []
+    select_for_update = QuerySet.select_for_update
+
+    def spy(self, **kwargs):
+        requested.append(kwargs)
+        return select_for_update(self, **kwargs)
+
+    monkeypatch.setattr(QuerySet, 'select_for_update', spy)
+    make_speech()
+    assert len(claim_jobs('transcription', 'worker-a', 10)) == 1
+    assert requested == [{'skip_locked': True}]
+
+
+def test_job_is_reclaimed_once_its_lock_expires(make_speech):
+    from core.jobs import claim_jobs
+
+    speech = make_speech()
+    [job] = claim_jobs('transcription', 'worker-a', 10)
+    assert claim_jobs('transcription', 'worker-b', 10) == []
+
+    # worker-a died mid-job
+    make_due(job)
+    [job] = claim_jobs('transcription', 'worker-b', 10)
+    job.refresh_from_db()
+    assert (job.speech_id, job.status, job.attempts, job.locked_by) == (speech.pk, 'running', 2, 'worker-b')
+
+
+def test_failed_attempts_retry_with_backoff_then_fail(transcription, settings_override, make_speech):
+    from django.utils import timezone
+    from core.jobs import claim_jobs, run_job
+
+    settings_override(JOB_MAX_ATTEMPTS=3, JOB_RETRY_BASE_SECONDS=10, JOB_RETRY_MAX_SECONDS=15)
+    calls, outcomes = transcription
+    outcomes.extend([RuntimeError('service unavailable')] * 3)
+    speech = make_speech()
+
+    delays = []
+    for attempt in range(1, 4):
+        [job] = claim_jobs('transcription', 'worker', 10)
+        started = timezone.now()
+        run_job(job)
+        job.refresh_from_db()
+        assert job.attempts == attempt
+        assert job.last_error == 'service unavailable'
+        if attempt < 3:
+            assert job.status == 'pending'
+            delays.append(round((job.run_after - started).total_seconds()))
+            # Not runnable again until the backoff has passed
+            assert claim_jobs('transcription', 'worker', 10) == []
+            make_due(job)
+
+    assert delays == [10, 15]
+    assert job.status == 'failed'
+    speech.refresh_from_db()
+    assert speech.status == 'failed'
+    assert speech.error_message == 'service unavailable'
+    assert len(calls) == 3
+
+
+def test_stage_failed_is_not_retried(transcription, make_speech, caplog):
+    from core.jobs import claim_jobs, run_job
+    from core.models import StageFailed
+
+    _, outcomes = transcription
+    outcomes.append(StageFailed('No transcript generated'))
+    speech = make_speech()
+
+    [job] = claim_jobs('transcription', 'worker', 10)
+    run_job(job)
+
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == ('failed', 1)
+    speech.refresh_from_db()
+    assert speech.status == 'failed'
+    assert [(record.name, record.levelname) for record in caplog.records] == [('core.jobs', 'ERROR')]
+    assert 'failed permanently: No transcript generated' in caplog.text
+
+
+def test_parked_job_resumes_from_webhook(transcription, make_speech):
+    from core.jobs import claim_jobs, run_job
+    from core.models import StageWaiting
+    from core.pipeline import resume_waiting
+
+    calls, outcomes = transcription
+    outcomes.append(StageWaiting('external-1'))
+    speech = make_speech()
+
+    [job] = claim_jobs('transcription', 'worker', 10)
+    run_job(job)
+    job.refresh_from_db()
+    # Parked without holding a worker or using up an attempt
+    assert (job.status, job.external_id, job.attempts) == ('waiting', 'external-1', 0)
+    assert claim_jobs('transcription', 'worker', 10) == []
+
+    assert resume_waiting('unknown') is False
+    assert resume_waiting('external-1') is True
+    [job] = claim_jobs('transcription', 'worker', 10)
+    run_job(job)
+
+    job.refresh_from_db()
+    assert (job.status, job.external_id, job.attempts) == ('succeeded', '', 1)
+    assert calls == [None, 'external-1']
+    speech.refresh_from_db()
+    assert speech.transcript == 'hello there'
+    assert speech.status == 'embedding'
+    # A late duplicate webhook finds nothing to resume
+    assert resume_waiting('external-1') is False
+
+
+def test_parked_job_is_reclaimed_when_webhook_never_arrives(transcription, make_speech):
+    from core.jobs import claim_jobs, run_job
+    from core.models import StageWaiting
+
+    calls, outcomes = transcription
+    outcomes.append(StageWaiting('external-1'))
+    make_speech()
+
+    [job] = claim_jobs('transcription', 'worker', 10)
+    run_job(job)
+    make_due(job)
+    [job] = claim_jobs('transcription', 'worker', 10)
+    run_job(job)
+
+    job.refresh_from_db()
+    assert job.status == 'succeeded'
+    # The resumed stage collects the result of the job it already submitted
+    assert calls == [None, 'external-1']
+
+
+def test_job_for_deleted_speech_succeeds(transcription, make_speech):
+    from core.jobs import claim_jobs, run_job
+
+    calls, _ = transcription
+    speech = make_speech()
+    [job] = claim_jobs('transcription', 'worker', 10)
+    speech.delete()
+    run_job(job)
+
+    job.refresh_from_db()
+    assert job.status == 'succeeded'
+    assert calls == []
+
+
+class FakeOpenAI:
+    """Stands in for openai.OpenAI; each create() returns or raises the next outcome"""
+    outcomes = []
+    calls = 0
+
+    def __init__(self, **kwargs):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        FakeOpenAI.calls += 1
+        outcome = FakeOpenAI.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=outcome))])
+
+
+@pytest.fixture
+def fake_openai(db, monkeypatch):
+    import openai
+
+    monkeypatch.setattr(openai, 'OpenAI', FakeOpenAI)
+    FakeOpenAI.outcomes = []
+    FakeOpenAI.calls = 0
+    return FakeOpenAI
+
+
+@pytest.fixture
+def analysed_speech(make_speech):
+    """Call for a completed speech whose feedback job is runnable"""
+    def analysed_speech(**fields):
+        from core.models import ProcessingJob
+
+        speech = make_speech(
+            status='completed', transcript='hello there', words_per_minute=130, clarity_score=0.9, **fields
+        )
+        ProcessingJob.objects.filter(speech_id=speech.pk).exclude(stage='feedback').update(status='succeeded')
+        ProcessingJob.objects.filter(speech_id=speech.pk, stage='feedback').update(status='pending')
+        return speech
+
+    return analysed_speech
+
+
+FEEDBACK = json.dumps({
+    'strengths': ['a', 'b', 'c'],
+    'improvements': ['d', 'e', 'f'],
+    'recommendations': ['g', 'h', 'i'],
+    'overall_assessment': 'Good'
+})
+
+
+def test_feedback_retries_transient_openai_errors(fake_openai, analysed_speech):
+    import httpx
+    import openai
+    from core.jobs import claim_jobs, run_job
+
+    fake_openai.outcomes = [openai.APIConnectionError(request=httpx.Request('POST', 'https://api.openai.com')), FEEDBACK]
+    speech = analysed_speech()
+
+    [job] = claim_jobs('feedback', 'worker', 10)
+    run_job(job)
+    job.refresh_from_db()
+    assert job.status == 'pending'
+
+    make_due(job)
+    [job] = claim_jobs('feedback', 'worker', 10)
+    run_job(job)
+    job.refresh_from_db()
+    assert job.status == 'succeeded'
+    speech.refresh_from_db()
+    assert speech.strengths == ['a', 'b', 'c']
+    assert json.loads(speech.ai_feedback)['overall_assessment'] == 'Good'
+
+
+def test_feedback_fails_at_once_on_errors_a_retry_cannot_fix(fake_openai, analysed_speech):
+    from core.jobs import claim_jobs, run_job
+
+    fake_openai.outcomes = ['{"strengths": []}']
+    speech = analysed_speech()
+
+    [job] = claim_jobs('feedback', 'worker', 10)
+    run_job(job)
+
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == ('failed', 1)
+    assert "'improvements'" in job.last_error
+    speech.refresh_from_db()
+    assert speech.status == 'completed'
+
+
+def test_feedback_needs_a_completed_analysis(fake_openai, analysed_speech):
+    from core.models import UserSpeech
+
+    speech = analysed_speech()
+    UserSpeech.objects.filter(pk=speech.pk).update(status='embedding')
+    speech.refresh_from_db()
+
+    speech.generate_ai_feedback()
+    assert fake_openai.calls == 0
+    assert speech.ai_feedback is None
@@ -0,0 +1,48 @@
+import json
+import pytest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.json_stream import JsonStringFields
+
+ANALYSIS = {
+    "feedback": "Great \"STAR\" answer,\nwith a {clear} result — well done \U0001F600",
+    "follow_up_question": "What would you do differently?",
+    "score": 8,
+    "strengths": ["feedback: concise", "structure"],
+    "details": {"feedback": "nested, not streamed"},
+}
+
+def _collect(text, chunk_size):
+    fields = JsonStringFields(["feedback", "follow_up_question"])
+    collected = {}
+    for start in range(0, len(text), chunk_size):
+        for field, value in fields.feed(text[start:start + chunk_size]):
+            collected[field] = collected.get(field, "") + value
+    return collected
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_fields_decode_identically_at_any_chunking(ensure_ascii):
+    """Test streamed values match the parsed JSON however the text is split"""
+    text = json.dumps(ANALYSIS, indent=2, ensure_ascii=ensure_ascii)
+    for chunk_size in (1, 2, 3, 7, len(text)):
+        assert _collect(text, chunk_size) == {
+            "feedback": ANALYSIS["feedback"],
+            "follow_up_question": ANALYSIS["follow_up_question"],
+        }
+
+def test_values_stream_before_document_completes():
+    """Test text is returned as soon as it arrives, before the value's closing quote"""
+    fields = JsonStringFields(["feedback"])
+    assert fields.feed('{"feedback": "Nice ans') == [("feedback", "Nice ans")]
+    assert fields.feed('wer", "score": 7, "follow_up_question": "Why?"') == [("feedback", "wer")]
+    assert fields.feed('}') == []
+
+def test_only_top_level_keys_match():
+    """Test nested keys and string values equal to a field name are ignored"""
+    fields = JsonStringFields(["feedback"])
+    text = '{"notes": "feedback", "items": [{"feedback": "no"}], "feedback": "yes"}'
+    assert fields.feed(text) == [("feedback", "yes")]
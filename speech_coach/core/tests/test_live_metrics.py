@@ -0,0 +1,58 @@
+import pytest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core import metrics
+from core.live_metrics import LiveMetricsAccumulator
+
+def test_matches_batch_metrics(make_words):
+    """Test running totals equal the batch metrics over the same words"""
+    words = make_words(['So', 'um', 'you', 'know', 'the', 'plan'] * 20)
+    words[40]['start'] += 3
+    for word in words[41:]:
+        word['start'] += 3
+        word['end'] += 3
+    words[40]['end'] += 3
+
+    accumulator = LiveMetricsAccumulator()
+    for i in range(0, len(words), 7):
+        accumulator.add_words(words[i:i + 7])
+
+    expected = metrics.analyze_words(words)
+    snapshot = accumulator.snapshot()
+    assert snapshot['pause_duration'] == pytest.approx(expected['pause_duration'])
+    assert snapshot['words_per_minute'] == pytest.approx(expected['words_per_minute'])
+    assert snapshot['clarity_score'] == pytest.approx(expected['clarity_score'])
+    for phrase in metrics.FILLER_PHRASES:
+        assert len(snapshot['filler_words'][phrase]) == len(expected['filler_words'][phrase])
+    assert len(snapshot['filler_words']['you know']) == 20
+
+def test_phrase_split_across_segments(make_words):
+    """Test a multi-word filler spanning two results is still counted"""
+    accumulator = LiveMetricsAccumulator()
+    words = make_words(['well', 'you', 'know'])
+    accumulator.add_words(words[:2])
+    accumulator.add_words(words[2:])
+    assert accumulator.summary()['filler_words']['you know'] == 1
+
+def test_window_rate_tracks_recent_speech(make_words):
+    """Test the sliding-window rate follows a change of pace"""
+    accumulator = LiveMetricsAccumulator(window_seconds=30)
+    slow = make_words(['word'] * 60, gap=1.5, length=0.5)  # 30 wpm for two minutes
+    fast = make_words(['word'] * 100, gap=0.1, length=0.2, start=slow[-1]['end'] + 0.1)  # 200 wpm
+    accumulator.add_words(slow)
+    assert accumulator.window_words_per_minute == pytest.approx(30, rel=0.1)
+    accumulator.add_words(fast)
+    assert accumulator.window_words_per_minute == pytest.approx(200, rel=0.05)
+    assert accumulator.words_per_minute < 100
+
+def test_empty_accumulator():
+    """Test an accumulator with no words reports no rates"""
+    summary = LiveMetricsAccumulator().summary()
+    assert summary['words_per_minute'] is None
+    assert summary['window_words_per_minute'] is None
+    assert summary['clarity_score'] is None
+    assert summary['word_count'] == 0
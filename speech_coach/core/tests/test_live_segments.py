@@ -0,0 +1,96 @@
+import pytest
+
+
+def final(text, start):
+    from core.transcription import LiveResult
+
+    words = [
+        {'text': word, 'start': start + i * 0.5, 'end': start + i * 0.5 + 0.4, 'confidence': 0.9}
+        for i, word in enumerate(text.split())
+    ]
+    return LiveResult(text, True, start, 0.9, words)
+
+
+@pytest.fixture
+def live_speech(make_speech):
+    speech = make_speech()
+    speech.start_live_transcription()
+    return speech
+
+
+def reconnect(speech):
+    """The speech as a new consumer loads it"""
+    from core.models import UserSpeech
+
+    return UserSpeech.objects.get(pk=speech.pk)
+
+
+def logged(speech):
+    return list(speech.live_segments.values_list('sequence', 'text'))
+
+
+def test_segments_are_buffered_until_the_session_ends(live_speech, settings_override):
+    from core.transcription import LiveResult
+
+    settings_override(LIVE_WRITE_FLUSH_SECONDS=3600)
+    live_speech.handle_transcription_result(final('hello there', 0.0))
+    assert live_speech.handle_transcription_result(LiveResult('so', False, 1.0, 0.5, [])) is None
+    summary = live_speech.handle_transcription_result(final('so today', 1.0))
+
+    assert summary['word_count'] == 4
+    assert logged(live_speech) == []
+    live_speech.finish_live_transcription()
+
+    # Partials never reach the log
+    assert logged(live_speech) == [(0, 'hello there'), (1, 'so today')]
+    speech = reconnect(live_speech)
+    assert (speech.transcript, speech.is_live) == ('hello there so today', False)
+
+
+def test_reconnect_continues_the_log(live_speech, settings_override):
+    # Every result is flushed, so a dropped connection loses nothing
+    settings_override(LIVE_WRITE_FLUSH_SECONDS=0)
+    live_speech.handle_transcription_result(final('hello there', 0.0))
+    live_speech.handle_transcription_result(final('so today', 1.0))
+    # The first connection drops without finishing the session
+
+    speech = reconnect(live_speech)
+    speech.start_live_transcription()
+    summary = speech.handle_transcription_result(final('we talk', 2.0))
+    speech.handle_transcription_result(final('about practice', 3.0))
+    speech.finish_live_transcription()
+
+    # Numbering resumes without gaps or duplicates, and metrics include the earlier words
+    assert logged(speech) == [(0, 'hello there'), (1, 'so today'), (2, 'we talk'), (3, 'about practice')]
+    assert summary['word_count'] == 6
+    # The transcript is the log's text in sequence order
+    speech = reconnect(speech)
+    assert speech.transcript == ' '.join(text for _, text in logged(speech))
+    assert speech.words_per_minute is not None
+
+
+def test_migration_copies_inline_segments_to_the_log(db):
+    from django.core.management import call_command
+    from django.db import connection
+    from django.db.migrations.executor import MigrationExecutor
+    from core.models import LiveTranscriptSegment
+
+    segments = [
+        {'text': 'hello there', 'timestamp': 0.0, 'confidence': 0.9, 'words': [{'text': 'hello'}]},
+        {'text': 'so today', 'timestamp': 1.0, 'confidence': 0.8, 'words': None},
+    ]
+    call_command('migrate', 'core', '0010', verbosity=0)
+    try:
+        apps = MigrationExecutor(connection).loader.project_state(('core', '0010_audio_analysis_cache')).apps
+        user = apps.get_model('auth', 'User').objects.create(username='speaker')
+        speech = apps.get_model('core', 'UserSpeech').objects.create(
+            user_id=user.pk, title='Talk', audio_file='talk.wav', live_transcript={'segments': segments}
+        )
+    finally:
+        call_command('migrate', 'core', verbosity=0)
+
+    copied = LiveTranscriptSegment.objects.filter(speech_id=speech.pk).order_by('sequence')
+    assert [(segment.sequence, segment.text, segment.timestamp, segment.confidence, segment.words) for segment in copied] == [
+        (0, 'hello there', 0.0, 0.9, [{'text': 'hello'}]),
+        (1, 'so today', 1.0, 0.8, None),
+    ]
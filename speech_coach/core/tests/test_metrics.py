@@ -0,0 +1,59 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core import metrics
+
+def loop_pauses(words):
+    return [
+        {'timestamp': words[i]['end'], 'duration': words[i + 1]['start'] - words[i]['end']}
+        for i in range(len(words) - 1)
+        if words[i + 1]['start'] - words[i]['end'] > 1.0
+    ]
+
+def test_pauses_match_loop_implementation(make_words):
+    """Test vectorised pauses equal a per-word scan"""
+    rng = np.random.default_rng(0)
+    words = make_words(['word'] * 500, gaps=rng.exponential(0.5, size=500).tolist())
+    table = metrics.WordTable.from_words(words)
+    result = metrics.analyze_pauses(table)
+    expected = loop_pauses(words)
+    assert [p['timestamp'] for p in result] == pytest.approx([p['timestamp'] for p in expected])
+    assert [p['duration'] for p in result] == pytest.approx([p['duration'] for p in expected])
+
+    stats = metrics.pause_statistics(table)
+    assert stats['count'] == len(expected)
+    assert stats['longest'] == pytest.approx(max(p['duration'] for p in expected))
+
+def test_filler_words_match_multi_word_phrases(make_words):
+    """Test 'you know' is found as a phrase and punctuation is ignored"""
+    words = make_words(['So,', 'you', 'know', 'I', 'um', 'like', 'you', 'Know.', 'you'])
+    words[2]['confidence'] = 0.5
+    fillers = metrics.count_filler_words(metrics.WordTable.from_words(words))
+    assert set(fillers) == set(metrics.FILLER_PHRASES)
+    assert len(fillers['so']) == 1
+    assert len(fillers['um']) == 1
+    assert len(fillers['like']) == 1
+    assert [f['timestamp'] for f in fillers['you know']] == [words[1]['start'], words[6]['start']]
+    assert fillers['you know'][0]['confidence'] == pytest.approx(0.7)
+    assert fillers['uh'] == []
+
+def test_empty_transcript():
+    """Test an empty word list yields empty metrics in the stored shapes"""
+    result = metrics.analyze_words([])
+    assert result['pause_duration'] == []
+    assert result['filler_words'] == {phrase: [] for phrase in metrics.FILLER_PHRASES}
+    assert result['clarity_score'] == 0
+    assert result['words_per_minute'] is None
+
+def test_analyze_words(make_words):
+    """Test clarity and pacing aggregates"""
+    words = make_words(['one', 'two', 'three', 'four'], confidence=0.8)
+    words[0]['confidence'] = 0.4
+    result = metrics.analyze_words(words, duration_seconds=30)
+    assert result['clarity_score'] == pytest.approx(0.7)
+    assert result['words_per_minute'] == pytest.approx(8.0)
@@ -0,0 +1,157 @@
+import pytest
+
+
+def run_pending():
+    """Claim and run jobs until none are runnable"""
+    from core.jobs import claim_jobs, run_job
+
+    while True:
+        jobs = [job for stage in ('transcription', 'embedding', 'feedback') for job in claim_jobs(stage, 'test', 10)]
+        if not jobs:
+            return
+        for job in jobs:
+            run_job(job)
+
+
+@pytest.fixture
+def stages(db, monkeypatch):
+    """Stand-in stage methods; each records the speech status it saw"""
+    from core.models import StageFailed, UserSpeech
+
+    calls = []
+    failures = {}
+
+    def stage(name, fields):
+        def run(self, **kwargs):
+            calls.append((name, self.status))
+            if name in failures:
+                raise StageFailed(failures[name])
+            if fields:
+                for field, value in fields.items():
+                    setattr(self, field, value)
+                self.save(update_fields=list(fields))
+        return run
+
+    monkeypatch.setattr(UserSpeech, 'transcribe_and_analyze', stage('transcription', {'transcript': 'hello there'}))
+    monkeypatch.setattr(UserSpeech, 'generate_audio_embedding', stage('embedding', None))
+    monkeypatch.setattr(UserSpeech, 'generate_ai_feedback', stage('feedback', {'ai_feedback': '{}'}))
+    return calls, failures
+
+
+def test_stages_run_to_completion(stages, stage_statuses, make_speech):
+    calls, _ = stages
+    speech = make_speech()
+    assert stage_statuses(speech) == {'transcription': 'pending', 'embedding': 'pending', 'feedback': 'blocked'}
+
+    run_pending()
+
+    speech.refresh_from_db()
+    assert stage_statuses(speech) == {'transcription': 'succeeded', 'embedding': 'succeeded', 'feedback': 'succeeded'}
+    assert speech.status == 'completed'
+    assert speech.transcript == 'hello there'
+    assert speech.ai_feedback == '{}'
+    # Feedback runs last, and sees the analysis as completed
+    assert calls[-1] == ('feedback', 'completed')
+
+
+def test_feedback_is_released_when_both_analysis_stages_succeed(stages, stage_statuses, make_speech):
+    from core.jobs import claim_jobs, run_job
+
+    speech = make_speech()
+    for job in claim_jobs('transcription', 'test', 10):
+        run_job(job)
+    speech.refresh_from_db()
+    assert stage_statuses(speech)['feedback'] == 'blocked'
+    assert speech.status == 'embedding'
+
+    for job in claim_jobs('embedding', 'test', 10):
+        run_job(job)
+    speech.refresh_from_db()
+    assert stage_statuses(speech)['feedback'] == 'pending'
+    assert speech.status == 'completed'
+
+
+def test_failed_analysis_stage_fails_the_speech(stages, stage_statuses, make_speech):
+    _, failures = stages
+    failures['transcription'] = 'No transcript generated'
+    speech = make_speech()
+
+    run_pending()
+
+    speech.refresh_from_db()
+    assert stage_statuses(speech) == {'transcription': 'failed', 'embedding': 'succeeded', 'feedback': 'blocked'}
+    assert speech.status == 'failed'
+    assert speech.error_message == 'No transcript generated'
+
+
+def test_failed_feedback_is_reported_on_its_stage(stages, stage_statuses, make_speech):
+    from core.pipeline import stage_timings
+
+    _, failures = stages
+    failures['feedback'] = 'Bad feedback prompt'
+    speech = make_speech()
+
+    run_pending()
+
+    speech.refresh_from_db()
+    assert stage_statuses(speech)['feedback'] == 'failed'
+    assert speech.status == 'completed'
+    assert speech.error_message is None
+    errors = {timing['stage']: timing['error'] for timing in stage_timings(speech)}
+    assert errors == {'transcription': None, 'embedding': None, 'feedback': 'Bad feedback prompt'}
+
+
+def test_restart_failed_reruns_only_failed_stages(stages, stage_statuses, make_speech):
+    from core.pipeline import restart_failed
+
+    calls, failures = stages
+    failures['transcription'] = 'No transcript generated'
+    speech = make_speech()
+    run_pending()
+
+    del failures['transcription']
+    calls.clear()
+    assert restart_failed(speech) == 1
+    speech.refresh_from_db()
+    assert stage_statuses(speech) == {'transcription': 'pending', 'embedding': 'succeeded', 'feedback': 'blocked'}
+    assert speech.status == 'transcribing'
+    assert speech.error_message is None
+
+    run_pending()
+    speech.refresh_from_db()
+    assert [name for name, _ in calls] == ['transcription', 'feedback']
+    assert speech.status == 'completed'
+    assert restart_failed(speech) == 0
+
+
+def test_restart_failed_reruns_failed_feedback(stages, stage_statuses, make_speech):
+    from core.pipeline import restart_failed
+
+    calls, failures = stages
+    failures['feedback'] = 'Bad feedback prompt'
+    speech = make_speech()
+    run_pending()
+
+    del failures['feedback']
+    assert restart_failed(speech) == 1
+    assert stage_statuses(speech)['feedback'] == 'pending'
+
+    run_pending()
+    speech.refresh_from_db()
+    assert stage_statuses(speech)['feedback'] == 'succeeded'
+    assert speech.ai_feedback == '{}'
+
+
+def test_analysis_summary_of_a_completed_speech(db):
+    from core.models import UserSpeech
+
+    speech = UserSpeech(
+        title='Talk', status='completed', words_per_minute=130, clarity_score=0.8,
+        pause_duration=[{'duration': 2.5}], filler_words={'um': [1.0] * 5, 'like': [2.0]}
+    )
+    summary = speech.get_analysis_summary()
+    assert summary['filler_words']['total_count'] == 6
+    assert summary['filler_words']['suggestions'] == [
+        "You often say 'um'. Practice noticing it and pausing instead"
+    ]
+    assert UserSpeech(status='transcribing').get_analysis_summary() == {'status': 'transcribing'}
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core import realtime_relay
+from core.realtime_relay import RealtimeRelay
+
+class FakeRealtimeAPI:
+    """Echoes each event back and records what it received"""
+
+    def __init__(self, accept_delay=0.0, greeting=(), close_after=None):
+        self.accept_delay = accept_delay
+        self.greeting = list(greeting)
+        self.close_after = close_after
+        self.received = []
+        self.closed = asyncio.Event()
+        self.app = web.Application()
+        self.app.router.add_get('/realtime', self.handle)
+
+    async def handle(self, request):
+        await asyncio.sleep(self.accept_delay)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for event in self.greeting:
+            await ws.send_str(json.dumps(event))
+        async for msg in ws:
+            event = json.loads(msg.data)
+            self.received.append(event)
+            await ws.send_str(json.dumps({'type': 'echo', 'content': event.get('content', '')}))
+            if self.close_after and len(self.received) == self.close_after:
+                break
+        await ws.close()
+        self.closed.set()
+        return ws
+
+class Client:
+    """What the consumer would send to the browser"""
+
+    def __init__(self):
+        self.frames = []
+        self.closed = asyncio.Event()
+        self.error = None
+
+    async def on_message(self, data):
+        self.frames.append(json.loads(data))
+
+    async def on_close(self, error):
+        self.error = error
+        self.closed.set()
+
+async def _with_server(api, fn):
+    server = TestServer(api.app)
+    await server.start_server()
+    try:
+        return await fn(str(server.make_url('/realtime')))
+    finally:
+        await server.close()
+        await realtime_relay.shared_session().close()
+
+def test_start_returns_before_upstream_connects_and_keeps_order():
+    """Test events sent while connecting are queued and delivered in order"""
+    api = FakeRealtimeAPI(accept_delay=0.2, close_after=3)
+    client = Client()
+
+    async def scenario(url):
+        relay = RealtimeRelay(url, {}, client.on_message, client.on_close)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        relay.start()
+        for content in ['setup', 'one', 'two']:
+            await relay.send({'type': 'message', 'content': content})
+        queued_in = loop.time() - started
+        await asyncio.wait_for(client.closed.wait(), 5)
+        return queued_in, relay.stats()
+
+    queued_in, stats = asyncio.run(_with_server(api, scenario))
+    assert queued_in < 0.1
+    assert [event['content'] for event in api.received] == ['setup', 'one', 'two']
+    assert [frame['content'] for frame in client.frames] == ['setup', 'one', 'two']
+    assert client.error is None
+    assert stats['frames_up'] == 3 and stats['frames_down'] == 3
+    assert stats['connect_ms'] >= 200
+
+def test_relays_share_one_session_and_close_cleanly():
+    """Test concurrent relays reuse the loop's session and closing one closes its upstream"""
+    api = FakeRealtimeAPI(greeting=[{'type': 'session.created'}])
+
+    async def scenario(url):
+        clients = [Client() for _ in range(5)]
+        relays = [RealtimeRelay(url, {}, client.on_message, client.on_close) for client in clients]
+        for relay in relays:
+            relay.start()
+        while not all(client.frames for client in clients):
+            await asyncio.sleep(0.01)
+        sessions = {id(realtime_relay.shared_session())}
+        await asyncio.gather(*(relay.close() for relay in relays))
+        await asyncio.wait_for(api.closed.wait(), 5)
+        return clients, relays, sessions
+
+    clients, relays, sessions = asyncio.run(_with_server(api, scenario))
+    assert len(sessions) == 1
+    assert all(relay.task.done() and relay.ws.closed for relay in relays)
+    # Closing from our side is not reported as an upstream close
+    assert not any(client.closed.is_set() for client in clients)
+
+def test_slow_client_bounds_buffered_frames():
+    """Test a client that stops reading holds at most the queue size in memory"""
+    api = FakeRealtimeAPI(greeting=[{'type': 'conversation.item.created', 'index': i} for i in range(100)])
+
+    async def scenario(url):
+        gate = asyncio.Event()
+
+        async def stalled(data):
+            await gate.wait()
+
+        relay = RealtimeRelay(url, {}, stalled, Client().on_close, queue_size=8)
+        relay.start()
+        await asyncio.sleep(0.3)
+        queued = relay.stats()['queued_down']
+        await relay.close()
+        return queued
+
+    assert asyncio.run(_with_server(api, scenario)) == 8
+
+def _delta(text, item='item1'):
+    return {'type': 'response.text.delta', 'response_id': 'resp1', 'item_id': item, 'content_index': 0, 'delta': text}
+
+def _relay_greeting(greeting, **options):
+    """Frames the client receives for a burst of upstream events"""
+    api = FakeRealtimeAPI(greeting=greeting)
+    client = Client()
+
+    async def scenario(url):
+        relay = RealtimeRelay(url, {}, client.on_message, client.on_close, **options)
+        relay.start()
+        while sum(len(frame.get('delta', 'x')) for frame in client.frames) < sum(
+            len(event.get('delta', 'x')) for event in greeting
+        ):
+            await asyncio.sleep(0.01)
+        await relay.close()
+        return relay.stats()
+
+    return client.frames, asyncio.run(_with_server(api, scenario))
+
+def test_text_deltas_are_coalesced_in_order():
+    """Test a burst of deltas becomes few frames with the same text and other events in place"""
+    words = [f"word{i} " for i in range(40)]
+    greeting = [_delta(word) for word in words[:20]] + [{'type': 'response.output_item.added'}]
+    greeting += [_delta(word, item='item2') for word in words[20:]]
+    frames, stats = _relay_greeting(greeting, coalesce_ms=50)
+
+    assert len(frames) < len(greeting) / 4
+    marker = [frame['type'] for frame in frames].index('response.output_item.added')
+    assert ''.join(frame['delta'] for frame in frames[:marker]) == ''.join(words[:20])
+    assert ''.join(frame['delta'] for frame in frames[marker + 1:]) == ''.join(words[20:])
+    assert {frame.get('item_id') for frame in frames[marker + 1:]} == {'item2'}
+    assert stats['frames_down'] == len(frames)
+    assert stats['deltas_coalesced'] == len(greeting) - len(frames)
+
+def test_coalescing_respects_size_limit_and_can_be_disabled():
+    """Test batches stop at the character limit and a zero limit forwards every delta"""
+    greeting = [_delta('abcd') for _ in range(30)]
+    frames, _ = _relay_greeting(greeting, coalesce_ms=50, coalesce_chars=10)
+    assert all(len(frame['delta']) <= 12 for frame in frames)
+    assert ''.join(frame['delta'] for frame in frames) == 'abcd' * 30
+
+    frames, stats = _relay_greeting(greeting, coalesce_chars=0)
+    assert len(frames) == 30
+    assert stats['deltas_coalesced'] == 0
+
+def test_connection_failure_is_reported():
+    """Test an unreachable upstream calls on_close with the error"""
+    client = Client()
+
+    async def scenario():
+        relay = RealtimeRelay('ws://127.0.0.1:9/realtime', {}, client.on_message, client.on_close)
+        relay.start()
+        await asyncio.wait_for(client.closed.wait(), 5)
+        await realtime_relay.shared_session().close()
+
+    asyncio.run(scenario())
+    assert client.error is not None
+    assert client.frames == []
@@ -0,0 +1,78 @@
+import threading
+import time
+import numpy as np
+import pytest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+sf = pytest.importorskip('soundfile')
+
+from core.segmentation import frame_energy, silence_split_points, stitch, transcribe_segmented
+from core.transcription import TranscriptionBackend, TranscriptionResult
+
+SAMPLE_RATE = 16000
+
+@pytest.fixture
+def recording(tmp_path):
+    """Thirty seconds of noise with silences at 9.5-10.5s and 19.2-19.8s"""
+    rng = np.random.default_rng(0)
+    samples = rng.standard_normal(30 * SAMPLE_RATE).astype(np.float32) * 0.1
+    for start, end in ((9.5, 10.5), (19.2, 19.8)):
+        samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0
+    path = str(tmp_path / 'talk.wav')
+    sf.write(path, samples, SAMPLE_RATE)
+    return path
+
+class SegmentBackend(TranscriptionBackend):
+    """One word per segment at 0.5s, tracking how many calls overlap"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def transcribe(self, file_path):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        duration = sf.info(file_path).duration
+        return TranscriptionResult('word', [{'text': 'word', 'start': 0.5, 'end': 0.9, 'confidence': 0.9}], duration)
+
+def test_split_points_land_in_silence(recording):
+    """Test cuts move from their targets into the nearby silences"""
+    splits = silence_split_points(frame_energy(recording), segment_seconds=8, search_seconds=3)
+    assert len(splits) == 2
+    assert 9.5 < splits[0] < 10.5
+    assert 19.2 < splits[1] < 19.8
+
+def test_short_recordings_are_not_split(recording):
+    """Test nothing is cut when the recording fits in one segment"""
+    assert silence_split_points(frame_energy(recording), segment_seconds=60, search_seconds=5) == []
+
+def test_stitch_offsets_word_timings():
+    """Test segment word timings are shifted onto the original timeline"""
+    first = TranscriptionResult('hello', [{'text': 'hello', 'start': 1.0, 'end': 1.4, 'confidence': 0.9}], 10)
+    second = TranscriptionResult('', [], 5)
+    third = TranscriptionResult('world', [{'text': 'world', 'start': 0.2, 'end': 0.6, 'confidence': 0.8}], 5)
+    result = stitch([(0.0, first), (10.0, second), (15.0, third)], 20.0)
+    assert result.text == 'hello world'
+    assert [(word['start'], word['end']) for word in result.words] == [(1.0, 1.4), (15.2, 15.6)]
+    assert result.words[1]['confidence'] == 0.8
+    assert result.audio_duration == 20.0
+
+def test_transcribe_segmented_bounds_concurrency(recording):
+    """Test segments run concurrently up to the limit and stitch in order"""
+    backend = SegmentBackend()
+    result = transcribe_segmented(backend, recording, segment_seconds=4, concurrency=2, search_seconds=1)
+    assert backend.max_active == 2
+    starts = [word['start'] for word in result.words]
+    assert len(starts) >= 6
+    assert starts == sorted(starts)
+    assert starts[0] == 0.5
+    assert result.audio_duration == pytest.approx(30.0)
@@ -0,0 +1,199 @@
+import json
+import threading
+import pytest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core import transcription
+from core.async_utils import run_in_background
+from core.transcription import WEBHOOK_AUTH_HEADER, AssemblyAIBackend, LocalBackend, TranscriptionBackend
+
+@pytest.fixture
+def recording(tmp_path):
+    """Ten seconds of 16kHz 16-bit mono PCM"""
+    path = tmp_path / 'talk.pcm'
+    path.write_bytes(os.urandom(320000))
+    return str(path)
+
+def test_local_backend_is_deterministic(recording):
+    """Test the same audio always produces the same transcript"""
+    first = LocalBackend().transcribe(recording)
+    second = LocalBackend().transcribe(recording)
+    assert first.text == second.text
+    assert first.words == second.words
+    assert first.audio_duration == pytest.approx(10.0)
+
+def test_local_backend_word_timings_fit_audio(recording):
+    """Test generated words are ordered, in seconds, and inside the recording"""
+    words = LocalBackend().transcribe(recording).words
+    assert len(words) > 10
+    for word in words:
+        assert 0 <= word['start'] < word['end'] <= 10.0
+        assert 0 < word['confidence'] <= 1
+    assert all(a['end'] <= b['start'] for a, b in zip(words, words[1:]))
+
+def test_local_backend_prefers_fixture(recording, tmp_path):
+    """Test a fixture named after the file supplies the transcript"""
+    fixtures = tmp_path / 'fixtures'
+    fixtures.mkdir()
+    words = [
+        {'text': 'um', 'start': 0.0, 'end': 0.3, 'confidence': 0.9},
+        {'text': 'hello', 'start': 2.0, 'end': 2.4, 'confidence': 0.8},
+    ]
+    (fixtures / 'talk.json').write_text(json.dumps({'words': words, 'audio_duration': 3.0}))
+    result = LocalBackend(fixture_dir=str(fixtures)).transcribe(recording)
+    assert result.text == 'um hello'
+    assert result.words == words
+    assert result.audio_duration == 3.0
+
+def test_local_realtime_emits_partial_then_final():
+    """Test streamed audio yields a partial and a final result per second, then closes cleanly"""
+    results, opened = [], []
+    lock = threading.Lock()
+
+    def on_result(result):
+        with lock:
+            results.append(result)
+
+    transcriber = LocalBackend().realtime(
+        sample_rate=16000,
+        on_result=on_result,
+        on_error=lambda error: pytest.fail(str(error)),
+        on_open=opened.append
+    )
+    transcriber.connect()
+    for _ in range(25):
+        transcriber.stream(b'\0' * 3200)  # 100ms frames
+    transcriber.close()
+
+    assert len(opened) == 1
+    finals = [result for result in results if result.is_final]
+    assert [result.is_final for result in results[:2]] == [False, True]
+    assert [result.timestamp for result in finals] == [0.0, 1.0, 2.0]
+    assert all(word['end'] <= 2.5 for result in finals for word in result.words)
+
+def test_local_realtime_reports_chunks_awaiting_transcription():
+    """Test pending() counts streamed chunks until their segment is transcribed"""
+    transcriber = LocalBackend(latency_seconds=0.2).realtime(
+        sample_rate=16000,
+        on_result=lambda result: None,
+        on_error=lambda error: pytest.fail(str(error)),
+        on_open=lambda session_id: None
+    )
+    transcriber.connect()
+    for _ in range(25):
+        transcriber.stream(b'\0' * 3200)  # 100ms frames
+    # Two full seconds are queued; the last half second isn't a segment yet
+    assert transcriber.pending() == 20
+    transcriber.close()
+    assert transcriber.pending() == 0
+
+def test_assemblyai_realtime_reports_its_send_queue(settings_override):
+    """Test pending() is the depth of the SDK's queue of unsent audio"""
+    settings_override(ASSEMBLYAI_API_KEY='test')
+    transcriber = AssemblyAIBackend().realtime(
+        sample_rate=16000,
+        on_result=lambda result: None,
+        on_error=lambda error: None,
+        on_open=lambda session_id: None
+    )
+    assert transcriber.pending() == 0
+    transcriber.stream(b'\0' * 3200)
+    transcriber.stream(b'\0' * 3200)
+    assert transcriber.pending() == 2
+
+def test_local_submit_posts_webhook_and_fetch_returns_result(recording):
+    """Test a submitted job is announced to the webhook with the secret, then fetched"""
+    calls = []
+    delivered = threading.Event()
+
+    async def webhook(request):
+        calls.append((request.headers.get(WEBHOOK_AUTH_HEADER), await request.json()))
+        if len(calls) == 1:
+            # Not ready yet; the stand-in retries like the real service
+            return web.json_response({'status': 'unknown'}, status=404)
+        delivered.set()
+        return web.json_response({'status': 'resumed'})
+
+    app = web.Application()
+    app.router.add_post('/webhook/', webhook)
+    server = TestServer(app)
+    run_in_background(server.start_server())
+    try:
+        backend = LocalBackend(latency_seconds=0.05)
+        backend.webhook_retry_seconds = 0.05
+        external_id = backend.submit(recording, str(server.make_url('/webhook/')), 'secret')
+        assert delivered.wait(5)
+    finally:
+        run_in_background(server.close())
+
+    assert [call[0] for call in calls] == ['secret', 'secret']
+    assert calls[-1][1] == {'transcript_id': external_id, 'status': 'completed'}
+    assert backend.fetch(external_id, recording).words == backend.transcribe(recording).words
+
+def test_backend_must_implement_transcribe_or_transcribe_async():
+    """Test a backend overriding neither transcribe method is rejected when defined"""
+    with pytest.raises(TypeError, match='must override transcribe or transcribe_async'):
+        class NoTranscribe(TranscriptionBackend):
+            pass
+
+    class SyncOnly(TranscriptionBackend):
+        def transcribe(self, file_path):
+            return file_path
+
+    assert run_in_background(SyncOnly().transcribe_async('talk.wav')) == 'talk.wav'
+
+def test_backend_must_implement_submit_and_fetch_together():
+    """Test a backend with only half of the webhook flow is rejected when defined"""
+    with pytest.raises(TypeError, match='must override both submit and fetch'):
+        class SubmitOnly(TranscriptionBackend):
+            def transcribe(self, file_path):
+                return file_path
+
+            def submit(self, file_path, webhook_url, webhook_secret=''):
+                return 'job-1'
+
+    class SyncOnly(TranscriptionBackend):
+        def transcribe(self, file_path):
+            return file_path
+
+    assert (SyncOnly.supports_webhooks, SyncOnly.supports_realtime) == (False, False)
+    for backend in (LocalBackend, AssemblyAIBackend):
+        assert (backend.supports_webhooks, backend.supports_realtime) == (True, True)
+
+def test_configured_backend_must_support_what_settings_ask_for(settings_override, monkeypatch):
+    """Test a backend lacking webhooks or live audio is refused at startup, not mid-request"""
+    from django.core.exceptions import ImproperlyConfigured
+
+    class LiveOnly(TranscriptionBackend):
+        def __init__(self, **kwargs):
+            pass
+
+        def transcribe(self, file_path):
+            return file_path
+
+        def realtime(self, *, sample_rate, on_result, on_error, on_open):
+            return None
+
+    class BatchOnly(LiveOnly):
+        realtime = TranscriptionBackend.realtime
+
+    settings_override(TRANSCRIPTION_BACKEND='local', TRANSCRIPTION_WEBHOOK_URL='https://example.com/webhook/')
+    monkeypatch.setattr(transcription, '_backend', None)
+    monkeypatch.setattr(transcription, 'LocalBackend', LiveOnly)
+    with pytest.raises(ImproperlyConfigured, match='TRANSCRIPTION_WEBHOOK_URL'):
+        transcription.get_transcription_backend()
+
+    settings_override(TRANSCRIPTION_WEBHOOK_URL=None)
+    assert isinstance(transcription.get_transcription_backend(), LiveOnly)
+
+    monkeypatch.setattr(transcription, '_backend', None)
+    monkeypatch.setattr(transcription, 'LocalBackend', BatchOnly)
+    with pytest.raises(ImproperlyConfigured, match='live audio'):
+        transcription.get_transcription_backend()
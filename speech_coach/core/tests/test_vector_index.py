@@ -0,0 +1,171 @@
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.vector_index import VectorIndex, IVFIndex
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(200, 32)).astype(np.float32)
+
+@pytest.fixture
+def index(vectors):
+    index = VectorIndex()
+    index.build((i + 1, vector) for i, vector in enumerate(vectors))
+    return index
+
+def brute_force(vectors, query, k):
+    scores = [
+        float(np.dot(v, query) / (np.linalg.norm(v) * np.linalg.norm(query)))
+        for v in vectors
+    ]
+    order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
+    return [(i + 1, scores[i]) for i in order]
+
+def test_search_matches_brute_force(index, vectors):
+    """Test top-k ids and scores match a full cosine scan"""
+    query = vectors[17] + 0.1
+    results = index.search(query, k=5)
+    expected = brute_force(vectors, query, 5)
+    assert [r[0] for r in results] == [e[0] for e in expected]
+    assert np.allclose([r[1] for r in results], [e[1] for e in expected], atol=1e-5)
+
+def test_search_returns_all_when_k_exceeds_size():
+    """Test k larger than the index returns everything, sorted"""
+    index = VectorIndex()
+    index.build([(1, [1, 0]), (2, [0, 1]), (3, [1, 1])])
+    results = index.search([1, 0], k=10)
+    assert [r[0] for r in results] == [1, 3, 2]
+
+def test_add_and_remove(index, vectors):
+    """Test incremental updates are reflected in searches"""
+    query = np.ones(32, dtype=np.float32)
+    index.add(999, query * 3)
+    assert index.search(query, k=1)[0][0] == 999
+    assert len(index) == 201
+
+    index.remove(999)
+    assert 999 not in index
+    assert len(index) == 200
+    assert index.search(query, k=1)[0][0] != 999
+
+    # Removing from the middle keeps the remaining ids searchable
+    index.remove(1)
+    assert index.search(vectors[199], k=1)[0][0] == 200
+
+def test_add_grows_empty_index():
+    """Test adding to an empty index sets the dimension"""
+    index = VectorIndex()
+    for i in range(40):
+        index.add(i, [float(i), 1.0, 0.0])
+    assert len(index) == 40
+    assert index.dimension == 3
+    with pytest.raises(ValueError):
+        index.add(100, [1.0, 2.0])
+
+def test_zero_vectors_score_zero():
+    """Test zero vectors don't produce NaN scores"""
+    index = VectorIndex()
+    index.build([(1, [0, 0, 0]), (2, [1, 0, 0])])
+    results = index.search([1, 0, 0], k=2)
+    assert results[0] == (2, pytest.approx(1.0))
+    assert results[1] == (1, 0.0)
+
+def clustered_vectors(n=3000, dim=32, clusters=20, seed=1):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=n)
+    return (centers[labels] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+def test_ivf_recall_against_exact():
+    """Test IVF top-k mostly agrees with exact search and matches it with every list probed"""
+    data = clustered_vectors()
+    exact = VectorIndex()
+    exact.build(enumerate(data))
+    ivf = IVFIndex(n_lists=20, nprobe=4, min_train_size=100)
+    ivf.build(enumerate(data))
+    ivf.train()
+    assert ivf.is_trained
+
+    queries = data[:50] + 0.05
+    hits = 0
+    for query in queries:
+        expected = {i for i, _ in exact.search(query, k=10)}
+        hits += len(expected & {i for i, _ in ivf.search(query, k=10)})
+    assert hits / (10 * len(queries)) > 0.9
+
+    ivf.nprobe = 20
+    for query in queries[:10]:
+        assert ivf.search(query, k=10) == exact.search(query, k=10)
+
+def test_ivf_small_index_is_exact():
+    """Test IVF falls back to exact search below the training size"""
+    ivf = IVFIndex(min_train_size=1000)
+    ivf.build([(1, [1, 0]), (2, [0, 1])])
+    ivf.train()
+    assert not ivf.is_trained
+    assert ivf.search([1, 0], k=1)[0][0] == 1
+
+def test_ivf_with_more_lists_than_rows_trains():
+    """Test a list count above the row count is clamped rather than failing to train"""
+    vectors = np.random.default_rng(2).normal(size=(12, 8)).astype(np.float32)
+    ivf = IVFIndex(n_lists=50, nprobe=50, min_train_size=10)
+    ivf.build((i + 1, vector) for i, vector in enumerate(vectors))
+    ivf.train()
+    assert ivf.is_trained
+    assert len(ivf.centroids) == 12
+    assert ivf.search(vectors[3], k=1)[0][0] == 4
+
+def test_filters_applied_before_top_k():
+    """Test filtered search returns only matching rows even when they rank low"""
+    index = VectorIndex()
+    index.build([
+        (1, [1, 0], {'category': 'keynote', 'occasion': 'conference'}),
+        (2, [0.9, 0.1], {'category': 'keynote', 'occasion': 'wedding'}),
+        (3, [0, 1], {'category': 'toast', 'occasion': 'wedding'}),
+    ])
+    assert [i for i, _ in index.search([1, 0], k=1, filters={'category': 'toast'})] == [3]
+    assert [i for i, _ in index.search([1, 0], k=5, filters={'occasion': 'wedding'})] == [2, 3]
+    assert index.search([1, 0], k=5, filters={'category': 'unknown'}) == []
+    assert len(index.search([1, 0], k=5, filters={'category': None})) == 3
+
+def test_ivf_filters_probe_more_lists():
+    """Test a selective filter still finds k results with a small nprobe"""
+    data = clustered_vectors()
+    items = [(i, v, {'category': 'rare' if i % 500 == 0 else 'common'}) for i, v in enumerate(data)]
+    ivf = IVFIndex(n_lists=20, nprobe=1, min_train_size=100)
+    ivf.build(items)
+    ivf.train()
+    results = ivf.search(data[1], k=5, filters={'category': 'rare'})
+    assert sorted(i for i, _ in results) == [0, 500, 1000, 1500, 2000]
+
+def test_ivf_add_remove_after_training():
+    """Test incremental updates on a trained IVF index"""
+    data = clustered_vectors(n=500)
+    ivf = IVFIndex(n_lists=10, nprobe=10, min_train_size=100)
+    ivf.build(enumerate(data))
+    ivf.train()
+    ivf.add(10000, data[3] * 2)
+    assert ivf.search(data[3], k=2)[1][0] in (3, 10000)
+    ivf.remove(3)
+    assert ivf.search(data[3], k=1)[0][0] == 10000
+
+def test_save_and_load(tmp_path):
+    """Test an index round-trips through its saved file"""
+    data = clustered_vectors(n=500)
+    ivf = IVFIndex(n_lists=10, nprobe=3, min_train_size=100)
+    ivf.build((i, v, {'category': 'c%d' % (i % 3)}) for i, v in enumerate(data))
+    ivf.train()
+    path = str(tmp_path / 'index.npz')
+    ivf.save(path, metadata={'stamp': [500, 'x']})
+
+    loaded = IVFIndex(nprobe=3)
+    assert loaded.load(path) == {'stamp': [500, 'x']}
+    assert loaded.is_trained
+    for query in data[:5]:
+        assert loaded.search(query, k=5, filters={'category': 'c1'}) == ivf.search(query, k=5, filters={'category': 'c1'})
@@ -0,0 +1,55 @@
+import pytest
+
+
+@pytest.fixture
+def parked_job(db):
+    from django.contrib.auth.models import User
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from core.models import ProcessingJob, UserSpeech
+
+    user = User.objects.create(username='speaker')
+    speech = UserSpeech.objects.create(user=user, title='Talk', audio_file=SimpleUploadedFile('talk.wav', b'RIFF'))
+    job = ProcessingJob.objects.get(speech_id=speech.pk, stage='transcription')
+    job.status = 'waiting'
+    job.external_id = 'external-1'
+    job.save()
+    return job
+
+
+def post_webhook(secret_header=None, transcript_id='external-1'):
+    from rest_framework.test import APIRequestFactory
+    from core.transcription import WEBHOOK_AUTH_HEADER
+    from core.views import transcription_webhook
+
+    headers = {WEBHOOK_AUTH_HEADER: secret_header} if secret_header is not None else {}
+    request = APIRequestFactory().post(
+        '/api/transcription/webhook/', {'transcript_id': transcript_id, 'status': 'completed'},
+        format='json', headers=headers
+    )
+    return transcription_webhook(request)
+
+
+def test_webhook_with_the_secret_resumes_the_job(parked_job, settings_override):
+    settings_override(TRANSCRIPTION_WEBHOOK_SECRET='s3cret')
+
+    assert post_webhook('s3cret').status_code == 200
+    parked_job.refresh_from_db()
+    assert parked_job.status == 'pending'
+    # Already resumed; the sender stops retrying on its own
+    assert post_webhook('s3cret').status_code == 404
+
+
+@pytest.mark.parametrize('configured, sent', [
+    ('s3cret', None),
+    ('s3cret', 'wrong'),
+    ('s3cret', 'sécret'),
+    # No configured secret authenticates nothing, not everything
+    ('', None),
+    ('', ''),
+])
+def test_webhook_without_the_secret_is_refused(parked_job, settings_override, configured, sent):
+    settings_override(TRANSCRIPTION_WEBHOOK_SECRET=configured)
+
+    assert post_webhook(sent).status_code == 403
+    parked_job.refresh_from_db()
+    assert parked_job.status == 'waiting'
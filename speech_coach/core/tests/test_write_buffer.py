@@ -0,0 +1,68 @@
+import contextlib
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core import write_buffer
+from core.write_buffer import WriteBehindBuffer, write_stats
+
+class FakeManager:
+    def __init__(self):
+        self.batches = []
+
+    def bulk_create(self, objs):
+        self.batches.append(list(objs))
+
+class Segment:
+    objects = FakeManager()
+
+class Speech:
+    def __init__(self):
+        self.saves = []
+
+    def save(self, update_fields):
+        self.saves.append(update_fields)
+
+@pytest.fixture(autouse=True)
+def no_transaction():
+    with patch.object(write_buffer.transaction, 'atomic', contextlib.nullcontext):
+        Segment.objects = FakeManager()
+        yield
+
+def test_flush_coalesces_writes():
+    """Test buffered rows and field updates become one insert and one update"""
+    speech = Speech()
+    prepared = []
+    buffer = WriteBehindBuffer(speech, flush_seconds=3600, before_flush=lambda: prepared.append(True))
+    before = write_stats()
+    for _ in range(10):
+        buffer.add(Segment())
+        buffer.touch('transcript')
+        buffer.touch('words_per_minute', 'clarity_score')
+    assert not buffer.flush_if_due()
+    assert speech.saves == [] and Segment.objects.batches == []
+
+    buffer.flush()
+    assert prepared == [True]
+    assert [len(batch) for batch in Segment.objects.batches] == [10]
+    assert speech.saves == [['clarity_score', 'transcript', 'words_per_minute']]
+
+    after = write_stats()
+    assert after['requested_writes'] - before['requested_writes'] == 30
+    assert after['db_writes'] - before['db_writes'] == 2
+    assert after['writes_saved'] - before['writes_saved'] == 28
+
+def test_flush_if_due_and_empty_flush():
+    """Test an elapsed interval triggers a flush and an empty buffer writes nothing"""
+    speech = Speech()
+    buffer = WriteBehindBuffer(speech, flush_seconds=0)
+    buffer.flush()
+    assert speech.saves == []
+
+    buffer.touch('transcript')
+    assert buffer.flush_if_due()
+    assert speech.saves == [['transcript']]
@@ -0,0 +1,483 @@
+"""Pluggable speech-to-text backends.
+
+Every backend returns the same normalised result: the transcript text,
+words as ``{'text', 'start', 'end', 'confidence'}`` dicts with times in
+seconds, and the audio duration in seconds. ``transcribe_async`` is the
+primary entry point; ``transcribe`` runs it on the process's background
+loop for synchronous callers. ``submit`` starts a job whose completion is
+posted to a webhook, and ``fetch`` collects its result later, so no caller
+has to wait on the service. Live sessions get a
+transcriber with ``connect``/``stream``/``close`` that reports
+``LiveResult`` objects through callbacks on a background thread, and whose
+``pending`` says how many streamed chunks it hasn't sent on yet.
+
+``TRANSCRIPTION_BACKEND`` selects the backend:
+
+``assemblyai``
+    AssemblyAI batch and real-time APIs (the default). Batch jobs go
+    through the pooled async client in ``core.assemblyai_client``.
+``local``
+    A deterministic offline stand-in for load tests, benchmarks and CI. It
+    reads word timings from a JSON fixture named after the file's SHA-256
+    or basename, or else generates them from the audio's duration. It
+    waits a configurable latency, plus a factor of the audio length, to
+    mimic service turnaround. Submitted jobs are announced to the webhook
+    the same way the real service would.
+"""
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .async_utils import background_loop, run_in_background
+
+FILLER_BOOST = ['um', 'uh', 'like', 'you know', 'so']
+# Header the service echoes back on webhook calls, carrying the shared secret
+WEBHOOK_AUTH_HEADER = 'X-Webhook-Secret'
+
+
+class TranscriptionResult:
+    """A finished transcript with word timings in seconds"""
+
+    def __init__(self, text: str, words: List[Dict], audio_duration: Optional[float]):
+        self.text = text
+        self.words = words
+        self.audio_duration = audio_duration
+
+
+class LiveResult:
+    """One real-time result, final or partial, with word timings in seconds"""
+
+    def __init__(self, text: str, is_final: bool, timestamp: float, confidence: float, words: List[Dict]):
+        self.text = text
+        self.is_final = is_final
+        self.timestamp = timestamp
+        self.confidence = confidence
+        self.words = words
+
+
+class TranscriptionBackend:
+    """Base for backends; ``submit``/``fetch`` and ``realtime`` are optional
+
+    ``supports_webhooks`` and ``supports_realtime`` record which of them a
+    subclass provides, and ``get_transcription_backend`` refuses a backend
+    that lacks what the settings ask for.
+    """
+    name = 'base'
+    supports_webhooks = False
+    supports_realtime = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Each default calls the other, so a backend must provide at least one
+        if (cls.transcribe is TranscriptionBackend.transcribe
+                and cls.transcribe_async is TranscriptionBackend.transcribe_async):
+            raise TypeError(f"{cls.__name__} must override transcribe or transcribe_async")
+        submits = cls.submit is not TranscriptionBackend.submit
+        if submits != (cls.fetch is not TranscriptionBackend.fetch):
+            raise TypeError(f"{cls.__name__} must override both submit and fetch, or neither")
+        cls.supports_webhooks = submits
+        cls.supports_realtime = cls.realtime is not TranscriptionBackend.realtime
+
+    def transcribe(self, file_path: str) -> TranscriptionResult:
+        return run_in_background(self.transcribe_async(file_path))
+
+    async def transcribe_async(self, file_path: str) -> TranscriptionResult:
+        # Backends without native async I/O get a thread per call
+        return await asyncio.to_thread(self.transcribe, file_path)
+
+    def submit(self, file_path: str, webhook_url: str, webhook_secret: str = '') -> str:
+        """Start transcribing without waiting; returns the service's job id"""
+        raise NotImplementedError(f"The {self.name} backend can't submit webhook jobs")
+
+    def fetch(self, external_id: str, file_path: str) -> Optional[TranscriptionResult]:
+        """The result of a submitted job, or None while it is still running"""
+        raise NotImplementedError(f"The {self.name} backend can't submit webhook jobs")
+
+    def realtime(
+        self,
+        *,
+        sample_rate: int,
+        on_result: Callable[[LiveResult], None],
+        on_error: Callable[[Exception], None],
+        on_open: Callable[[str], None]
+    ):
+        """A live transcriber with connect(), stream(bytes), pending() and close()"""
+        raise NotImplementedError(f"The {self.name} backend can't transcribe live audio")
+
+
+class AssemblyAIBackend(TranscriptionBackend):
+    name = 'assemblyai'
+    config = {'word_boost': FILLER_BOOST, 'speech_threshold': 0.2, 'disfluencies': True}
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self._client = None
+
+    def _configure(self):
+        # The real-time SDK still reads its key from module settings
+        import assemblyai as aai
+        aai.settings.api_key = self.api_key or settings.ASSEMBLYAI_API_KEY
+
+    def client(self):
+        if self._client is None:
+            from .assemblyai_client import AssemblyAIClient
+            self._client = AssemblyAIClient(
+                api_key=self.api_key or settings.ASSEMBLYAI_API_KEY,
+                max_in_flight=getattr(settings, 'ASSEMBLYAI_MAX_IN_FLIGHT', 100),
+                max_connections=getattr(settings, 'ASSEMBLYAI_HTTP_CONNECTIONS', 16),
+                poll_seconds=getattr(settings, 'ASSEMBLYAI_POLL_SECONDS', 3.0)
+            )
+            atexit.register(self.close)
+        return self._client
+
+    def close(self):
+        """Close the pooled HTTP session"""
+        if self._client is not None:
+            run_in_background(self._client.close())
+
+    async def transcribe_async(self, file_path: str) -> TranscriptionResult:
+        transcript = await self.client().transcribe(file_path, **self.config)
+        return parse_transcript(transcript)
+
+    def submit(self, file_path, webhook_url, webhook_secret=''):
+        async def submit():
+            client = self.client()
+            auth = {'webhook_auth_header_name': WEBHOOK_AUTH_HEADER, 'webhook_auth_header_value': webhook_secret}
+            return await client.submit(
+                await client.upload(file_path),
+                webhook_url=webhook_url,
+                **(auth if webhook_secret else {}),
+                **self.config
+            )
+        return run_in_background(submit())
+
+    def fetch(self, external_id, file_path):
+        transcript = run_in_background(self.client().get(external_id))
+        if transcript['status'] == 'error':
+            raise RuntimeError(f"Transcription failed: {transcript.get('error')}")
+        return parse_transcript(transcript) if transcript['status'] == 'completed' else None
+
+    def realtime(self, *, sample_rate, on_result, on_error, on_open):
+        import assemblyai as aai
+        self._configure()
+
+        def on_data(transcript):
+            if not transcript.text:
+                return
+            on_result(LiveResult(
+                text=transcript.text,
+                is_final=isinstance(transcript, aai.RealtimeFinalTranscript),
+                timestamp=transcript.audio_start / 1000,
+                confidence=transcript.confidence,
+                words=[
+                    {'text': word.text, 'start': word.start / 1000, 'end': word.end / 1000, 'confidence': word.confidence}
+                    for word in transcript.words
+                ]
+            ))
+
+        return AssemblyAIRealtimeTranscriber(aai.RealtimeTranscriber(
+            sample_rate=sample_rate,
+            word_boost=FILLER_BOOST,
+            on_data=on_data,
+            on_error=on_error,
+            on_open=lambda session: on_open(str(session.session_id))
+        ))
+
+
+class AssemblyAIRealtimeTranscriber:
+    """The SDK's real-time transcriber, plus the depth of its send queue"""
+
+    def __init__(self, transcriber):
+        self.transcriber = transcriber
+
+    def connect(self):
+        self.transcriber.connect()
+
+    def stream(self, data: bytes):
+        self.transcriber.stream(data)
+
+    def pending(self) -> int:
+        # The SDK queues writes for its sender thread without exposing the
+        # depth, so read it from the queue directly
+        return self.transcriber._impl._write_queue.qsize()
+
+    def close(self):
+        self.transcriber.close()
+
+
+# Vocabulary for generated transcripts, with fillers at roughly real rates
+_LOCAL_VOCABULARY = (
+    'today we are going to talk about how public speaking improves with practice and feedback '
+    'every great speaker started somewhere and the audience wants you to succeed'
+).split()
+_LOCAL_FILLERS = ['um', 'uh', 'like', 'so']
+
+
+class LocalBackend(TranscriptionBackend):
+    """Deterministic offline stand-in for a remote transcription service"""
+    name = 'local'
+    webhook_attempts = 10
+    webhook_retry_seconds = 1.0
+
+    def __init__(self, fixture_dir: Optional[str] = None, latency_seconds: float = 0.0,
+                 realtime_factor: float = 0.0, words_per_second: float = 2.3):
+        self.fixture_dir = fixture_dir
+        self.latency_seconds = latency_seconds
+        self.realtime_factor = realtime_factor
+        self.words_per_second = words_per_second
+
+    def transcribe(self, file_path: str) -> TranscriptionResult:
+        result = self._result(file_path)
+        time.sleep(self.delay(result.audio_duration))
+        return result
+
+    async def transcribe_async(self, file_path: str) -> TranscriptionResult:
+        result = await asyncio.to_thread(self._result, file_path)
+        await asyncio.sleep(self.delay(result.audio_duration))
+        return result
+
+    def submit(self, file_path, webhook_url, webhook_secret=''):
+        external_id = f"local-{uuid.uuid4()}"
+        duration = _audio_duration(file_path)
+
+        async def notify():
+            import aiohttp
+            await asyncio.sleep(self.delay(duration))
+            headers = {WEBHOOK_AUTH_HEADER: webhook_secret} if webhook_secret else {}
+            payload = {'transcript_id': external_id, 'status': 'completed'}
+            # Like the real service, retry deliveries that aren't acknowledged
+            for attempt in range(self.webhook_attempts):
+                try:
+                    async with aiohttp.ClientSession() as session:
+                        async with session.post(webhook_url, json=payload, headers=headers) as response:
+                            response.raise_for_status()
+                            return
+                except Exception as e:
+                    error = e
+                await asyncio.sleep(self.webhook_retry_seconds)
+            # The parked job's lock expiry is the fallback
+            print(f"Local transcription webhook for {external_id} failed: {str(error)}")
+
+        asyncio.run_coroutine_threadsafe(notify(), background_loop())
+        return external_id
+
+    def fetch(self, external_id, file_path):
+        # Results are a pure function of the audio, so any process can collect them
+        return self._result(file_path)
+
+    def delay(self, duration: float) -> float:
+        """Simulated service turnaround for a recording"""
+        return self.latency_seconds + self.realtime_factor * duration
+
+    def _result(self, file_path: str) -> TranscriptionResult:
+        digest = _file_digest(file_path)
+        fixture = self._load_fixture(file_path, digest)
+        duration = fixture.get('audio_duration') if fixture else None
+        if duration is None:
+            duration = _audio_duration(file_path)
+
+        if fixture:
+            words = fixture['words']
+            text = fixture.get('text') or ' '.join(word['text'] for word in words)
+        else:
+            words = self.generate_words(0.0, duration, seed=digest)
+            text = ' '.join(word['text'] for word in words)
+        return TranscriptionResult(text, words, duration)
+
+    def _load_fixture(self, file_path: str, digest: str) -> Optional[Dict]:
+        if not self.fixture_dir:
+            return None
+        basename = os.path.splitext(os.path.basename(file_path))[0]
+        for name in (digest, basename):
+            path = os.path.join(self.fixture_dir, f"{name}.json")
+            if os.path.exists(path):
+                with open(path) as f:
+                    return json.load(f)
+        return None
+
+    def generate_words(self, start: float, end: float, seed: str) -> List[Dict]:
+        """Plausible word timings for a stretch of audio, identical for the same seed"""
+        rng = random.Random(seed)
+        words, t = [], start
+        step = 1 / self.words_per_second
+        while t + step * 0.6 <= end:
+            length = step * rng.uniform(0.5, 0.8)
+            text = rng.choice(_LOCAL_FILLERS) if rng.random() < 0.04 else rng.choice(_LOCAL_VOCABULARY)
+            words.append({
+                'text': text,
+                'start': round(t, 3),
+                'end': round(t + length, 3),
+                'confidence': round(rng.uniform(0.75, 0.99), 3)
+            })
+            # Occasional long pause between sentences
+            t += step + (rng.uniform(1.0, 2.5) if rng.random() < 0.03 else 0.0)
+        return words
+
+    def realtime(self, *, sample_rate, on_result, on_error, on_open):
+        return LocalRealtimeTranscriber(self, sample_rate, on_result, on_error, on_open)
+
+
+class LocalRealtimeTranscriber:
+    """Emits a partial and a final result per second of streamed audio"""
+
+    segment_seconds = 1.0
+
+    def __init__(self, backend: LocalBackend, sample_rate: int, on_result, on_error, on_open, sample_width: int = 2):
+        self.backend = backend
+        self.bytes_per_second = sample_rate * sample_width
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_open = on_open
+        self.session_id = str(uuid.uuid4())
+        self.received = 0
+        self.emitted_seconds = 0.0
+        # Chunks streamed since the last segment, and those in queued segments
+        self._unqueued_chunks = 0
+        self._pending_chunks = 0
+        self._lock = threading.Lock()
+        self._segments = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def connect(self):
+        self._thread.start()
+        self.on_open(self.session_id)
+
+    def stream(self, data: bytes):
+        with self._lock:
+            self.received += len(data)
+            self._unqueued_chunks += 1
+            while self.received / self.bytes_per_second - self.emitted_seconds >= self.segment_seconds:
+                self._queue_segment(self.emitted_seconds)
+                self.emitted_seconds += self.segment_seconds
+
+    def pending(self) -> int:
+        """Streamed chunks in segments that haven't been transcribed yet"""
+        return self._pending_chunks
+
+    def close(self):
+        with self._lock:
+            tail = self.received / self.bytes_per_second - self.emitted_seconds
+            if tail > 0:
+                self._queue_segment(self.emitted_seconds)
+                self.emitted_seconds += tail
+        self._segments.put(None)
+        self._thread.join()
+
+    def _queue_segment(self, start: float):
+        self._segments.put((start, self._unqueued_chunks))
+        self._pending_chunks += self._unqueued_chunks
+        self._unqueued_chunks = 0
+
+    def _run(self):
+        while True:
+            segment = self._segments.get()
+            if segment is None:
+                return
+            start, chunks = segment
+            try:
+                self._transcribe_segment(start)
+            finally:
+                with self._lock:
+                    self._pending_chunks -= chunks
+
+    def _transcribe_segment(self, start: float):
+        time.sleep(self.backend.latency_seconds)
+        end = min(start + self.segment_seconds, self.received / self.bytes_per_second)
+        words = self.backend.generate_words(start, end, seed=f"{self.session_id}:{start}")
+        if not words:
+            return
+        confidence = sum(word['confidence'] for word in words) / len(words)
+        partial = words[:(len(words) + 1) // 2]
+        try:
+            self.on_result(LiveResult(' '.join(word['text'] for word in partial), False, start, confidence, partial))
+            self.on_result(LiveResult(' '.join(word['text'] for word in words), True, start, confidence, words))
+        except Exception as e:
+            self.on_error(e)
+
+
+def parse_transcript(transcript: Dict) -> TranscriptionResult:
+    """A completed AssemblyAI transcript as JSON; its word timings are in milliseconds"""
+    words = [
+        {'text': word['text'], 'start': word['start'] / 1000, 'end': word['end'] / 1000, 'confidence': word['confidence']}
+        for word in transcript.get('words') or []
+    ]
+    return TranscriptionResult(transcript.get('text') or '', words, transcript.get('audio_duration'))
+
+
+def _file_digest(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _audio_duration(file_path: str, estimate: bool = True) -> Optional[float]:
+    try:
+        import soundfile as sf
+        return sf.info(file_path).duration
+    except Exception:
+        # Not a format soundfile reads; assume 16kHz 16-bit mono
+        return os.path.getsize(file_path) / 32000 if estimate else None
+
+
+def transcribe_file(file_path: str, backend: Optional[TranscriptionBackend] = None) -> TranscriptionResult:
+    """Transcribe an upload, in concurrent segments when it is long enough"""
+    backend = backend or get_transcription_backend()
+    threshold = getattr(settings, 'TRANSCRIPTION_SEGMENT_THRESHOLD_SECONDS', 0)
+    if threshold:
+        # Segmenting needs a format soundfile can decode
+        duration = _audio_duration(file_path, estimate=False)
+        if duration is not None and duration > threshold:
+            from .segmentation import transcribe_segmented
+            return transcribe_segmented(
+                backend,
+                file_path,
+                segment_seconds=getattr(settings, 'TRANSCRIPTION_SEGMENT_SECONDS', 60),
+                concurrency=getattr(settings, 'TRANSCRIPTION_SEGMENT_CONCURRENCY', 4),
+                search_seconds=getattr(settings, 'TRANSCRIPTION_SEGMENT_SEARCH_SECONDS', 5)
+            )
+    return backend.transcribe(file_path)
+
+
+_backend: Optional[TranscriptionBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_transcription_backend() -> TranscriptionBackend:
+    """The process-wide backend selected by ``TRANSCRIPTION_BACKEND``"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = getattr(settings, 'TRANSCRIPTION_BACKEND', 'assemblyai')
+                if name == 'local':
+                    backend = LocalBackend(
+                        fixture_dir=getattr(settings, 'TRANSCRIPTION_LOCAL_FIXTURE_DIR', None),
+                        latency_seconds=getattr(settings, 'TRANSCRIPTION_LOCAL_LATENCY_SECONDS', 0.0),
+                        realtime_factor=getattr(settings, 'TRANSCRIPTION_LOCAL_REALTIME_FACTOR', 0.0)
+                    )
+                elif name == 'assemblyai':
+                    backend = AssemblyAIBackend()
+                else:
+                    raise ValueError(f"Unknown TRANSCRIPTION_BACKEND: {name}")
+                # The live route is always mounted; webhooks only when configured
+                if not backend.supports_realtime:
+                    raise ImproperlyConfigured(f"TRANSCRIPTION_BACKEND {name} can't transcribe live audio")
+                if getattr(settings, 'TRANSCRIPTION_WEBHOOK_URL', None) and not backend.supports_webhooks:
+                    raise ImproperlyConfigured(
+                        f"TRANSCRIPTION_BACKEND {name} can't submit jobs to TRANSCRIPTION_WEBHOOK_URL"
+                    )
+                _backend = backend
+    return _backend
@@ -9,4 +9,7 @@ urlpatterns = [
     path('api/speeches/<int:speech_id>/retry/', views.retry_processing, name='retry-processing'),
     path('api/exemplary-speeches/', views.ExemplarySpeechList.as_view(), name='exemplary-speech-list'),
     path('api/user/statistics/', views.user_statistics, name='user-statistics'),
+    path('api/embeddings/stats/', views.embedding_stats, name='embedding-stats'),
+    path('api/live/stats/', views.live_stats, name='live-stats'),
+    path('api/transcription/webhook/', views.transcription_webhook, name='transcription-webhook'),
 ]
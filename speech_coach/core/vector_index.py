@@ -0,0 +1,516 @@
+"""In-process vector indexes over exemplary speech embeddings.
+
+Embeddings are kept as one pre-normalised float32 matrix so a similarity
+lookup is a single matrix-vector product plus an ``argpartition`` top-k,
+instead of a table scan that deserialises every row. ``IVFIndex`` adds an
+approximate mode for large catalogues: vectors are clustered with k-means
+and a query only scores the rows in its ``nprobe`` closest clusters.
+
+Rows can carry string attributes (category, occasion) which are stored as
+integer codes, so filters are applied as a mask before scoring rather than
+to the top-k afterwards.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+FILTER_ATTRIBUTES = ('category', 'occasion')
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise rows as float32, leaving all-zero rows as zeros"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the ``k`` highest scores, best first"""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+class VectorIndex:
+    """Exact cosine-similarity index mapping integer ids to vectors"""
+
+    def __init__(self, dimension: Optional[int] = None, attributes: Sequence[str] = FILTER_ATTRIBUTES):
+        self.dimension = dimension
+        self.attributes = tuple(attributes)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix = np.empty((0, dimension or 0), dtype=np.float32)
+        self._codes = {name: np.empty(0, dtype=np.int32) for name in self.attributes}
+        self._vocab = {name: {} for name in self.attributes}
+        self._positions = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, item_id):
+        return item_id in self._positions
+
+    def _code(self, name: str, value) -> int:
+        vocab = self._vocab[name]
+        value = value or ''
+        if value not in vocab:
+            vocab[value] = len(vocab)
+        return vocab[value]
+
+    def build(self, items: Iterable[Tuple]):
+        """Replace the contents with ``(id, vector)`` or ``(id, vector, attributes)`` items"""
+        items = list(items)
+        ids = np.fromiter((item[0] for item in items), dtype=np.int64, count=len(items))
+        if items:
+            matrix = normalize(np.stack([np.asarray(item[1], dtype=np.float32) for item in items]))
+        else:
+            matrix = np.empty((0, self.dimension or 0), dtype=np.float32)
+
+        with self._lock:
+            self._vocab = {name: {} for name in self.attributes}
+            self._codes = {
+                name: np.fromiter(
+                    (self._code(name, (item[2] if len(item) > 2 else {}).get(name)) for item in items),
+                    dtype=np.int32,
+                    count=len(items)
+                )
+                for name in self.attributes
+            }
+            self._ids = ids
+            self._matrix = matrix
+            self._positions = {int(item_id): row for row, item_id in enumerate(ids)}
+            self._size = len(ids)
+            if items:
+                self.dimension = matrix.shape[1]
+            self._after_build()
+
+    def _after_build(self):
+        """Hook for subclasses, called with the lock held"""
+
+    def _grow(self):
+        # Grow geometrically so repeated adds stay amortised O(1)
+        capacity = max(16, 2 * len(self._ids))
+        ids = np.empty(capacity, dtype=np.int64)
+        matrix = np.empty((capacity, self.dimension), dtype=np.float32)
+        ids[:self._size] = self._ids[:self._size]
+        matrix[:self._size] = self._matrix[:self._size]
+        self._ids, self._matrix = ids, matrix
+        for name in self.attributes:
+            codes = np.empty(capacity, dtype=np.int32)
+            codes[:self._size] = self._codes[name][:self._size]
+            self._codes[name] = codes
+
+    def add(self, item_id: int, vector: Sequence[float], attributes: Optional[Dict] = None):
+        """Insert or replace a single vector"""
+        row_vector = normalize(np.asarray(vector, dtype=np.float32).reshape(-1))
+        attributes = attributes or {}
+
+        with self._lock:
+            if self.dimension is None or self._size == 0:
+                self.dimension = row_vector.shape[0]
+                if self._matrix.shape[1] != self.dimension:
+                    self._matrix = np.empty((0, self.dimension), dtype=np.float32)
+                    self._ids = np.empty(0, dtype=np.int64)
+            elif row_vector.shape[0] != self.dimension:
+                raise ValueError(f"Expected a {self.dimension}-dimensional vector, got {row_vector.shape[0]}")
+
+            row = self._positions.get(item_id)
+            if row is None:
+                row = self._size
+                if row == len(self._ids):
+                    self._grow()
+                self._ids[row] = item_id
+                self._positions[item_id] = row
+                self._size += 1
+            self._matrix[row] = row_vector
+            for name in self.attributes:
+                self._codes[name][row] = self._code(name, attributes.get(name))
+            self._after_add(row)
+
+    def _after_add(self, row: int):
+        """Hook for subclasses, called with the lock held"""
+
+    def remove(self, item_id: int):
+        """Drop a vector if present"""
+        with self._lock:
+            row = self._positions.pop(item_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                # Move the last row into the gap to keep the matrix dense
+                moved_id = int(self._ids[last])
+                self._ids[row] = moved_id
+                self._matrix[row] = self._matrix[last]
+                for name in self.attributes:
+                    self._codes[name][row] = self._codes[name][last]
+                self._after_move(last, row)
+                self._positions[moved_id] = row
+            self._size = last
+
+    def _after_move(self, source: int, target: int):
+        """Hook for subclasses, called with the lock held"""
+
+    def _filter_mask(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """Boolean row mask for exact attribute matches, or None for no filter"""
+        mask = None
+        for name, value in (filters or {}).items():
+            if value is None:
+                continue
+            code = self._vocab[name].get(value)
+            if code is None:
+                return np.zeros(self._size, dtype=bool)
+            matches = self._codes[name][:self._size] == code
+            mask = matches if mask is None else mask & matches
+        return mask
+
+    def _candidate_rows(self, query: np.ndarray, k: int, mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Rows to score, or None to score every row"""
+        return None if mask is None else np.flatnonzero(mask)
+
+    def search(self, query: Sequence[float], k: int = 5, filters: Optional[Dict] = None) -> List[Tuple[int, float]]:
+        """Return up to ``k`` ``(id, cosine_similarity)`` pairs, best first"""
+        query = normalize(np.asarray(query, dtype=np.float32).reshape(-1))
+
+        with self._lock:
+            if self._size == 0 or k <= 0:
+                return []
+            rows = self._candidate_rows(query, k, self._filter_mask(filters))
+            if rows is None:
+                scores = self._matrix[:self._size] @ query
+                ids = self._ids[:self._size].copy()
+            else:
+                scores = self._matrix[rows] @ query
+                ids = self._ids[rows]
+
+        top = top_k(scores, k)
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def _state(self) -> Dict:
+        size = self._size
+        state = {
+            'ids': self._ids[:size],
+            'matrix': self._matrix[:size],
+            'vocab': np.array(json.dumps(self._vocab)),
+        }
+        for name in self.attributes:
+            state[f'codes_{name}'] = self._codes[name][:size]
+        return state
+
+    def _load_state(self, state):
+        self._ids = state['ids'].astype(np.int64)
+        self._matrix = state['matrix'].astype(np.float32)
+        self._vocab = json.loads(str(state['vocab']))
+        self._codes = {name: state[f'codes_{name}'].astype(np.int32) for name in self.attributes}
+        self._positions = {int(item_id): row for row, item_id in enumerate(self._ids)}
+        self._size = len(self._ids)
+        self.dimension = self._matrix.shape[1] if self._size else self.dimension
+
+    def save(self, path: str, metadata: Optional[Dict] = None):
+        """Write the index to an ``.npz`` file (atomically replaced)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._lock:
+            state = self._state()
+        state['metadata'] = np.array(json.dumps(metadata or {}))
+        temp_path = f"{path}.tmp.npz"
+        np.savez(temp_path, **state)
+        os.replace(temp_path, path)
+
+    def load(self, path: str) -> Dict:
+        """Read an index written by ``save``; returns its metadata"""
+        with np.load(path, allow_pickle=False) as state:
+            with self._lock:
+                self._load_state(state)
+            return json.loads(str(state['metadata']))
+
+
+class IVFIndex(VectorIndex):
+    """Approximate index: inverted lists over spherical k-means clusters
+
+    Only rows in the ``nprobe`` clusters nearest the query are scored. With
+    a filter, more clusters are probed until at least ``k`` candidates are
+    found. Below ``min_train_size`` rows searches are exact.
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        attributes: Sequence[str] = FILTER_ATTRIBUTES,
+        n_lists: Optional[int] = None,
+        nprobe: int = 8,
+        min_train_size: int = 1000,
+        training_iterations: int = 10,
+        seed: int = 0
+    ):
+        super().__init__(dimension, attributes)
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.training_iterations = training_iterations
+        self.seed = seed
+        self.centroids = None
+        self.trained_size = 0
+        self._assignments = np.empty(0, dtype=np.int32)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self):
+        """Cluster the current vectors and assign every row to a list"""
+        with self._lock:
+            size = self._size
+            if size < self.min_train_size:
+                self.centroids = None
+                return
+            # A configured list count can exceed the rows there are to seed it
+            n_lists = min(self.n_lists or max(1, int(np.sqrt(size))), size)
+            rng = np.random.default_rng(self.seed)
+            data = self._matrix[:size]
+            sample = data[rng.choice(size, min(size, 256 * n_lists), replace=False)]
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.training_iterations):
+            assignments = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+            # Re-seed empty clusters from random sample rows
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = normalize(sums)
+
+        with self._lock:
+            self.centroids = centroids
+            self._assignments = np.empty(len(self._ids), dtype=np.int32)
+            self._assignments[:self._size] = self._assign(self._matrix[:self._size], centroids)
+            self.trained_size = self._size
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+
+    def _after_build(self):
+        self.centroids = None
+        self.trained_size = 0
+        self._assignments = np.empty(len(self._ids), dtype=np.int32)
+
+    def _grow(self):
+        super()._grow()
+        assignments = np.empty(len(self._ids), dtype=np.int32)
+        size = min(self._size, len(self._assignments))
+        assignments[:size] = self._assignments[:size]
+        self._assignments = assignments
+
+    def _after_add(self, row: int):
+        if self.centroids is not None:
+            self._assignments[row] = int(np.argmax(self.centroids @ self._matrix[row]))
+
+    def _after_move(self, source: int, target: int):
+        if self.centroids is not None:
+            self._assignments[target] = self._assignments[source]
+
+    def _candidate_rows(self, query: np.ndarray, k: int, mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if self.centroids is None:
+            return super()._candidate_rows(query, k, mask)
+
+        order = np.argsort(-(self.centroids @ query))
+        assignments = self._assignments[:self._size]
+        nprobe = min(self.nprobe, len(order))
+        while True:
+            candidates = np.isin(assignments, order[:nprobe])
+            if mask is not None:
+                candidates &= mask
+            rows = np.flatnonzero(candidates)
+            if len(rows) >= k or nprobe >= len(order):
+                return rows
+            nprobe = min(2 * nprobe, len(order))
+
+    def _state(self) -> Dict:
+        state = super()._state()
+        if self.centroids is not None:
+            state['centroids'] = self.centroids
+            state['assignments'] = self._assignments[:self._size]
+        return state
+
+    def _load_state(self, state):
+        super()._load_state(state)
+        if 'centroids' in state:
+            self.centroids = state['centroids'].astype(np.float32)
+            self._assignments = state['assignments'].astype(np.int32)
+            self.trained_size = self._size
+        else:
+            self._after_build()
+
+
+class ExemplaryIndex:
+    """Vector index kept in sync with ExemplarySpeech rows
+
+    Embeddings completed in this process are added immediately. Changes
+    made by other processes are picked up by a cheap max(updated_at)/count
+    check, run at most every ``refresh_seconds``. When ``path`` is set the
+    index is persisted there and reused on startup if it is still current.
+    """
+
+    def __init__(self, index: VectorIndex, refresh_seconds: float = 30.0, path: Optional[str] = None):
+        self.index = index
+        self.refresh_seconds = refresh_seconds
+        self.path = path
+        self._synced_at = None
+        self._stamp = None
+        self._checked_at = 0.0
+        self._sync_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._stamp is not None
+
+    @staticmethod
+    def _queryset():
+        from .models import ExemplarySpeech
+        return ExemplarySpeech.objects.exclude(embedding__isnull=True)
+
+    def _rows(self, queryset):
+        for item_id, embedding, category, occasion in queryset.values_list('id', 'embedding', 'category', 'occasion'):
+            yield item_id, embedding, {'category': category, 'occasion': occasion}
+
+    def _current_stamp(self):
+        from django.db.models import Count, Max
+        stamp = self._queryset().aggregate(count=Count('id'), latest=Max('updated_at'))
+        return stamp['count'], stamp['latest'].isoformat() if stamp['latest'] else None
+
+    def _train(self):
+        if isinstance(self.index, IVFIndex):
+            self.index.train()
+
+    def rebuild(self, use_saved: bool = True):
+        """Reload the index, starting from the saved copy on disk when there is one"""
+        with self._sync_lock:
+            stamp = self._current_stamp()
+            saved_stamp = self._load_saved() if use_saved else None
+            if saved_stamp is None:
+                self.index.build(self._rows(self._queryset()))
+                self._train()
+                self._save(stamp)
+                self._stamp = stamp
+            else:
+                self._stamp = saved_stamp
+            self._synced_at = self._stamp[1]
+            self._checked_at = time.monotonic()
+
+        # A saved copy only needs the rows changed since it was written
+        if self._stamp != stamp:
+            self.refresh(force=True)
+
+    def _load_saved(self) -> Optional[Tuple]:
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            metadata = self.index.load(self.path)
+            return tuple(metadata['stamp'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save(self, stamp):
+        if self.path:
+            self.index.save(self.path, metadata={'stamp': list(stamp)})
+
+    def refresh(self, force: bool = False):
+        """Catch up with rows changed by other processes"""
+        if self._stamp is None:
+            self.rebuild()
+            return
+        if not force and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+
+        with self._sync_lock:
+            self._checked_at = time.monotonic()
+            stamp = self._current_stamp()
+            if stamp == self._stamp:
+                return
+
+            changed = self._queryset()
+            if self._synced_at is not None:
+                changed = changed.filter(updated_at__gte=self._synced_at)
+            for item_id, embedding, attributes in self._rows(changed):
+                self.index.add(item_id, embedding, attributes)
+
+            self._stamp = stamp
+            self._synced_at = stamp[1]
+
+        # Deletions can't be seen incrementally; fall back to a full reload
+        if len(self.index) != stamp[0]:
+            self.rebuild(use_saved=False)
+            return
+
+        # Re-cluster once the catalogue has doubled since the last training
+        if isinstance(self.index, IVFIndex) and len(self.index) >= max(2 * self.index.trained_size, self.index.min_train_size):
+            with self._sync_lock:
+                self._train()
+                self._save(self._stamp)
+
+    def add(self, item_id: int, vector: Sequence[float], attributes: Optional[Dict] = None):
+        self.index.add(item_id, vector, attributes)
+
+    def remove(self, item_id: int):
+        self.index.remove(item_id)
+
+    def search(self, query: Sequence[float], k: int = 5, filters: Optional[Dict] = None) -> List[Tuple[int, float]]:
+        self.refresh()
+        return self.index.search(query, k, filters)
+
+
+_exemplary_index = None
+_index_lock = threading.Lock()
+
+
+def get_exemplary_index() -> ExemplaryIndex:
+    """Return this process's exemplary speech index, creating it on first use"""
+    global _exemplary_index
+    if _exemplary_index is None:
+        with _index_lock:
+            if _exemplary_index is None:
+                path = None
+                if getattr(settings, 'SIMILARITY_INDEX_BACKEND', 'exact') == 'ivf':
+                    index = IVFIndex(
+                        n_lists=getattr(settings, 'SIMILARITY_IVF_LISTS', None),
+                        nprobe=getattr(settings, 'SIMILARITY_IVF_NPROBE', 8)
+                    )
+                    path = os.path.join(getattr(settings, 'SIMILARITY_INDEX_DIR'), 'exemplary_ivf.npz')
+                else:
+                    index = VectorIndex()
+                _exemplary_index = ExemplaryIndex(
+                    index,
+                    refresh_seconds=getattr(settings, 'EXEMPLARY_INDEX_REFRESH_SECONDS', 30.0),
+                    path=path
+                )
+    return _exemplary_index
+
+
+def index_exemplary_embedding(speech):
+    """Add a freshly embedded exemplary speech to a loaded index"""
+    index = get_exemplary_index()
+    # An index that hasn't loaded yet will read the row from the database
+    if index.is_loaded:
+        index.add(speech.id, speech.embedding, {'category': speech.category, 'occasion': speech.occasion})
+
+
+def remove_exemplary_embedding(speech_id: int):
+    index = get_exemplary_index()
+    if index.is_loaded:
+        index.remove(speech_id)
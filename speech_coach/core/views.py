@@ -1,16 +1,22 @@
 from django.shortcuts import render
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from django.shortcuts import get_object_or_404
 from .models import UserSpeech, ExemplarySpeech, UserProfile, InterviewSession
 from .serializers import UserSpeechSerializer, ExemplarySpeechSerializer, UserProfileSerializer, InterviewSessionSerializer
 from django.contrib.auth.models import User
+from django.conf import settings
+import hmac
 import json
-from channels.generic.websocket import AsyncWebsocketConsumer
-import asyncio
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from .embeddings import get_engine, get_batcher
+from .pipeline import restart_failed, resume_waiting, stage_timings
+from .write_buffer import write_stats
+from .async_utils import loop_lag
+from .audio_buffer import audio_stats
+from .transcription import WEBHOOK_AUTH_HEADER
 
 # Create your views here.
 
@@ -51,7 +57,10 @@ def speech_analysis(request, speech_id):
                 'similarity_score': f"{s[1]*100:.1f}%",
                 'transcript': s[0].transcript
             }
-            for s in speech.find_similar_speeches()
+            for s in speech.find_similar_speeches(
+                category=request.query_params.get('category'),
+                occasion=request.query_params.get('occasion')
+            )
         ] if speech.status == 'completed' else []
     }
     
@@ -70,7 +79,8 @@ def speech_status(request, speech_id):
     speech = get_object_or_404(UserSpeech, id=speech_id, user=request.user)
     return Response({
         'status': speech.status,
-        'error': speech.error_message if speech.status == 'failed' else None
+        'error': speech.error_message if speech.status == 'failed' else None,
+        'stages': stage_timings(speech)
     })
 
 @api_view(['POST'])
@@ -78,18 +88,34 @@ def speech_status(request, speech_id):
 def retry_processing(request, speech_id):
     """Retry processing a failed speech"""
     speech = get_object_or_404(UserSpeech, id=speech_id, user=request.user)
-    if speech.status == 'failed':
-        speech.status = 'pending'
-        speech.error_message = None
-        speech.save()
-        # Restart processing
-        speech.transcribe_and_analyze()
+    # Re-run only the failed stages (and whatever waits on them); feedback
+    # can fail on a speech whose analysis completed
+    if restart_failed(speech):
         return Response({'status': 'Processing restarted'})
     return Response(
         {'error': 'Can only retry failed speeches'}, 
         status=status.HTTP_400_BAD_REQUEST
     )
 
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def transcription_webhook(request):
+    """Resume the stage waiting on a finished transcription job"""
+    # Without a configured secret nothing can be authenticated, so nothing is accepted
+    secret = getattr(settings, 'TRANSCRIPTION_WEBHOOK_SECRET', '')
+    received = request.headers.get(WEBHOOK_AUTH_HEADER, '')
+    if not secret or not hmac.compare_digest(received.encode(), secret.encode()):
+        return Response({'error': 'Invalid webhook secret'}, status=status.HTTP_403_FORBIDDEN)
+    transcript_id = request.data.get('transcript_id')
+    if not transcript_id:
+        return Response({'error': 'transcript_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+    # Errors are resumed too; collecting the result then fails the stage
+    if resume_waiting(transcript_id):
+        return Response({'status': 'resumed'})
+    # Not parked yet (the callback beat the worker) or already handled; the sender retries
+    return Response({'status': 'unknown'}, status=status.HTTP_404_NOT_FOUND)
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_statistics(request):
@@ -112,6 +138,25 @@ def user_statistics(request):
     
     return Response(stats)
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def embedding_stats(request):
+    """Get model load, inference and batching stats for this worker's embedding engine"""
+    return Response({
+        **get_engine().stats(),
+        'batching': get_batcher().stats()
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def live_stats(request):
+    """Get live-session write coalescing, event loop lag and audio buffer stats for this process"""
+    return Response({
+        **write_stats(),
+        'loop_lag': loop_lag.stats(),
+        'audio': audio_stats()
+    })
+
 class UserProfileDetail(generics.RetrieveUpdateAPIView):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
@@ -120,44 +165,6 @@ class UserProfileDetail(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user.profile
 
-class LiveTranscriptionConsumer(AsyncWebsocketConsumer):
-    async def connect(self):
-        self.speech_id = self.scope['url_route']['kwargs']['speech_id']
-        self.speech = await self.get_speech()
-        
-        if not self.speech:
-            await self.close()
-            return
-            
-        await self.accept()
-        
-        # Start transcription session
-        self.transcriber = await self.start_transcription()
-        
-    async def disconnect(self, close_code):
-        if hasattr(self, 'transcriber'):
-            await self.transcriber.close()
-    
-    async def receive(self, text_data=None, bytes_data=None):
-        """Handle incoming audio chunks"""
-        if bytes_data:
-            # Process audio chunk
-            await self.transcriber.process_audio(bytes_data)
-            
-    async def transcription_result(self, result):
-        """Handle transcription result"""
-        await self.speech.handle_transcription_result(result)
-        
-        # Send result to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'transcription',
-            'text': result.text,
-            'is_final': result.is_final,
-            'confidence': result.confidence,
-            'words': result.words,
-            'analysis': await self.speech.get_analysis_summary()
-        }))
-
 class InterviewSessionViewSet(viewsets.ModelViewSet):
     serializer_class = InterviewSessionSerializer
     permission_classes = [permissions.AllowAny]
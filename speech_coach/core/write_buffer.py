@@ -0,0 +1,88 @@
+"""Write-behind buffering for high-frequency model updates.
+
+Live sessions change the same speech row and append log rows many times a
+second. ``WriteBehindBuffer`` collects those changes in memory and writes
+them in one transaction at most every ``flush_seconds``: a single
+``bulk_create`` per model for pending rows and a single ``UPDATE`` with
+every dirty field. Callers flush explicitly when a session ends.
+
+Process-wide counters compare the writes requested with the writes
+actually issued.
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional
+
+from django.db import transaction
+
+_stats_lock = threading.Lock()
+_stats = {'requested_writes': 0, 'db_writes': 0, 'flushes': 0}
+
+
+def write_stats() -> Dict[str, int]:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['writes_saved'] = stats['requested_writes'] - stats['db_writes']
+    return stats
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+
+class WriteBehindBuffer:
+    """Coalesces inserts and field updates for one model instance"""
+
+    def __init__(self, instance, flush_seconds: float, before_flush: Optional[Callable[[], None]] = None):
+        self.instance = instance
+        self.flush_seconds = flush_seconds
+        self.before_flush = before_flush
+        self.pending = []
+        self.dirty = set()
+        self.requested = 0
+        self.last_flush = time.monotonic()
+
+    def add(self, obj):
+        """Queue a new row for insertion"""
+        self.pending.append(obj)
+        self.requested += 1
+
+    def touch(self, *fields: str):
+        """Record that fields changed in memory; counts as one requested save"""
+        self.dirty.update(fields)
+        self.requested += 1
+
+    def flush_if_due(self) -> bool:
+        if time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """Write everything buffered in one transaction"""
+        self.last_flush = time.monotonic()
+        if not self.pending and not self.dirty:
+            return
+        if self.before_flush:
+            self.before_flush()
+
+        by_model = defaultdict(list)
+        for obj in self.pending:
+            by_model[type(obj)].append(obj)
+        with transaction.atomic():
+            for model, objs in by_model.items():
+                model.objects.bulk_create(objs)
+            if self.dirty:
+                self.instance.save(update_fields=sorted(self.dirty))
+
+        _count(
+            requested_writes=self.requested,
+            db_writes=len(by_model) + (1 if self.dirty else 0),
+            flushes=1
+        )
+        self.pending = []
+        self.dirty = set()
+        self.requested = 0
@@ -146,15 +146,119 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-# Add this with your other settings
+# Speech-to-text: 'assemblyai', or 'local' for the deterministic offline
+# stand-in used by load tests, benchmarks and CI (see core/transcription.py)
+TRANSCRIPTION_BACKEND = os.environ.get('TRANSCRIPTION_BACKEND', 'assemblyai')
+# Local backend: JSON word timings named <sha256>.json or <basename>.json
+TRANSCRIPTION_LOCAL_FIXTURE_DIR = os.environ.get('TRANSCRIPTION_LOCAL_FIXTURE_DIR')
+# Local backend turnaround: a fixed delay plus this many seconds per second of audio
+TRANSCRIPTION_LOCAL_LATENCY_SECONDS = float(os.environ.get('TRANSCRIPTION_LOCAL_LATENCY_SECONDS', '0'))
+TRANSCRIPTION_LOCAL_REALTIME_FACTOR = float(os.environ.get('TRANSCRIPTION_LOCAL_REALTIME_FACTOR', '0'))
+# When set, transcription jobs are submitted with this callback URL (the
+# transcription-webhook route) and park until the service calls it, instead
+# of holding a worker thread; the secret authenticates the callback
+TRANSCRIPTION_WEBHOOK_URL = os.environ.get('TRANSCRIPTION_WEBHOOK_URL')
+TRANSCRIPTION_WEBHOOK_SECRET = os.environ.get('TRANSCRIPTION_WEBHOOK_SECRET', '')
+if TRANSCRIPTION_WEBHOOK_URL and not TRANSCRIPTION_WEBHOOK_SECRET:
+    raise ImproperlyConfigured('TRANSCRIPTION_WEBHOOK_SECRET must be set when TRANSCRIPTION_WEBHOOK_URL is')
+# Uploads longer than this are cut at silences into segments of about
+# TRANSCRIPTION_SEGMENT_SECONDS and transcribed concurrently; 0 disables
+TRANSCRIPTION_SEGMENT_THRESHOLD_SECONDS = float(os.environ.get('TRANSCRIPTION_SEGMENT_THRESHOLD_SECONDS', '0'))
+TRANSCRIPTION_SEGMENT_SECONDS = float(os.environ.get('TRANSCRIPTION_SEGMENT_SECONDS', '60'))
+TRANSCRIPTION_SEGMENT_CONCURRENCY = int(os.environ.get('TRANSCRIPTION_SEGMENT_CONCURRENCY', '4'))
+# How far from each target a cut may move to find silence
+TRANSCRIPTION_SEGMENT_SEARCH_SECONDS = float(os.environ.get('TRANSCRIPTION_SEGMENT_SEARCH_SECONDS', '5'))
+
 ASSEMBLYAI_API_KEY = os.environ.get('ASSEMBLYAI_API_KEY')
-if not ASSEMBLYAI_API_KEY:
+if not ASSEMBLYAI_API_KEY and TRANSCRIPTION_BACKEND == 'assemblyai':
     raise ImproperlyConfigured('ASSEMBLYAI_API_KEY environment variable is not set')
+# Batch transcriptions share one pooled HTTP session per process; this many
+# may be in flight at once, polled every few seconds with backoff
+ASSEMBLYAI_MAX_IN_FLIGHT = int(os.environ.get('ASSEMBLYAI_MAX_IN_FLIGHT', '100'))
+ASSEMBLYAI_HTTP_CONNECTIONS = int(os.environ.get('ASSEMBLYAI_HTTP_CONNECTIONS', '16'))
+ASSEMBLYAI_POLL_SECONDS = float(os.environ.get('ASSEMBLYAI_POLL_SECONDS', '3'))
 
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 if not OPENAI_API_KEY:
     raise ImproperlyConfigured('OPENAI_API_KEY environment variable is not set')
 
+# Realtime proxy: events buffered per direction for each client before
+# the slower side is made to wait
+OPENAI_REALTIME_URL = os.environ.get('OPENAI_REALTIME_URL', 'wss://api.openai.com/v1/realtime')
+OPENAI_REALTIME_QUEUE_SIZE = int(os.environ.get('OPENAI_REALTIME_QUEUE_SIZE', '256'))
+# Text deltas arriving within this window are sent to the client as one
+# frame, up to this many characters; 0 characters turns coalescing off
+OPENAI_REALTIME_COALESCE_MS = float(os.environ.get('OPENAI_REALTIME_COALESCE_MS', '5'))
+OPENAI_REALTIME_COALESCE_CHARS = int(os.environ.get('OPENAI_REALTIME_COALESCE_CHARS', '512'))
+
+# Interview agent prompts carry the last few answers in full and a running
+# summary (capped at this many tokens) of everything before them
+INTERVIEW_CONTEXT_TURNS = int(os.environ.get('INTERVIEW_CONTEXT_TURNS', '6'))
+INTERVIEW_SUMMARY_MAX_TOKENS = int(os.environ.get('INTERVIEW_SUMMARY_MAX_TOKENS', '400'))
+
+# Audio embedding engine (one model instance per worker process)
+EMBEDDING_MODEL_NAME = os.environ.get('EMBEDDING_MODEL_NAME', 'facebook/wav2vec2-base-960h')
+EMBEDDING_TORCH_THREADS = int(os.environ.get('EMBEDDING_TORCH_THREADS', '0')) or None
+EMBEDDING_MAX_BATCH_SIZE = int(os.environ.get('EMBEDDING_MAX_BATCH_SIZE', '8'))
+EMBEDDING_MAX_WAIT_MS = int(os.environ.get('EMBEDDING_MAX_WAIT_MS', '50'))
+# Recordings longer than this are embedded in overlapping windows
+EMBEDDING_STREAMING_THRESHOLD_SECONDS = float(os.environ.get('EMBEDDING_STREAMING_THRESHOLD_SECONDS', '120'))
+EMBEDDING_WINDOW_SECONDS = float(os.environ.get('EMBEDDING_WINDOW_SECONDS', '30'))
+EMBEDDING_WINDOW_OVERLAP_SECONDS = float(os.environ.get('EMBEDDING_WINDOW_OVERLAP_SECONDS', '1'))
+
+# How often each process checks for exemplary embeddings added elsewhere
+EXEMPLARY_INDEX_REFRESH_SECONDS = float(os.environ.get('EXEMPLARY_INDEX_REFRESH_SECONDS', '30'))
+# 'exact' scans every exemplary embedding; 'ivf' probes the nearest k-means
+# clusters only (see `manage.py benchmark_similarity` for the trade-off)
+SIMILARITY_INDEX_BACKEND = os.environ.get('SIMILARITY_INDEX_BACKEND', 'exact')
+SIMILARITY_INDEX_DIR = os.path.join(BASE_DIR, 'indexes')
+SIMILARITY_IVF_LISTS = int(os.environ.get('SIMILARITY_IVF_LISTS', '0')) or None
+SIMILARITY_IVF_NPROBE = int(os.environ.get('SIMILARITY_IVF_NPROBE', '8'))
+
+# Transcripts, metrics and embeddings are reused across uploads of identical
+# audio; bump this after changing transcription or analysis settings
+AUDIO_CACHE_TRANSCRIPTION_VERSION = os.environ.get('AUDIO_CACHE_TRANSCRIPTION_VERSION', '1')
+
+# Live sessions buffer segments, transcript and metrics in memory and write
+# them in one transaction at most this often, and when the session ends
+LIVE_WRITE_FLUSH_SECONDS = float(os.environ.get('LIVE_WRITE_FLUSH_SECONDS', '5'))
+# Threads (and so database connections) for live-session ORM work per process
+LIVE_DB_THREADS = int(os.environ.get('LIVE_DB_THREADS', '8'))
+LIVE_SAMPLE_RATE = 16000
+# Browser audio is re-sliced into chunks of this length before streaming
+LIVE_AUDIO_CHUNK_MS = int(os.environ.get('LIVE_AUDIO_CHUNK_MS', '100'))
+# Audio held per connection while the transcriber is behind; older audio is dropped beyond this
+LIVE_AUDIO_MAX_BUFFER_MS = int(os.environ.get('LIVE_AUDIO_MAX_BUFFER_MS', '3000'))
+LIVE_UPSTREAM_MAX_PENDING_CHUNKS = int(os.environ.get('LIVE_UPSTREAM_MAX_PENDING_CHUNKS', '10'))
+LIVE_METRICS_WINDOW_SECONDS = float(os.environ.get('LIVE_METRICS_WINDOW_SECONDS', '60'))
+
+# Background job worker (`python manage.py run_jobs`)
+JOB_STAGE_CONCURRENCY = {
+    'transcription': int(os.environ.get('JOB_TRANSCRIPTION_CONCURRENCY', '4')),
+    'embedding': int(os.environ.get('JOB_EMBEDDING_CONCURRENCY', str(EMBEDDING_MAX_BATCH_SIZE))),
+    'feedback': int(os.environ.get('JOB_FEEDBACK_CONCURRENCY', '4')),
+}
+JOB_VISIBILITY_TIMEOUT_SECONDS = {
+    'transcription': 1800,
+    'embedding': 900,
+    'feedback': 300,
+}
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '5'))
+JOB_RETRY_BASE_SECONDS = 10
+JOB_RETRY_MAX_SECONDS = 600
+
+# Worker and engine messages from the core app go to the console
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core': {'handlers': ['console'], 'level': os.environ.get('CORE_LOG_LEVEL', 'INFO')},
+    },
+}
+
 # Add Channels configuration
 ASGI_APPLICATION = 'speech_coach.asgi.application'
 